@@ -0,0 +1,199 @@
+# 📄 armazenamento.py
+# Armazém em DISCO para as séries de campanhas grandes de Monte Carlo
+# (ex.: 100 mil rodadas x 500 amostras x 13 canais não cabem na RAM).
+#
+# Tudo é pré-alocado na criação, como arquivos .npy mapeados em memória
+# (np.memmap), numa pasta:
+#   series.npy     (canais, N, T) no dtype escolhido (float32 por padrão),
+#                  canal a canal (ver resultado.CANAIS): como a campanha
+#                  grava cenário -> semente, "o risco de um cenário" é
+#                  um trecho contíguo do arquivo;
+#   sem_regra.npy  (N, T) bool;
+#   indice.npy     (N,) estruturado: cenário, semente, hash dos
+#                  parâmetros e o resumo (disparado, t_disparo, risco_max);
+#   meta.json      canais, dtype, T, os nomes dos cenários e o motor fuzzy.
+# Cada rodada tem uma POSIÇÃO fixa (a da tarefa na campanha): processos
+# diferentes gravam em linhas diferentes do mesmo arquivo, sem trava.
+# Na leitura, filtra-se pelo índice (pequeno) e só as páginas das linhas
+# e canais pedidos são lidas do disco.
+
+import json
+import os
+
+import numpy as np
+
+from resultado import CANAIS, ResultadoSimulacao
+
+DTYPE_INDICE = np.dtype([
+    ('gravada', bool),
+    ('indice_cenario', np.int32),
+    ('semente', np.int64),
+    ('hash_parametros', 'S16'),
+    ('disparado', bool),
+    ('t_disparo', np.float64),
+    ('risco_max', np.float64),
+])
+
+
+class ArmazemResultados:
+    """
+    Séries de muitas rodadas em arquivos mapeados em memória (ver o
+    cabeçalho do módulo). Criar com criar(); abrir com abrir(): modo 'r'
+    para análise, 'r+' nos processos que gravam.
+    """
+
+    def __init__(self, diretorio, modo='r'):
+        self.diretorio = diretorio
+        with open(os.path.join(diretorio, 'meta.json'), encoding='utf-8') as arquivo:
+            self.meta = json.load(arquivo)
+        if tuple(self.meta['canais']) != CANAIS:
+            raise ValueError(f"Os canais de {diretorio} não batem com resultado.CANAIS")
+        self.cenarios = self.meta['cenarios']
+        self.series = np.load(os.path.join(diretorio, 'series.npy'), mmap_mode=modo)
+        self.sem_regra = np.load(os.path.join(diretorio, 'sem_regra.npy'), mmap_mode=modo)
+        self.indice = np.load(os.path.join(diretorio, 'indice.npy'), mmap_mode=modo)
+
+    @classmethod
+    def criar(cls, diretorio, n_rodadas, n_amostras, cenarios, dtype='float32', motor=None):
+        """
+        Cria (ou sobrescreve) um armazém vazio para n_rodadas de
+        n_amostras. cenarios: nomes dos cenários (o índice guarda a
+        posição do nome nesta lista). motor: motor fuzzy das rodadas
+        (None = o p.motor_fuzzy de cada cenário), guardado para
+        verificar_armazem refazer as rodadas com ele. Devolve o armazém
+        aberto em 'r+'.
+        """
+        fechar_abertos(diretorio)  # um mapa antigo do mesmo arquivo não pode sobreviver
+        os.makedirs(diretorio, exist_ok=True)
+        formato = np.lib.format
+        formato.open_memmap(os.path.join(diretorio, 'series.npy'), mode='w+', dtype=dtype,
+                            shape=(len(CANAIS), n_rodadas, n_amostras))
+        formato.open_memmap(os.path.join(diretorio, 'sem_regra.npy'), mode='w+', dtype=bool,
+                            shape=(n_rodadas, n_amostras))
+        # Arquivos novos do open_memmap já vêm zerados: 'gravada' = False
+        formato.open_memmap(os.path.join(diretorio, 'indice.npy'), mode='w+', dtype=DTYPE_INDICE,
+                            shape=(n_rodadas,))
+        meta = {'canais': list(CANAIS), 'dtype': np.dtype(dtype).name,
+                'n_amostras': n_amostras, 'cenarios': list(cenarios), 'motor': motor}
+        with open(os.path.join(diretorio, 'meta.json'), 'w', encoding='utf-8') as arquivo:
+            json.dump(meta, arquivo, ensure_ascii=False, indent=2)
+        return cls(diretorio, 'r+')
+
+    @classmethod
+    def abrir(cls, diretorio, modo='r'):
+        return cls(diretorio, modo)
+
+    def __len__(self):
+        return len(self.indice)
+
+    @property
+    def n_amostras(self):
+        return self.series.shape[2]
+
+    @property
+    def n_gravadas(self):
+        return int(np.count_nonzero(self.indice['gravada']))
+
+    def gravar(self, posicao, resultado, indice_cenario, hash_parametros=''):
+        """
+        Copia o bloco de um ResultadoSimulacao (headless) para a linha
+        'posicao' e preenche o índice. Cada posição deve ter um único
+        gravador (ver rodar_campanha).
+        """
+        if resultado.bloco.shape[1] != self.n_amostras:
+            raise ValueError(f"Rodada com {resultado.bloco.shape[1]} amostras; o armazém espera "
+                             f"{self.n_amostras} (p.n_pontos_saida)")
+        self.series[:, posicao] = resultado.bloco
+        self.sem_regra[posicao] = resultado.sem_regra
+        self.indice[posicao] = (False, indice_cenario, resultado.semente, hash_parametros,
+                                resultado.disparado, resultado.t_disparo, resultado.risco_max)
+        self.indice['gravada'][posicao] = True  # por último: a linha já está completa
+
+    def fechar(self):
+        """Grava no disco as páginas alteradas (modo 'r+')."""
+        for mapa in (self.series, self.sem_regra, self.indice):
+            if isinstance(mapa, np.memmap) and mapa.mode != 'r':
+                mapa.flush()
+
+    def posicoes(self, cenario=None, semente=None):
+        """
+        Posições das rodadas gravadas, filtradas por cenário (nome ou
+        índice) e/ou semente (inteiro ou lista de inteiros). Só lê o índice.
+        """
+        indice = self.indice
+        selecao = indice['gravada'].copy()
+        if cenario is not None:
+            if isinstance(cenario, str):
+                cenario = self.cenarios.index(cenario)
+            selecao &= indice['indice_cenario'] == cenario
+        if semente is not None:
+            selecao &= np.isin(indice['semente'], np.atleast_1d(semente))
+        return np.flatnonzero(selecao)
+
+    def serie(self, canal, cenario=None, semente=None, posicoes=None):
+        """
+        Array (n, T) de um canal (ver resultado.CANAIS) para as rodadas
+        selecionadas (posicoes, ou o filtro de posicoes()). Só as linhas
+        pedidas são lidas do disco.
+        """
+        if posicoes is None:
+            posicoes = self.posicoes(cenario, semente)
+        return self.series[CANAIS.index(canal), posicoes]
+
+    def resultado(self, posicao):
+        """
+        ResultadoSimulacao da rodada 'posicao' SEM cópia (o bloco é uma
+        view do arquivo, com um canal por trecho). O disparo traz só o
+        resumo guardado no índice.
+        """
+        linha = self.indice[posicao]
+        if not linha['gravada']:
+            raise KeyError(f"Posição {posicao} ainda não foi gravada")
+        resultado = ResultadoSimulacao.sobre_bloco(
+            self.cenarios[linha['indice_cenario']], int(linha['semente']),
+            self.series[:, posicao], self.sem_regra[posicao]
+        )
+        resultado.disparo = {'disparado': bool(linha['disparado']), 't_disparo': float(linha['t_disparo'])}
+        return resultado
+
+
+# Armazéns abertos para gravação neste processo (abertos uma vez só)
+_abertos = {}
+
+
+def fechar_abertos(diretorio=None):
+    """Fecha (flush) os armazéns abertos por gravar_rodada (todos, se diretorio=None)."""
+    for chave in list(_abertos) if diretorio is None else [diretorio]:
+        armazem = _abertos.pop(chave, None)
+        if armazem is not None:
+            armazem.fechar()
+
+
+def gravar_rodada(diretorio, posicao, resultado, indice_cenario, hash_parametros=''):
+    """gravar() no armazém 'diretorio', aberto em 'r+' no primeiro uso do processo."""
+    armazem = _abertos.get(diretorio)
+    if armazem is None:
+        armazem = _abertos[diretorio] = ArmazemResultados.abrir(diretorio, 'r+')
+    armazem.gravar(posicao, resultado, indice_cenario, hash_parametros)
+
+
+def verificar_armazem(diretorio, fabricas, n_amostras=5, semente=0):
+    """
+    Refaz (rodar_simulacao_headless) algumas rodadas sorteadas do
+    armazém gravado por rodar_campanha(fabricas, ..., armazem=diretorio)
+    e devolve a maior diferença entre as séries guardadas e as
+    recalculadas (só o arredondamento do dtype do armazém). As rodadas
+    são refeitas com o motor fuzzy guardado no meta.json.
+    """
+    from simulador_core import rodar_simulacao_headless
+
+    armazem = ArmazemResultados.abrir(diretorio)
+    gravadas = armazem.posicoes()
+    sorteadas = np.random.default_rng(semente).choice(gravadas, min(n_amostras, len(gravadas)), replace=False)
+    erro = 0.0
+    for posicao in sorteadas:
+        linha = armazem.indice[posicao]
+        refeito = rodar_simulacao_headless(fabricas[linha['indice_cenario']](), int(linha['semente']),
+                                           motor=armazem.meta.get('motor'))
+        erro = max(erro, float(np.max(np.abs(armazem.series[:, posicao] - refeito.bloco))))
+    return erro
@@ -0,0 +1,741 @@
+# 📄 benchmark.py
+# Medições de desempenho da simulação.
+# Uso (linha de comando):
+#   python benchmark.py rajadas [--sementes 5] [--saida resultado.json]
+#   python benchmark.py importacao [--repeticoes 5] [--saida resultado.json]
+#   python benchmark.py etapas [--resolucoes 250 500 2000] [--lotes 1 16 128 1024] [--saida base.json]
+#   python benchmark.py comparar base.json novo.json [--limiar 0.1]
+#   python benchmark.py latencia [--taxas 100 1000] [--segundos 5] [--motor vetorizado]
+#   python benchmark.py estimador [--sementes 10] [--saida resultado.json]
+#   python benchmark.py renderizacao [--pontos 500 20000] [--rodadas 3] [--saida resultado.json]
+#   python benchmark.py relatorio [--rodadas 10000] [--reais 20] [--saida resultado.json]
+#   python benchmark.py rastro [--pontos 500 20000] [--repeticoes 20] [--saida resultado.json]
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+import parametros as params
+import simulacao_fisica as fisica
+import simulacao_sensores as sensores
+import logica_decisao as cerebro
+from simulador_core import criar_geradores
+
+# Os cinco cenários do parametros.py (a suíte roda todos)
+FABRICAS_CENARIOS = (
+    params.get_cenario_1_queda,
+    params.get_cenario_2_pouso,
+    params.get_cenario_3_turbulencia,
+    params.get_cenario_4_flat_spin,
+    params.get_cenario_5_pouso_turbulencia,
+)
+ETAPAS = ("fisica", "sensores", "decisao", "disparo")
+
+
+def _silencioso():
+    """Engole os prints de progresso dos estágios durante a medição."""
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+# --- RAJADAS: sorteio dentro da EDO x série pré-gerada ---
+
+def benchmark_rajadas(n_sementes=5):
+    """
+    Compara os dois modelos de rajada (p.modelo_rajada) nos cenários
+    com turbulência: número de avaliações do lado direito da EDO,
+    tempo de parede por rodada e se a mesma semente reproduz a rodada.
+    """
+    contador = {'n': 0}
+    modelo_original = fisica._modelo_dinamica_queda
+
+    def modelo_contado(*args, **kwargs):
+        contador['n'] += 1
+        return modelo_original(*args, **kwargs)
+
+    resultados = []
+    fisica._modelo_dinamica_queda = modelo_contado
+    try:
+        for fabrica in (params.get_cenario_3_turbulencia, params.get_cenario_5_pouso_turbulencia):
+            for modelo in ("ruido_branco", "ou"):
+                avaliacoes, tempos, reproduz = [], [], True
+                for semente in range(n_sementes):
+                    p = fabrica()
+                    p.modelo_rajada = modelo
+                    contador['n'] = 0
+                    inicio = time.perf_counter()
+                    with _silencioso():
+                        primeira = fisica.executar_simulacao(p, rng=np.random.default_rng(semente))
+                    tempos.append(time.perf_counter() - inicio)
+                    avaliacoes.append(contador['n'])
+                    with _silencioso():
+                        segunda = fisica.executar_simulacao(p, rng=np.random.default_rng(semente))
+                    reproduz &= all(np.array_equal(a, b) for a, b in zip(primeira, segunda))
+
+                resultados.append({
+                    'cenario': p.cenario_nome,
+                    'modelo_rajada': modelo,
+                    'avaliacoes_edo_media': float(np.mean(avaliacoes)),
+                    'tempo_medio_s': float(np.mean(tempos)),
+                    'reprodutivel': bool(reproduz),
+                })
+    finally:
+        fisica._modelo_dinamica_queda = modelo_original
+    return resultados
+
+
+# --- IMPORTAÇÃO A FRIO: modo headless x modo com gráficos ---
+
+# Cada modo roda num processo Python NOVO (importação a frio de verdade)
+_CODIGO_IMPORTACAO = """
+import json, sys, time
+inicio = time.perf_counter()
+import parametros, simulador_core
+if {visual!r}:
+    import visualizacao
+importado = time.perf_counter()
+simulador_core.rodar_simulacao_headless(parametros.get_cenario_1_queda(), semente=0)
+fim = time.perf_counter()
+pesados = ['matplotlib', 'IPython', 'skfuzzy', 'networkx', 'pandas', 'scipy.integrate']
+print(json.dumps({{'importacao_s': importado - inicio, 'primeira_rodada_s': fim - importado,
+                  'carregados': [m for m in pesados if m in sys.modules]}}))
+"""
+
+
+def benchmark_importacao(n_repeticoes=5):
+    """
+    Tempo de importação a frio e da primeira rodada headless, com e
+    sem o módulo de gráficos (visualizacao -> matplotlib, skfuzzy,
+    IPython), cada repetição num processo novo. Mostra também quais
+    bibliotecas pesadas acabaram carregadas.
+    O motor fuzzy compilado é gerado antes (cache em disco), como
+    numa campanha.
+    """
+    import parametros as params_local
+    from inferencia_vetorizada import obter_sistema_vetorizado
+    obter_sistema_vetorizado(params_local.Parametros())
+
+    pasta = os.path.dirname(os.path.abspath(__file__))
+    resultados = []
+    for modo, visual in (("headless", False), ("com_graficos", True)):
+        medidas = []
+        for _ in range(n_repeticoes):
+            saida = subprocess.run(
+                [sys.executable, "-c", _CODIGO_IMPORTACAO.format(visual=visual)],
+                cwd=pasta, capture_output=True, text=True, check=True,
+                env={**os.environ, "MPLBACKEND": "Agg"},
+            )
+            medidas.append(json.loads(saida.stdout.strip().splitlines()[-1]))
+        resultados.append({
+            'modo': modo,
+            'importacao_s': float(np.median([m['importacao_s'] for m in medidas])),
+            'primeira_rodada_s': float(np.median([m['primeira_rodada_s'] for m in medidas])),
+            'carregados': ",".join(medidas[-1]['carregados']) or "-",
+        })
+    return resultados
+
+
+# --- SUÍTE POR ESTÁGIO (física, sensores, decisão, timer de disparo) ---
+
+def _cronometrar(funcao, *args, **kwargs):
+    inicio = time.perf_counter()
+    resultado = funcao(*args, **kwargs)
+    return resultado, time.perf_counter() - inicio
+
+
+def _metadados():
+    """Onde e sobre qual commit a medição foi feita."""
+    pasta = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=pasta,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'data': time.strftime("%Y-%m-%d %H:%M:%S"),
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'nucleos': os.cpu_count(),
+    }
+
+
+def benchmark_etapas(resolucoes=(250, 500, 2000), n_sementes=3, repeticoes=3):
+    """
+    Tempo de cada estágio do pipeline, em todos os cenários, com
+    sementes fixas (criar_geradores) e para cada resolução da grade de
+    saída (p.n_pontos_saida):
+      fisica   -> simulacao_fisica.executar_simulacao
+      sensores -> simulacao_sensores.simular_sensores_e_filtros
+      decisao  -> logica_decisao.criar_e_calcular_risco_fuzzy
+      disparo  -> logica_decisao.calcular_disparo (o timer do
+                  visualizacao.analisar_resultados)
+    Cada rodada é repetida 'repeticoes' vezes (vale o menor tempo) e
+    o resultado é a mediana entre as sementes. Além do tempo total,
+    devolve o tempo por segundo simulado e por amostra.
+    """
+    linhas = []
+    for fabrica in FABRICAS_CENARIOS:
+        for n_pontos in resolucoes:
+            tempos = {etapa: [] for etapa in ETAPAS}
+            duracoes = []
+            for semente in range(n_sementes):
+                melhor = dict.fromkeys(ETAPAS, np.inf)
+                for _ in range(repeticoes):
+                    p = fabrica()
+                    p.n_pontos_saida = n_pontos
+                    rng_fisica, rng_sensores = criar_geradores(semente, p.cenario_nome)
+                    with _silencioso():
+                        (tempo, alt, vel, acel), t_fisica = _cronometrar(
+                            fisica.executar_simulacao, p, rng=rng_fisica)
+                        dados, t_sensores = _cronometrar(
+                            sensores.simular_sensores_e_filtros, p, tempo, alt, vel, acel, rng=rng_sensores)
+                        decisao, t_decisao = _cronometrar(
+                            cerebro.criar_e_calcular_risco_fuzzy, p, tempo, dados)
+                        _, t_disparo = _cronometrar(cerebro.calcular_disparo, p, tempo, decisao[0])
+                    for etapa, t in zip(ETAPAS, (t_fisica, t_sensores, t_decisao, t_disparo)):
+                        melhor[etapa] = min(melhor[etapa], t)
+                for etapa in ETAPAS:
+                    tempos[etapa].append(melhor[etapa])
+                duracoes.append(tempo[-1])
+
+            duracao = float(np.median(duracoes))
+            for etapa in ETAPAS:
+                t = float(np.median(tempos[etapa]))
+                linhas.append({
+                    'etapa': etapa,
+                    'cenario': p.cenario_nome,
+                    'n_pontos': n_pontos,
+                    'lote': 1,
+                    'tempo_s': t,
+                    'ms_por_s_simulado': 1e3 * t / duracao,
+                    'us_por_amostra': 1e6 * t / n_pontos,
+                })
+    return linhas
+
+
+def benchmark_lote(tamanhos=(1, 16, 128, 1024), n_pontos=500, repeticoes=3):
+    """
+    Física e sensores no modo em LOTE (executar_simulacao_lote e
+    simular_sensores_e_filtros com arrays (N, T)) para lotes de vários
+    tamanhos, com os cinco cenários intercalados. Devolve o tempo do
+    lote e o tempo por rodada e por amostra.
+    """
+    linhas = []
+    for N in tamanhos:
+        lista_p = []
+        rngs = []
+        for i in range(N):
+            p = FABRICAS_CENARIOS[i % len(FABRICAS_CENARIOS)]()
+            p.n_pontos_saida = n_pontos
+            lista_p.append(p)
+            rngs.append(criar_geradores(i, p.cenario_nome)[0])
+
+        melhor_fisica = melhor_sensores = np.inf
+        for _ in range(repeticoes):
+            rngs_rodada = [np.random.default_rng(r.bit_generator.seed_seq) for r in rngs]
+            (tempo, alt, vel, acel), t_fisica = _cronometrar(
+                fisica.executar_simulacao_lote, lista_p, rngs=rngs_rodada)
+            _, t_sensores = _cronometrar(
+                sensores.simular_sensores_e_filtros, lista_p, tempo, alt, vel, acel,
+                rng=np.random.default_rng(0), verbose=False)
+            melhor_fisica = min(melhor_fisica, t_fisica)
+            melhor_sensores = min(melhor_sensores, t_sensores)
+
+        for etapa, t in (("fisica_lote", melhor_fisica), ("sensores_lote", melhor_sensores)):
+            linhas.append({
+                'etapa': etapa,
+                'cenario': "(5 cenários intercalados)",
+                'n_pontos': n_pontos,
+                'lote': N,
+                'tempo_s': float(t),
+                'ms_por_rodada': 1e3 * t / N,
+                'us_por_amostra': 1e6 * t / (N * n_pontos),
+            })
+    return linhas
+
+
+def benchmark_suite(resolucoes=(250, 500, 2000), tamanhos_lote=(1, 16, 128, 1024),
+                    n_sementes=3, repeticoes=3):
+    """Suíte completa: estágios por cenário e resolução + modo em lote."""
+    return {
+        'meta': _metadados(),
+        'etapas': benchmark_etapas(resolucoes, n_sementes, repeticoes),
+        'lote': benchmark_lote(tamanhos_lote, repeticoes=repeticoes),
+    }
+
+
+def _chave_linha(linha):
+    return (linha['etapa'], linha['cenario'], linha['n_pontos'], linha['lote'])
+
+
+def comparar_suites(base, nova, limiar=0.10):
+    """
+    Compara duas saídas de benchmark_suite (ex.: dois commits), linha a
+    linha. razao = tempo_novo / tempo_base; variações além de 'limiar'
+    (10% por padrão) são marcadas como "mais lento" ou "mais rápido".
+    """
+    linhas = []
+    for grupo in ('etapas', 'lote'):
+        tempos_base = {_chave_linha(l): l['tempo_s'] for l in base.get(grupo, [])}
+        for linha in nova.get(grupo, []):
+            chave = _chave_linha(linha)
+            if chave not in tempos_base:
+                continue
+            razao = linha['tempo_s'] / tempos_base[chave]
+            if razao > 1 + limiar:
+                veredito = "mais lento"
+            elif razao < 1 / (1 + limiar):
+                veredito = "mais rápido"
+            else:
+                veredito = "="
+            linhas.append({
+                'etapa': linha['etapa'], 'cenario': linha['cenario'],
+                'n_pontos': linha['n_pontos'], 'lote': linha['lote'],
+                'base_s': tempos_base[chave], 'novo_s': linha['tempo_s'],
+                'razao': razao, 'veredito': veredito,
+            })
+    return linhas
+
+
+# --- LATÊNCIA DO DETECTOR EM TEMPO REAL (DetectorDeParaquedas.step) ---
+
+def benchmark_latencia(taxas=(100, 1000), segundos=5.0, motor=None, semente=0):
+    """
+    Tempo de cada step() do detector.DetectorDeParaquedas, amostra por
+    amostra, com os sensores simulados na taxa pedida (Hz) durante
+    'segundos' de voo, em todos os cenários. Devolve p50, p99 e máximo
+    (µs) e a fração do período de amostragem gasta no p99.
+    """
+    from detector import DetectorDeParaquedas
+
+    linhas = []
+    for fabrica in FABRICAS_CENARIOS:
+        for taxa in taxas:
+            p = fabrica()
+            p.tempo_simulacao_max = segundos
+            p.n_pontos_saida = int(round(segundos * taxa)) + 1
+            rng_fisica, rng_sensores = criar_geradores(semente, p.cenario_nome)
+            with _silencioso():
+                tempo, alt, vel, acel = fisica.executar_simulacao(p, rng=rng_fisica)
+                dados = sensores.simular_sensores_e_filtros(p, tempo, alt, vel, acel, rng=rng_sensores)
+            amostras = list(zip(dados['altitude_gnss'].tolist(), dados['aceleracao_imu'].tolist(),
+                                dados['pitch_sensor_giro'].tolist()))
+
+            dt = tempo[1] - tempo[0]
+            detector = DetectorDeParaquedas(p, dt, motor)
+            duracoes = np.empty(len(amostras))
+            relogio = time.perf_counter_ns
+            for i, (altitude, aceleracao, pitch) in enumerate(amostras):
+                inicio = relogio()
+                detector.step(altitude, aceleracao, pitch)
+                duracoes[i] = relogio() - inicio
+
+            p50, p99 = np.percentile(duracoes, [50, 99]) / 1e3
+            linhas.append({
+                'cenario': p.cenario_nome,
+                'motor': detector.motor,
+                'taxa_hz': taxa,
+                'passos': len(amostras),
+                'p50_us': float(p50),
+                'p99_us': float(p99),
+                'max_us': float(duracoes.max() / 1e3),
+                'p99_fracao_periodo': float(p99 * 1e-6 / dt),
+            })
+    return linhas
+
+
+# --- ESTIMADOR DE VELOCIDADE: MÉDIA MÓVEL x KALMAN (p.estimador_velocidade) ---
+
+def _primeiro_cruzamento(tempo, velocidade, limiar):
+    """Instante em que a velocidade fica abaixo de 'limiar' pela primeira vez (NaN se nunca)."""
+    abaixo = np.flatnonzero(velocidade < limiar)
+    return tempo[abaixo[0]] if len(abaixo) else np.nan
+
+
+def benchmark_estimador(n_sementes=10, estimadores=("media_movel", "kalman")):
+    """
+    Compara os estimadores da velocidade usada pela decisão, em todos
+    os cenários e sementes:
+      estimador -> atraso (s) da velocidade estimada para cruzar
+                   p.limiar_queda_rapida depois da real (NaN se a real
+                   não cruza), erro RMS contra a real, fração de
+                   rodadas com disparo e instante médio do disparo (s);
+      custo     -> µs por amostra do filtro em lote (1 e 1000 rodadas)
+                   e em streaming (um step por amostra).
+    """
+    from detector import _MediaMovel
+    from estimador import EstimadorKalman, estimar_lote
+    from caracteristicas import media_movel
+    from simulador_core import rodar_simulacao_headless
+
+    linhas = []
+    for fabrica in FABRICAS_CENARIOS:
+        for estimador in estimadores:
+            atrasos, erros, disparos = [], [], []
+            for semente in range(n_sementes):
+                p = fabrica()
+                p.estimador_velocidade = estimador
+                with _silencioso():
+                    r = rodar_simulacao_headless(p, semente)
+                atrasos.append(_primeiro_cruzamento(r.tempo, r.velocidade_filtrada_gnss, p.limiar_queda_rapida)
+                               - _primeiro_cruzamento(r.tempo, r.velocidade_real, p.limiar_queda_rapida))
+                erros.append(float(np.sqrt(np.mean((r.velocidade_filtrada_gnss - r.velocidade_real) ** 2))))
+                disparos.append(r.t_disparo if r.disparado else np.nan)
+            disparos = np.array(disparos, dtype=float)
+            linhas.append({
+                'cenario': p.cenario_nome,
+                'estimador': estimador,
+                'atraso_s': float(np.nanmedian(atrasos)) if np.isfinite(atrasos).any() else np.nan,
+                'erro_rms_ms': float(np.median(erros)),
+                'fracao_disparo': float(np.mean(np.isfinite(disparos))),
+                't_disparo_medio_s': float(np.nanmean(disparos)) if np.isfinite(disparos).any() else np.nan,
+            })
+
+    # Custo por amostra, nas séries de sensores do Cenário 1
+    p = FABRICAS_CENARIOS[0]()
+    with _silencioso():
+        r = rodar_simulacao_headless(p, 0)
+    dt = r.tempo[1] - r.tempo[0]
+    T = len(r.tempo)
+    custo = []
+    for N in (1, 1000):
+        altitude = np.tile(r.altitude_gnss, (N, 1))
+        aceleracao = np.tile(r.aceleracao_imu, (N, 1))
+        velocidade = np.tile(r.velocidade_estimada_gnss, (N, 1))
+        for estimador, funcao in (
+                ("media_movel", lambda: media_movel(velocidade, p.tamanho_janela_filtro)),
+                ("kalman", lambda: estimar_lote(p, r.tempo, altitude, aceleracao))):
+            funcao()  # ganhos do Kalman calculados e guardados fora da medição
+            t = min(_cronometrar(funcao)[1] for _ in range(5))
+            custo.append({'estimador': estimador, 'modo': f"lote {N}", 'us_por_amostra': 1e6 * t / (N * T)})
+
+    amostras = list(zip(r.altitude_gnss.tolist(), r.aceleracao_imu.tolist(),
+                        r.velocidade_estimada_gnss.tolist()))
+    media = _MediaMovel(p.tamanho_janela_filtro)
+    kalman = EstimadorKalman(p, dt)
+    for estimador, passo in (("media_movel", lambda h, a, v: media.adicionar(v)),
+                             ("kalman", lambda h, a, v: kalman.step(h, a))):
+        inicio = time.perf_counter()
+        for h, a, v in amostras:
+            passo(h, a, v)
+        custo.append({'estimador': estimador, 'modo': "streaming",
+                      'us_por_amostra': 1e6 * (time.perf_counter() - inicio) / T})
+    return {'meta': _metadados(), 'estimador': linhas, 'custo': custo}
+
+
+# --- GRÁFICOS EM ARQUIVO: visualizacao.py x renderizacao.py ---
+
+def benchmark_renderizacao(n_pontos=(500, 20000), n_rodadas=3, formatos=("png", "svg")):
+    """
+    Tempo para salvar os três gráficos de uma rodada (Cenário 3):
+      original -> plotar_* do visualizacao.py (figura nova a cada
+                  chamada, todas as amostras), salvando a figura no
+                  lugar do plt.show();
+      minmax / lttb / completo -> renderizacao.Renderizador (figuras
+                  reaproveitadas) com cada redução das séries.
+    Mede a média de 'n_rodadas' rodadas (sementes diferentes) depois
+    de uma rodada de aquecimento, e o tamanho dos arquivos.
+    """
+    import tempfile
+    import warnings
+
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    import visualizacao
+    from renderizacao import Renderizador
+    from simulador_core import rodar_simulacao_headless
+
+    linhas = []
+    with tempfile.TemporaryDirectory() as pasta:
+        for n in n_pontos:
+            resultados = []
+            for semente in range(n_rodadas + 1):
+                p = params.get_cenario_3_turbulencia()
+                p.n_pontos_saida = n
+                resultados.append((p, rodar_simulacao_headless(p, semente)))
+
+            for formato in formatos:
+                def original(p, r, prefixo):
+                    contador = iter(("fisica", "sensores", "decisao"))
+
+                    def salvar_no_lugar_do_show():
+                        plt.savefig(f"{prefixo}_{next(contador)}.{formato}", format=formato)
+                        plt.close()
+
+                    mostrar = plt.show
+                    plt.show = salvar_no_lugar_do_show
+                    try:
+                        dados_reais = {'altitude': r.altitude_real, 'velocidade': r.velocidade_real,
+                                       'aceleracao': r.aceleracao_real}
+                        with _silencioso(), warnings.catch_warnings():
+                            warnings.simplefilter("ignore")
+                            visualizacao.plotar_fisica_base(r.tempo, r.altitude_real, r.velocidade_real)
+                            visualizacao.plotar_sensores_consolidados(p, r.tempo, dados_reais, r.sensores)
+                            visualizacao.plotar_decisao_final(r.tempo, r.risco, r.severidade_pid,
+                                                              r.pitch_sensor_giro)
+                    finally:
+                        plt.show = mostrar
+
+                modos = {'original': original}
+                for metodo, nome in (("minmax", "minmax"), ("lttb", "lttb"), (None, "completo")):
+                    renderizador = Renderizador(metodo)
+                    modos[nome] = (lambda renderizador: lambda p, r, prefixo: renderizador.salvar_resultado(
+                        p, r, prefixo, (formato,)))(renderizador)
+
+                for nome, funcao in modos.items():
+                    prefixo = os.path.join(pasta, f"{nome}_{n}")
+                    funcao(*resultados[0], prefixo)  # aquecimento (cria as figuras reaproveitadas)
+                    inicio = time.perf_counter()
+                    for p, r in resultados[1:]:
+                        funcao(p, r, prefixo)
+                    duracao = (time.perf_counter() - inicio) / n_rodadas
+                    tamanho = sum(os.path.getsize(f"{prefixo}_{g}.{formato}")
+                                  for g in ("fisica", "sensores", "decisao"))
+                    linhas.append({'modo': nome, 'n_pontos': n, 'formato': formato,
+                                   'ms_por_rodada': 1e3 * duracao, 'kb_arquivos': tamanho / 1024})
+    return linhas
+
+
+# --- RELATÓRIO DE CAMPANHA (relatorio.py) ---
+
+def benchmark_relatorio(n_rodadas=10000, n_reais=20, formatos=("md", "html", "csv")):
+    """
+    Tempo do relatorio.gerar_relatorio para uma campanha de 'n_rodadas'
+    guardada em disco. Para não rodar n_rodadas simulações, roda
+    'n_reais' sementes de cada cenário e replica as linhas num armazém
+    do tamanho pedido (mesmo formato e mesmo trabalho de leitura).
+    Mede também as etapas: instante crítico + valores, pertinências e
+    a escrita de cada formato.
+    """
+    import shutil
+    import tempfile
+
+    import campanha
+    import relatorio
+    from armazenamento import ArmazemResultados
+    from regras_fuzzy import definir_variaveis_fuzzy
+
+    fabricas = (params.get_cenario_1_queda, params.get_cenario_2_pouso,
+                params.get_cenario_3_turbulencia, params.get_cenario_4_flat_spin,
+                params.get_cenario_5_pouso_turbulencia)
+    pasta = tempfile.mkdtemp()
+    try:
+        reais = os.path.join(pasta, "reais")
+        campanha.rodar_campanha(fabricas, range(n_reais), n_processos=1, armazem=reais)
+        origem = ArmazemResultados.abrir(reais)
+        destino = ArmazemResultados.criar(os.path.join(pasta, "grande"), n_rodadas, origem.n_amostras,
+                                          origem.cenarios, origem.meta['dtype'], origem.meta.get('motor'))
+        copias = np.arange(n_rodadas) % len(origem)
+        destino.series[:] = origem.series[:, copias]
+        destino.sem_regra[:] = origem.sem_regra[copias]
+        indice = origem.indice[copias].copy()
+        indice['semente'] = np.arange(n_rodadas)
+        destino.indice[:] = indice
+        destino.fechar()
+
+        linhas = []
+        armazem = ArmazemResultados.abrir(destino.diretorio)
+        posicoes = armazem.posicoes()
+        criticos, tempo = _cronometrar(relatorio.indices_criticos, armazem, posicoes)
+        linhas.append({'etapa': 'instante critico', 'ms': 1e3 * tempo})
+        valores, tempo = _cronometrar(relatorio.valores_criticos, armazem, posicoes, criticos)
+        linhas.append({'etapa': 'valores criticos', 'ms': 1e3 * tempo})
+        fuzzy_vars = definir_variaveis_fuzzy(params.Parametros())[0]
+        _, tempo = _cronometrar(relatorio.pertinencias, fuzzy_vars, valores)
+        linhas.append({'etapa': 'pertinencias', 'ms': 1e3 * tempo})
+        for formato in formatos:
+            _, tempo = _cronometrar(relatorio.gerar_relatorio, armazem, os.path.join(pasta, formato), (formato,))
+            linhas.append({'etapa': f'gerar_relatorio ({formato})', 'ms': 1e3 * tempo})
+        _, tempo = _cronometrar(relatorio.gerar_relatorio, armazem, os.path.join(pasta, "todos"), formatos)
+        linhas.append({'etapa': 'gerar_relatorio (todos)', 'ms': 1e3 * tempo})
+        for linha in linhas:
+            linha['n_rodadas'] = n_rodadas
+        return linhas
+    finally:
+        from armazenamento import fechar_abertos
+        fechar_abertos()
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+# --- RASTRO DAS REGRAS (rastro_regras.py): custo de gravar ---
+
+# Custo aceito da gravação do rastro, em fração da inferência sem rastro
+LIMITE_CUSTO_RASTRO = 0.05
+
+
+def benchmark_rastro(n_pontos=(500, 20000), repeticoes=20, motores=("vetorizado", "analitico"),
+                     segundos_por_medida=0.05):
+    """
+    Custo do rastro das regras na inferência, nas entradas do Cenário 4
+    (série de n_pontos):
+      ms_sem_rastro / ms_com_rastro -> calcular_risco sem e com
+          RastroRegras (medidos alternados; vale a menor medida);
+      ms_gravacao -> só o que o rastro acrescenta (preparar + gravar
+          dos blocos, com as pertinências e forças já calculadas). A
+          diferença entre as duas primeiras colunas fica no ruído da
+          medida; 'custo_pct' usa esta e é comparado com
+          LIMITE_CUSTO_RASTRO.
+    Cada medida repete a chamada por ~segundos_por_medida.
+    """
+    from inferencia_vetorizada import TAMANHO_BLOCO_PADRAO, obter_sistema_vetorizado
+    from logica_decisao import calcular_entradas_fuzzy, calcular_risco
+    from rastro_regras import RastroRegras
+    from simulador_core import rodar_simulacao_headless
+
+    def menor_medida(funcao):
+        _, uma = _cronometrar(funcao)  # aquecimento e tamanho da medida
+        vezes = max(1, int(segundos_por_medida / max(uma, 1e-6)))
+        medidas = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            for _ in range(vezes):
+                funcao()
+            medidas.append((time.perf_counter() - inicio) / vezes)
+        return min(medidas)
+
+    linhas = []
+    for n in n_pontos:
+        p = params.get_cenario_4_flat_spin()
+        p.n_pontos_saida = n
+        resultado = rodar_simulacao_headless(p, 0)
+        entradas = calcular_entradas_fuzzy(p, resultado.tempo, resultado.sensores)
+
+        sistema = obter_sistema_vetorizado(p)
+        blocos = []
+        for inicio in range(0, n, TAMANHO_BLOCO_PADRAO):
+            pertinencias = sistema.fuzzificar({rotulo: np.asarray(entradas[rotulo])[inicio:inicio + TAMANHO_BLOCO_PADRAO]
+                                               for rotulo in sistema.antecedentes})
+            blocos.append((inicio, pertinencias, sistema.ativacoes(pertinencias)))
+
+        def gravacao():
+            rastro = RastroRegras(resultado.tempo)
+            rastro.preparar(sistema, n)
+            for bloco in blocos:
+                rastro.gravar(*bloco)
+        ms_gravacao = menor_medida(gravacao)
+
+        for motor in motores:
+            base = menor_medida(lambda: calcular_risco(p, entradas, motor))
+            rastreado = menor_medida(lambda: calcular_risco(p, entradas, motor,
+                                                            rastro=RastroRegras(resultado.tempo)))
+            custo = ms_gravacao / base
+            linhas.append({'motor': motor, 'n_pontos': n, 'ms_sem_rastro': 1e3 * base,
+                           'ms_com_rastro': 1e3 * rastreado, 'ms_gravacao': 1e3 * ms_gravacao,
+                           'custo_pct': 100 * custo, 'dentro_do_limite': custo <= LIMITE_CUSTO_RASTRO})
+    return linhas
+
+
+def _imprimir_tabela(linhas):
+    if not linhas:
+        return
+    colunas = list(linhas[0])
+    larguras = [max(len(c), *(len(f"{l[c]:.4g}" if isinstance(l[c], float) else str(l[c])) for l in linhas))
+                for c in colunas]
+    print("  ".join(c.ljust(w) for c, w in zip(colunas, larguras)))
+    for linha in linhas:
+        valores = [f"{linha[c]:.4g}" if isinstance(linha[c], float) else str(linha[c]) for c in colunas]
+        print("  ".join(v.ljust(w) for v, w in zip(valores, larguras)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks da simulação do paraquedas.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_rajadas = sub.add_parser("rajadas", help="Sorteio de rajadas na EDO x série pré-gerada")
+    p_rajadas.add_argument("--sementes", type=int, default=5)
+    p_rajadas.add_argument("--saida", help="Arquivo JSON para salvar o resultado")
+
+    p_importacao = sub.add_parser("importacao", help="Importação a frio: headless x com gráficos")
+    p_importacao.add_argument("--repeticoes", type=int, default=5)
+    p_importacao.add_argument("--saida", help="Arquivo JSON para salvar o resultado")
+
+    p_etapas = sub.add_parser("etapas", help="Suíte por estágio (todos os cenários) + modo em lote")
+    p_etapas.add_argument("--resolucoes", type=int, nargs="+", default=[250, 500, 2000],
+                          help="Pontos da grade de saída (p.n_pontos_saida)")
+    p_etapas.add_argument("--lotes", type=int, nargs="+", default=[1, 16, 128, 1024],
+                          help="Tamanhos de lote do modo em lote")
+    p_etapas.add_argument("--sementes", type=int, default=3)
+    p_etapas.add_argument("--repeticoes", type=int, default=3)
+    p_etapas.add_argument("--saida", help="Arquivo JSON para salvar o resultado")
+
+    p_comparar = sub.add_parser("comparar", help="Compara dois JSON da suíte 'etapas'")
+    p_comparar.add_argument("base")
+    p_comparar.add_argument("novo")
+    p_comparar.add_argument("--limiar", type=float, default=0.10)
+    p_comparar.add_argument("--saida", help="Arquivo JSON para salvar a comparação")
+
+    p_latencia = sub.add_parser("latencia", help="Latência por amostra do detector em tempo real")
+    p_latencia.add_argument("--taxas", type=int, nargs="+", default=[100, 1000],
+                            help="Taxas de amostragem dos sensores (Hz)")
+    p_latencia.add_argument("--segundos", type=float, default=5.0)
+    p_latencia.add_argument("--motor", choices=["vetorizado", "analitico", "tabela", "skfuzzy"])
+    p_latencia.add_argument("--saida", help="Arquivo JSON para salvar o resultado")
+
+    p_estimador = sub.add_parser("estimador", help="Velocidade por média móvel x Kalman GNSS + IMU")
+    p_estimador.add_argument("--sementes", type=int, default=10)
+    p_estimador.add_argument("--saida", help="Arquivo JSON para salvar o resultado")
+
+    p_renderizacao = sub.add_parser("renderizacao", help="Gráficos em arquivo: visualizacao x renderizacao")
+    p_renderizacao.add_argument("--pontos", type=int, nargs="+", default=[500, 20000],
+                                help="Pontos da grade de saída (p.n_pontos_saida)")
+    p_renderizacao.add_argument("--rodadas", type=int, default=3)
+    p_renderizacao.add_argument("--saida", help="Arquivo JSON para salvar o resultado")
+
+    p_relatorio = sub.add_parser("relatorio", help="Relatório de uma campanha grande guardada em disco")
+    p_relatorio.add_argument("--rodadas", type=int, default=10000)
+    p_relatorio.add_argument("--reais", type=int, default=20, help="Sementes simuladas por cenário")
+    p_relatorio.add_argument("--saida", help="Arquivo JSON para salvar o resultado")
+
+    p_rastro = sub.add_parser("rastro", help="Custo do rastro das regras na inferência fuzzy")
+    p_rastro.add_argument("--pontos", type=int, nargs="+", default=[500, 20000],
+                          help="Pontos da grade de saída (p.n_pontos_saida)")
+    p_rastro.add_argument("--repeticoes", type=int, default=20)
+    p_rastro.add_argument("--saida", help="Arquivo JSON para salvar o resultado")
+
+    args = parser.parse_args(argv)
+
+    if args.comando == "rajadas":
+        resultado = benchmark_rajadas(args.sementes)
+    elif args.comando == "importacao":
+        resultado = benchmark_importacao(args.repeticoes)
+    elif args.comando == "etapas":
+        resultado = benchmark_suite(args.resolucoes, args.lotes, args.sementes, args.repeticoes)
+    elif args.comando == "comparar":
+        with open(args.base, encoding="utf-8") as arquivo:
+            base = json.load(arquivo)
+        with open(args.novo, encoding="utf-8") as arquivo:
+            nova = json.load(arquivo)
+        resultado = comparar_suites(base, nova, args.limiar)
+    elif args.comando == "latencia":
+        resultado = benchmark_latencia(args.taxas, args.segundos, args.motor)
+    elif args.comando == "estimador":
+        resultado = benchmark_estimador(args.sementes)
+    elif args.comando == "renderizacao":
+        resultado = benchmark_renderizacao(args.pontos, args.rodadas)
+    elif args.comando == "relatorio":
+        resultado = benchmark_relatorio(args.rodadas, args.reais)
+    elif args.comando == "rastro":
+        resultado = benchmark_rastro(args.pontos, args.repeticoes)
+
+    if isinstance(resultado, dict):
+        for grupo in (g for g in resultado if isinstance(resultado[g], list)):
+            print(f"\n[{grupo}]")
+            _imprimir_tabela(resultado[grupo])
+    else:
+        _imprimir_tabela(resultado)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
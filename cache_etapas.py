@@ -0,0 +1,250 @@
+# 📄 cache_etapas.py
+# Cache das etapas do pipeline (física -> sensores -> decisão), para
+# re-executar uma célula do notebook sem refazer o que não mudou.
+#
+# Cada etapa tem uma CHAVE de conteúdo:
+#   fisica   = campos físicos do Parametros + semente + código da física
+#   sensores = chave da física + campos dos sensores + código dos sensores
+#   decisao  = chave dos sensores + campos da decisão + motor + código da
+#              decisão e das definições fuzzy (regras_fuzzy.py)
+# Mudou uma função de pertinência? Só a decisão roda de novo. Mudou um
+# sigma de ruído? Sensores e decisão. A física só roda se ela mudar.
+#
+# Os resultados ficam na memória (LRU, p.cache_etapas_max_itens) e,
+# opcionalmente, em disco como .npz (p.cache_etapas_diretorio).
+# Só rodadas com SEMENTE entram no cache: sem semente o resultado
+# depende do estado global do np.random.
+
+import hashlib
+import importlib.util
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+import instrumentacao
+
+# Campos do Parametros lidos por cada etapa (ver verificar_campos)
+CAMPOS_FISICA = (
+    'cenario_nome', 'm', 'g', 'rho', 'C_d', 'A',
+    'altitude_inicial', 'velocidade_inicial_padrao', 'tempo_simulacao_max', 'n_pontos_saida',
+    'velocidade_descida_pouso', 'K_pouso_vel', 'K_nivelado_vel',
+    'forca_rajada_turbulencia', 'modelo_rajada', 'tempo_correlacao_rajada', 'dt_rajada',
+    'fisica_analitica',
+)
+CAMPOS_SENSORES = (
+    'taxa_atualizacao_gnss', 'sigma_ruido_gnss', 'sigma_ruido_acel', 'bias_acel',
+    'sigma_ruido_giro', 'tamanho_janela_filtro', 'estimador_velocidade',
+    'kalman_sigma_acel', 'kalman_sigma_bias', 'kalman_sigma_velocidade_inicial', 'kalman_sigma_bias_inicial',
+    'tempo_inicio_mergulho', 'pitch_mergulho_graus', 'pitch_base_graus',
+    'tempo_inicio_turbulencia', 'duracao_turbulencia', 'amplitude_pitch_turbulencia',
+)
+CAMPOS_DECISAO = (
+    'PID_Kp', 'PID_Ki', 'PID_Kd', 'tempo_persistencia_pitch', 'v_terminal',
+    'superficie_subdivisoes',
+)
+# Campos lidos que não mudam o resultado (não entram na chave)
+CAMPOS_NEUTROS = (
+    'superficie_diretorio_cache', 'motor_fuzzy',  # o motor efetivo entra na chave
+    'limiar_disparo_risco', 'limiar_reset_timer',  # só contam o flicker na instrumentação
+)
+
+# Módulos cujo CÓDIGO entra na chave de cada etapa
+MODULOS_FISICA = ('simulacao_fisica', 'rajadas')
+MODULOS_SENSORES = ('simulacao_sensores', 'caracteristicas', 'estimador')
+MODULOS_DECISAO = ('logica_decisao', 'pid_lote', 'inferencia_vetorizada', 'inferencia_analitica',
+                   'superficie_risco', 'regras_fuzzy')
+
+# Hash do código por arquivo: caminho -> ((mtime, tamanho), hash)
+_hash_arquivos = {}
+
+
+def _hash_modulo(nome):
+    """Hash do arquivo-fonte do módulo (lido sem importar; refeito só se o arquivo mudar)."""
+    caminho = importlib.util.find_spec(nome).origin
+    estado = os.stat(caminho)
+    assinatura = (estado.st_mtime_ns, estado.st_size)
+    guardado = _hash_arquivos.get(caminho)
+    if guardado is None or guardado[0] != assinatura:
+        with open(caminho, 'rb') as arquivo:
+            guardado = (assinatura, hashlib.sha256(arquivo.read()).hexdigest())
+        _hash_arquivos[caminho] = guardado
+    return guardado[1]
+
+
+def chave_conteudo(anterior, p, campos, modulos, *extras):
+    """
+    Chave de conteúdo (16 hex): a chave 'anterior' (encadeamento; '' na
+    primeira), o código dos 'modulos', os 'campos' de 'p' e os 'extras'.
+    Também usada por outros caches (ex.: o do motor compilado).
+    """
+    h = hashlib.sha256(anterior.encode('utf-8'))
+    for nome in modulos:
+        h.update(f'{nome}={_hash_modulo(nome)};'.encode('utf-8'))
+    for campo in campos:
+        h.update(f'{campo}={getattr(p, campo)!r};'.encode('utf-8'))
+    for extra in extras:
+        h.update(f'{extra!r};'.encode('utf-8'))
+    return h.hexdigest()[:16]
+
+
+def chaves_etapas(p, semente, motor=None):
+    """Chaves (encadeadas) das três etapas para uma rodada com semente."""
+    fisica = chave_conteudo('', p, CAMPOS_FISICA, MODULOS_FISICA, semente)
+    sensores = chave_conteudo(fisica, p, CAMPOS_SENSORES, MODULOS_SENSORES)
+    decisao = chave_conteudo(sensores, p, CAMPOS_DECISAO, MODULOS_DECISAO,
+                              motor if motor is not None else p.motor_fuzzy)
+    return {'fisica': fisica, 'sensores': sensores, 'decisao': decisao}
+
+
+def hash_parametros(p, motor=None):
+    """
+    Hash só dos campos do Parametros que mudam o resultado (sem semente
+    e sem o código): identifica a configuração de uma rodada (ver
+    armazenamento.py).
+    """
+    return chave_conteudo('', p, CAMPOS_FISICA + CAMPOS_SENSORES + CAMPOS_DECISAO, (),
+                          motor if motor is not None else p.motor_fuzzy)
+
+
+class CacheEtapas:
+    """
+    Resultados das etapas (dicts de arrays) por (etapa, chave): memória
+    com descarte do menos usado (LRU) e, se 'diretorio' não for None,
+    também arquivos .npz. Os arrays devolvidos são somente-leitura
+    (são compartilhados entre as rodadas que acertam o cache).
+    """
+
+    def __init__(self, max_itens=32, diretorio=None):
+        self.max_itens = max_itens
+        self.diretorio = diretorio
+        self._memoria = OrderedDict()
+        self.estatisticas = {}  # etapa -> {'memoria', 'disco', 'calculos'}
+
+    def _contar(self, etapa, origem):
+        contagem = self.estatisticas.setdefault(etapa, {'memoria': 0, 'disco': 0, 'calculos': 0})
+        contagem[origem] += 1
+        instrumentacao.contar('cache_calculos' if origem == 'calculos' else 'cache_acertos')
+
+    def _caminho(self, etapa, chave):
+        return os.path.join(self.diretorio, f"{etapa}_{chave}.npz")
+
+    def _guardar_memoria(self, item, valor):
+        self._memoria[item] = valor
+        self._memoria.move_to_end(item)
+        while len(self._memoria) > self.max_itens:
+            self._memoria.popitem(last=False)
+
+    def obter(self, etapa, chave, calcular):
+        """
+        Valor da etapa: memória -> disco -> calcular() (um dict de
+        arrays ou listas), guardando onde faltar.
+        """
+        item = (etapa, chave)
+        if item in self._memoria:
+            self._memoria.move_to_end(item)
+            self._contar(etapa, 'memoria')
+            return self._memoria[item]
+
+        valor = None
+        if self.diretorio is not None and os.path.exists(self._caminho(etapa, chave)):
+            with np.load(self._caminho(etapa, chave), allow_pickle=False) as arquivo:
+                valor = {nome: arquivo[nome] for nome in arquivo.files}
+            self._contar(etapa, 'disco')
+        if valor is None:
+            valor = {nome: np.asarray(serie) for nome, serie in calcular().items()}
+            self._contar(etapa, 'calculos')
+            if self.diretorio is not None:
+                os.makedirs(self.diretorio, exist_ok=True)
+                temporario = self._caminho(etapa, chave) + f".{os.getpid()}.tmp.npz"
+                np.savez(temporario, **valor)
+                os.replace(temporario, self._caminho(etapa, chave))
+
+        for serie in valor.values():
+            serie.flags.writeable = False
+        self._guardar_memoria(item, valor)
+        return valor
+
+    def limpar(self):
+        """Esvazia a memória (os arquivos em disco ficam)."""
+        self._memoria.clear()
+
+
+# Cache do processo (criado no primeiro uso, ver obter_cache)
+_cache = None
+
+
+def obter_cache(p):
+    """O cache do processo, (re)configurado com os campos cache_etapas_* de 'p'."""
+    global _cache
+    if _cache is None:
+        _cache = CacheEtapas(p.cache_etapas_max_itens, p.cache_etapas_diretorio)
+    else:
+        _cache.max_itens = p.cache_etapas_max_itens
+        _cache.diretorio = p.cache_etapas_diretorio
+    return _cache
+
+
+def limpar_cache():
+    """Esvazia o cache de memória do processo."""
+    if _cache is not None:
+        _cache.limpar()
+
+
+class ParametrosRegistrados:
+    """
+    Embrulha um Parametros e anota em 'lidos' quais campos foram lidos
+    (para conferir os campos de uma chave, ver verificar_campos).
+    """
+
+    def __init__(self, p):
+        object.__setattr__(self, '_p', p)
+        object.__setattr__(self, 'lidos', set())
+
+    def __getattr__(self, nome):
+        self.lidos.add(nome)
+        return getattr(self._p, nome)
+
+
+def verificar_campos(fabricas=None, semente=0):
+    """
+    Roda cada etapa com um Parametros "espião" em todos os cenários e
+    devolve, por etapa, os campos lidos que NÃO estão na chave (deve
+    ser tudo vazio; se não, falta um campo em CAMPOS_*). As chaves são
+    encadeadas: os campos das etapas anteriores também contam.
+    """
+    import parametros as params
+    import simulacao_fisica as fisica
+    import simulacao_sensores as sensores
+    import logica_decisao as cerebro
+    from simulador_core import criar_geradores
+
+    if fabricas is None:
+        fabricas = (params.get_cenario_1_queda, params.get_cenario_2_pouso,
+                    params.get_cenario_3_turbulencia, params.get_cenario_4_flat_spin,
+                    params.get_cenario_5_pouso_turbulencia)
+
+    faltando = {'fisica': set(), 'sensores': set(), 'decisao': set()}
+    for fabrica in fabricas:
+        for motor, estimador in (("vetorizado", "media_movel"), ("analitico", "kalman"), ("tabela", "media_movel")):
+            p = fabrica()
+            p.estimador_velocidade = estimador
+            rng_fisica, rng_sensores = criar_geradores(semente, p.cenario_nome)
+
+            espiao = ParametrosRegistrados(p)
+            tempo, alt, vel, acel = fisica.executar_simulacao(espiao, rng=rng_fisica, verbose=False)
+            faltando['fisica'] |= espiao.lidos - set(CAMPOS_FISICA) - set(CAMPOS_NEUTROS)
+
+            espiao = ParametrosRegistrados(p)
+            dados = sensores.simular_sensores_e_filtros(espiao, tempo, alt, vel, acel,
+                                                        rng=rng_sensores, verbose=False)
+            faltando['sensores'] |= (espiao.lidos - set(CAMPOS_FISICA) - set(CAMPOS_SENSORES)
+                                     - set(CAMPOS_NEUTROS))
+
+            espiao = ParametrosRegistrados(p)
+            with instrumentacao.coletar():  # liga também as contas só feitas com instrumentação
+                entradas = cerebro.calcular_entradas_fuzzy(espiao, tempo, dados)
+                cerebro.calcular_risco(espiao, entradas, motor)
+            faltando['decisao'] |= (espiao.lidos - set(CAMPOS_FISICA) - set(CAMPOS_SENSORES)
+                                    - set(CAMPOS_DECISAO) - set(CAMPOS_NEUTROS))
+    return {etapa: sorted(campos) for etapa, campos in faltando.items()}
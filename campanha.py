@@ -0,0 +1,147 @@
+# 📄 campanha.py
+# Campanhas de Monte Carlo: muitas rodadas ruidosas de cada cenário,
+# espalhadas pelos núcleos da CPU, guardando só um RESUMO por rodada.
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import armazenamento
+import cache_etapas
+from instrumentacao import somar_metricas
+from simulador_core import rodar_simulacao_headless
+
+
+def _executar_rodada(tarefa):
+    """
+    Roda UMA simulação (física -> sensores -> decisão -> timer) no modo
+    headless e devolve o resumo da rodada.
+    (Função de módulo para poder ser enviada aos processos do pool.)
+    """
+    (indice_cenario, fabrica, semente, motor, instrumentar, guardar_risco,
+     armazem, posicao) = tarefa
+    p = fabrica()
+    if motor is not None:
+        p.motor_fuzzy = motor
+    resultado = rodar_simulacao_headless(p, semente, instrumentar=instrumentar)
+    if armazem is not None:
+        # As séries vão direto para o disco; pelo pool volta só o resumo
+        armazenamento.gravar_rodada(armazem, posicao, resultado, indice_cenario,
+                                    cache_etapas.hash_parametros(p))
+    series = (resultado.tempo, resultado.risco) if guardar_risco else None
+    return (indice_cenario, p.cenario_nome, semente,
+            resultado.disparado, resultado.t_disparo, resultado.risco_max,
+            p.disparo_esperado, p.tempo_inicio_falha,
+            resultado.metricas, series)
+
+
+def _preparar_motor(fabricas, motor):
+    """
+    Monta o motor compilado (e a superfície tabelada, se for o caso) UMA
+    vez antes de abrir os processos: eles leem tudo do cache.
+    """
+    from inferencia_vetorizada import obter_sistema_vetorizado
+
+    p = fabricas[0]()
+    if motor is not None:
+        p.motor_fuzzy = motor
+    if p.motor_fuzzy in ("vetorizado", "analitico", "tabela"):
+        sistema = obter_sistema_vetorizado(p)
+        if p.motor_fuzzy == "tabela":
+            from superficie_risco import obter_superficie
+            obter_superficie(p, sistema)
+
+
+def rodar_campanha(fabricas, sementes, n_processos=None, motor="vetorizado", instrumentar=False,
+                   guardar_risco=False, armazem=None, dtype_armazem='float32'):
+    """
+    Roda todas as combinações (cenário, semente) e devolve um resumo
+    por rodada.
+
+    fabricas: funções de cenário do parametros.py (ex.: get_cenario_1_queda).
+              Precisam ser funções de módulo (lambdas não vão para o pool).
+    sementes: iterável de inteiros (ex.: range(1000)).
+    n_processos: número de processos (None = todos os núcleos; 1 = roda
+                 no próprio processo, útil para depurar).
+    motor: motor fuzzy usado nas rodadas (ver logica_decisao).
+    instrumentar: cada rodada coleta suas métricas (instrumentacao.py)
+                  e a campanha devolve a soma delas em 'metricas'.
+    guardar_risco: guarda também as séries 'tempo' e 'risco' de cada
+                   rodada (arrays (N, T)), para reavaliar o timer de
+                   disparo com outros limiares (gatilho.py).
+
+    Cada rodada usa geradores próprios, derivados só de (semente, cenário)
+    por criar_geradores(): o resultado é idêntico bit a bit para qualquer
+    número de processos.
+
+    Devolve um dict de arrays alinhados (uma posição por rodada, na ordem
+    cenário -> semente): 'indice_cenario', 'cenario', 'semente',
+    'disparado', 't_disparo' (nan se não disparou), 'risco_max',
+    'disparo_esperado' e 't_inicio_falha' (gabarito do cenário), mais
+    'metricas' (um dict) se instrumentar=True, 'tempo'/'risco' se
+    guardar_risco=True e 'armazem' (um ArmazemResultados) se armazem.
+    """
+    sementes = list(sementes)
+    tarefas = [(i, fabrica, int(semente), motor, instrumentar, guardar_risco)
+               for i, fabrica in enumerate(fabricas)
+               for semente in sementes]
+    if armazem is not None:
+        p = fabricas[0]()
+        armazenamento.ArmazemResultados.criar(
+            armazem, len(tarefas), p.n_pontos_saida, [fabrica().cenario_nome for fabrica in fabricas],
+            dtype_armazem, motor
+        ).fechar()
+    tarefas = [tarefa + (armazem, posicao) for posicao, tarefa in enumerate(tarefas)]
+
+    if n_processos is None:
+        n_processos = os.cpu_count() or 1
+
+    _preparar_motor(fabricas, motor)
+    if n_processos == 1:
+        resumos = [_executar_rodada(tarefa) for tarefa in tarefas]
+    else:
+        lote = max(1, len(tarefas) // (4 * n_processos))
+        with ProcessPoolExecutor(max_workers=n_processos) as executor:
+            resumos = list(executor.map(_executar_rodada, tarefas, chunksize=lote))
+    if armazem is not None:
+        armazenamento.fechar_abertos(armazem)
+
+    colunas = list(zip(*resumos)) if resumos else [()] * 10
+    resultado = {
+        'indice_cenario': np.array(colunas[0], dtype=int),
+        'cenario': np.array(colunas[1], dtype=object),
+        'semente': np.array(colunas[2], dtype=np.int64),
+        'disparado': np.array(colunas[3], dtype=bool),
+        't_disparo': np.array(colunas[4], dtype=float),
+        'risco_max': np.array(colunas[5], dtype=float),
+        'disparo_esperado': np.array(colunas[6], dtype=bool),
+        't_inicio_falha': np.array(colunas[7], dtype=float),
+    }
+    if instrumentar:
+        resultado['metricas'] = somar_metricas(colunas[8])
+    if guardar_risco:
+        resultado['tempo'] = np.array([tempo for tempo, _ in colunas[9]])
+        resultado['risco'] = np.array([risco for _, risco in colunas[9]])
+    if armazem is not None:
+        resultado['armazem'] = armazenamento.ArmazemResultados.abrir(armazem)
+    return resultado
+
+
+def resumir_campanha(resultado):
+    """
+    Taxa de disparo e tempo médio de disparo por cenário.
+    Devolve {cenario_nome: {'n', 'taxa_disparo', 't_disparo_medio', 'risco_max_medio'}}.
+    """
+    resumo = {}
+    for i in np.unique(resultado['indice_cenario']):
+        linhas = resultado['indice_cenario'] == i
+        disparado = resultado['disparado'][linhas]
+        t_disparo = resultado['t_disparo'][linhas][disparado]
+        resumo[resultado['cenario'][linhas][0]] = {
+            'n': int(linhas.sum()),
+            'taxa_disparo': float(disparado.mean()),
+            't_disparo_medio': float(t_disparo.mean()) if t_disparo.size else float('nan'),
+            'risco_max_medio': float(resultado['risco_max'][linhas].mean()),
+        }
+    return resumo
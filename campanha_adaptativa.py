@@ -0,0 +1,262 @@
+# 📄 campanha_adaptativa.py
+# Campanha de Monte Carlo SEQUENCIAL: roda sementes em lotes
+# crescentes e para cada cenário, sozinho, assim que a estimativa
+# chega à precisão pedida. Os cenários difíceis (disparo indevido
+# raro: pouso, turbulência) não seguram os fáceis, e nenhum roda
+# mais do que precisa.
+#
+# Por cenário acompanha:
+#   - taxa de disparo com intervalo de Wilson ou de Clopper-Pearson;
+#   - quantis do instante do disparo (nos cenários com disparo
+#     esperado), com intervalo pelas estatísticas de ordem.
+#
+# Amostragem por importância (opcional): as rodadas sorteiam o ruído
+# do GNSS e as rajadas com o desvio-padrão multiplicado por
+# 'escala_ruido_gnss' / 'escala_rajada' (eventos raros ficam mais
+# frequentes) e cada rodada recebe o peso
+#   w = prod_i  N(x_i; 0, sigma²) / N(x_i; 0, (escala*sigma)²)
+#     = escala^n * exp(-(escala² - 1)/2 * soma(z_i²))
+# sobre os n sorteios normais padrão z_i que entram no resultado
+# (refeitos a partir dos mesmos geradores da rodada). A taxa é a média
+# ponderada (autonormalizada) e os intervalos usam o tamanho efetivo
+# n_ef = (soma w)² / soma w². Como são centenas de sorteios por rodada,
+# os pesos degeneram rápido: escalas só um pouco acima de 1 (n_ef é
+# devolvido para conferir).
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from estatistica import INTERVALOS, intervalo_quantil
+from simulador_core import criar_geradores, rodar_simulacao_headless
+
+
+def _pesa_rajadas(p, escala_rajada):
+    """
+    Se as rajadas do cenário entram no peso da amostragem por
+    importância. Só o modelo 'ou' sorteia as rajadas antes da
+    integração (o 'ruido_branco' sorteia dentro da EDO): com outro
+    modelo, ValueError.
+    """
+    from simulacao_fisica import DINAMICA_POUSO_TURBULENCIA, DINAMICA_TURBULENCIA, _codigo_dinamica
+
+    turbulento = _codigo_dinamica(p) in (DINAMICA_TURBULENCIA, DINAMICA_POUSO_TURBULENCIA)
+    if escala_rajada == 1.0 or not turbulento or p.forca_rajada_turbulencia <= 0:
+        return False
+    if p.modelo_rajada != "ou":
+        raise ValueError(f"Amostragem por importância das rajadas só no modelo 'ou' "
+                         f"(o {p.modelo_rajada!r} sorteia dentro da EDO): cenário {p.cenario_nome!r}")
+    return True
+
+
+def _log_peso(p, semente, tempo, escala_ruido_gnss, escala_rajada):
+    """
+    log do peso da amostragem por importância de uma rodada (ver o
+    cabeçalho), refazendo os sorteios normais padrão da rodada com os
+    mesmos geradores (criar_geradores): as rajadas são o 1º sorteio da
+    física e o ruído do GNSS o 1º dos sensores. Do GNSS só contam as
+    amostras com leitura nova (as outras repetem a leitura anterior).
+    'p' é o Parametros NOMINAL (sem as escalas).
+    """
+    from rajadas import n_amostras_rajada
+    from simulacao_sensores import _leituras_gnss
+
+    rng_fisica, rng_sensores = criar_geradores(semente, p.cenario_nome)
+    log_peso = 0.0
+    if _pesa_rajadas(p, escala_rajada):
+        n = n_amostras_rajada(p)
+        z = rng_fisica.normal(0.0, 1.0, n)
+        log_peso += n * np.log(escala_rajada) - (escala_rajada ** 2 - 1) / 2 * float(z @ z)
+    if escala_ruido_gnss != 1.0 and p.sigma_ruido_gnss > 0:
+        tempo = np.atleast_2d(tempo)
+        z = rng_sensores.normal(0.0, 1.0, tempo.shape)[_leituras_gnss(p, tempo)]
+        log_peso += len(z) * np.log(escala_ruido_gnss) - (escala_ruido_gnss ** 2 - 1) / 2 * float(z @ z)
+    return log_peso
+
+
+def _executar_rodada(tarefa):
+    """
+    Roda UMA simulação (com as escalas da amostragem por importância)
+    e devolve (indice_cenario, semente, disparado, t_disparo, log_peso).
+    (Função de módulo para poder ser enviada aos processos do pool.)
+    """
+    indice_cenario, fabrica, semente, motor, escala_ruido_gnss, escala_rajada = tarefa
+    p = fabrica()
+    if motor is not None:
+        p.motor_fuzzy = motor
+    p.sigma_ruido_gnss *= escala_ruido_gnss
+    p.forca_rajada_turbulencia *= escala_rajada
+    resultado = rodar_simulacao_headless(p, semente)
+
+    log_peso = 0.0
+    if escala_ruido_gnss != 1.0 or escala_rajada != 1.0:
+        log_peso = _log_peso(fabrica(), semente, resultado.tempo, escala_ruido_gnss, escala_rajada)
+    return (indice_cenario, semente, resultado.disparado, resultado.t_disparo, log_peso)
+
+
+class _Cenario:
+    """Rodadas acumuladas de um cenário e o estado do critério de parada."""
+
+    def __init__(self, indice, fabrica):
+        p = fabrica()
+        self.indice = indice
+        self.fabrica = fabrica
+        self.nome = p.cenario_nome
+        self.disparo_esperado = p.disparo_esperado
+        self.sementes = []
+        self.disparado = []
+        self.t_disparo = []
+        self.log_peso = []
+        self.historico = []
+        self.motivo = None
+
+    def adicionar(self, semente, disparado, t_disparo, log_peso):
+        self.sementes.append(semente)
+        self.disparado.append(disparado)
+        self.t_disparo.append(t_disparo)
+        self.log_peso.append(log_peso)
+
+    def estimativa(self, intervalo, confianca, quantis):
+        """Taxa, intervalo, tamanho efetivo e quantis do instante do disparo."""
+        disparado = np.array(self.disparado, dtype=bool)
+        log_peso = np.array(self.log_peso, dtype=float)
+        pesos = np.exp(log_peso - log_peso.max()) if len(log_peso) else log_peso
+        n_efetivo = float(pesos.sum() ** 2 / (pesos ** 2).sum()) if len(pesos) else 0.0
+        taxa = float(pesos[disparado].sum() / pesos.sum()) if len(pesos) else np.nan
+        ic = INTERVALOS[intervalo](taxa * n_efetivo if len(pesos) else 0.0, n_efetivo, confianca)
+
+        valores_quantis = {}
+        if not np.any(log_peso != 0.0):  # quantis só sem amostragem por importância
+            t = np.array(self.t_disparo, dtype=float)[disparado]
+            valores_quantis = {q: intervalo_quantil(t, q, confianca) for q in quantis}
+        return {'n': len(disparado), 'disparos': int(disparado.sum()), 'taxa': taxa, 'ic_taxa': ic,
+                'n_efetivo': n_efetivo, 'quantis': valores_quantis}
+
+
+def rodar_campanha_adaptativa(fabricas, meia_largura=0.01, taxa_maxima=None, quantis=(0.5, 0.9),
+                              largura_quantil=0.5, confianca=0.95, intervalo='wilson',
+                              lote_inicial=100, crescimento=2.0, max_rodadas=100_000, semente_inicial=0,
+                              n_processos=None, motor="vetorizado", escala_ruido_gnss=1.0, escala_rajada=1.0):
+    """
+    Campanha sequencial: a cada rodada de lotes, todos os cenários
+    ainda "abertos" rodam as próximas sementes (lote_inicial, depois o
+    lote anterior * crescimento) e cada um para quando:
+      - a meia largura do intervalo da taxa de disparo <= meia_largura,
+        ou o limite superior <= taxa_maxima (se dada: "o disparo
+        indevido é no máximo tão provável quanto isso"), e
+      - nos cenários com disparo esperado (p.disparo_esperado), o
+        intervalo de cada quantil em 'quantis' do instante do disparo
+        tem largura <= largura_quantil segundos;
+      - ou chegou a max_rodadas.
+
+    fabricas: funções de cenário do parametros.py (funções de módulo,
+              como em campanha.rodar_campanha).
+    intervalo: 'wilson' ou 'clopper_pearson'.
+    escala_ruido_gnss, escala_rajada: amostragem por importância (ver o
+              cabeçalho); 1.0 = desligada. Com ela, os quantis não
+              são calculados e o critério fica só na taxa.
+    As sementes de cada cenário são semente_inicial, +1, +2, ... e os
+    lotes têm tamanhos fixos: o resultado não depende de n_processos.
+
+    Devolve {cenario_nome: {'n', 'disparos', 'taxa', 'ic_taxa',
+    'n_efetivo', 'quantis' ({q: (valor, mínimo, máximo)}), 'motivo'
+    ('precisao', 'taxa_maxima' ou 'max_rodadas'), 'historico' (a
+    estimativa depois de cada lote) e 'rodadas' (arrays 'semente',
+    'disparado', 't_disparo', 'log_peso')}}.
+    """
+    from campanha import _preparar_motor
+
+    if intervalo not in INTERVALOS:
+        raise ValueError(f"Intervalo desconhecido: {intervalo!r} (use {', '.join(INTERVALOS)})")
+    if n_processos is None:
+        n_processos = os.cpu_count() or 1
+    for fabrica in fabricas:  # antes de rodar qualquer lote
+        _pesa_rajadas(fabrica(), escala_rajada)
+
+    cenarios = [_Cenario(i, fabrica) for i, fabrica in enumerate(fabricas)]
+    _preparar_motor(fabricas, motor)
+    executor = ProcessPoolExecutor(max_workers=n_processos) if n_processos > 1 else None
+    try:
+        tamanho_lote = lote_inicial
+        abertos = list(cenarios)
+        while abertos:
+            tarefas = []
+            for cenario in abertos:
+                inicio = semente_inicial + len(cenario.sementes)
+                fim = semente_inicial + min(max_rodadas, len(cenario.sementes) + int(tamanho_lote))
+                tarefas += [(cenario.indice, cenario.fabrica, semente, motor, escala_ruido_gnss, escala_rajada)
+                            for semente in range(inicio, fim)]
+            if executor is None:
+                saidas = [_executar_rodada(tarefa) for tarefa in tarefas]
+            else:
+                saidas = executor.map(_executar_rodada, tarefas,
+                                      chunksize=max(1, len(tarefas) // (4 * n_processos)))
+            for indice, semente, disparado, t_disparo, log_peso in saidas:
+                cenarios[indice].adicionar(semente, disparado, t_disparo, log_peso)
+
+            for cenario in abertos:
+                estimativa = cenario.estimativa(intervalo, confianca, quantis)
+                cenario.historico.append(estimativa)
+                inferior, superior = estimativa['ic_taxa']
+                quantis_ok = (not cenario.disparo_esperado or not estimativa['quantis'] or all(
+                    maximo - minimo <= largura_quantil
+                    for _, minimo, maximo in estimativa['quantis'].values()))  # NaN -> False
+                if (superior - inferior) / 2 <= meia_largura and quantis_ok:
+                    cenario.motivo = 'precisao'
+                elif taxa_maxima is not None and superior <= taxa_maxima and quantis_ok:
+                    cenario.motivo = 'taxa_maxima'
+                elif estimativa['n'] >= max_rodadas:
+                    cenario.motivo = 'max_rodadas'
+            abertos = [cenario for cenario in abertos if cenario.motivo is None]
+            tamanho_lote *= crescimento
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    resultado = {}
+    for cenario in cenarios:
+        resultado[cenario.nome] = dict(cenario.historico[-1], motivo=cenario.motivo, historico=cenario.historico,
+                                       rodadas={
+                                           'semente': np.array(cenario.sementes, dtype=np.int64),
+                                           'disparado': np.array(cenario.disparado, dtype=bool),
+                                           't_disparo': np.array(cenario.t_disparo, dtype=float),
+                                           'log_peso': np.array(cenario.log_peso, dtype=float),
+                                       })
+    return resultado
+
+
+def verificar_pesos(fabrica=None, n_rodadas=200, escala_ruido_gnss=1.05, escala_rajada=1.05, semente=0):
+    """
+    Confere a amostragem por importância: com o peso certo, a média de
+    w sob a proposta é 1 e a média ponderada de uma função dos
+    sorteios é a da distribuição nominal. Aqui a função é o erro
+    quadrático médio do GNSS nas amostras com leitura nova (lá,
+    altitude_gnss - altitude_real é só o ruído: deve dar
+    sigma_ruido_gnss²). Devolve {'media_pesos', 'n_efetivo',
+    'variancia_nominal', 'variancia_ponderada', 'variancia_proposta'}.
+    """
+    import parametros as params
+    from simulacao_sensores import _leituras_gnss
+
+    if fabrica is None:
+        fabrica = params.get_cenario_5_pouso_turbulencia
+    p_nominal = fabrica()
+    log_pesos, quadrados = [], []
+    for s in range(semente, semente + n_rodadas):
+        p = fabrica()
+        p.sigma_ruido_gnss *= escala_ruido_gnss
+        p.forca_rajada_turbulencia *= escala_rajada
+        r = rodar_simulacao_headless(p, s)
+        log_pesos.append(_log_peso(p_nominal, s, r.tempo, escala_ruido_gnss, escala_rajada))
+        leituras = _leituras_gnss(p, np.atleast_2d(r.tempo))[0]
+        quadrados.append(float(np.mean((r.altitude_gnss - r.altitude_real)[leituras] ** 2)))
+    pesos = np.exp(np.array(log_pesos))
+    quadrados = np.array(quadrados)
+    return {
+        'media_pesos': float(pesos.mean()),
+        'n_efetivo': float(pesos.sum() ** 2 / (pesos ** 2).sum()),
+        'variancia_nominal': p_nominal.sigma_ruido_gnss ** 2,
+        'variancia_ponderada': float((pesos * quadrados).sum() / pesos.sum()),
+        'variancia_proposta': float(quadrados.mean()),
+    }
@@ -0,0 +1,142 @@
+# 📄 caracteristicas.py
+# Características em janela usadas pela decisão, calculadas sobre a
+# série inteira (T,) ou um lote (N, T) de uma vez, sem pandas:
+#   - média móvel da velocidade do GNSS (o antigo rolling(min_periods=1));
+#   - pitch médio dos últimos p.tempo_persistencia_pitch segundos (o
+#     antigo deque + np.mean por amostra);
+#   - proximidade da velocidade terminal.
+#
+# As médias móveis saem de UMA soma acumulada: soma da janela =
+# S[i] - S[i - janela], O(T) qualquer que seja a janela. Para o erro
+# de arredondamento da soma acumulada não crescer com o tamanho da
+# série, cada linha é somada já centrada na própria média.
+
+import numpy as np
+
+
+def _somas_janela(x, janela):
+    """
+    Soma das últimas 'janela' amostras (ou de todas até ali, enquanto a
+    janela não enche) e quantas amostras entraram em cada soma.
+    x: (N, T) centrado. Devolve (somas (N, T), quantidades (T,)).
+    """
+    T = x.shape[1]
+    acumulada = np.zeros((x.shape[0], T + 1))
+    np.cumsum(x, axis=1, out=acumulada[:, 1:])
+    fim = np.arange(1, T + 1)
+    inicio = np.maximum(fim - janela, 0)
+    return acumulada[:, fim] - acumulada[:, inicio], fim - inicio
+
+
+def media_movel(x, janela):
+    """
+    Média móvel "para trás" de 'janela' amostras ao longo do último
+    eixo, com aquecimento: antes da janela encher, é a média das
+    amostras disponíveis (como rolling(window=janela, min_periods=1).mean()
+    do pandas). x: (T,) ou (N, T). Devolve o mesmo formato.
+    """
+    x = np.asarray(x, dtype=float)
+    serie = np.atleast_2d(x)
+    if serie.shape[1] == 0:
+        return x.copy()
+    janela = max(1, int(janela))
+
+    centro = serie.mean(axis=1, keepdims=True)
+    somas, quantidades = _somas_janela(serie - centro, janela)
+    return (centro + somas / quantidades).reshape(x.shape)
+
+
+def media_janela_cheia(x, janela):
+    """
+    Média das últimas 'janela' amostras; enquanto a janela não enche,
+    devolve a própria amostra (o pitch médio do pipeline).
+    x: (T,) ou (N, T). Devolve o mesmo formato.
+    """
+    x = np.asarray(x, dtype=float)
+    janela = max(1, int(janela))
+    media = np.atleast_2d(media_movel(x, janela))
+    serie = np.atleast_2d(x)
+    aquecimento = min(janela - 1, serie.shape[1])
+    media[:, :aquecimento] = serie[:, :aquecimento]
+    return media.reshape(x.shape)
+
+
+def amostras_janela_pitch(p, dt):
+    """Tamanho (amostras) da janela do pitch médio: p.tempo_persistencia_pitch / dt, no mínimo 1."""
+    return max(1, int(p.tempo_persistencia_pitch / dt))
+
+
+def proximidade_v_terminal(velocidade, v_terminal):
+    """
+    |velocidade| / |v_terminal|, limitada a 1. Zero se |v_terminal|
+    <= 0.1 (evita divisão por zero). velocidade: escalar ou array.
+    """
+    velocidade = np.asarray(velocidade, dtype=float)
+    v_terminal_abs = abs(v_terminal)
+    if v_terminal_abs <= 0.1:
+        return np.zeros_like(velocidade)
+    return np.minimum(np.abs(velocidade) / v_terminal_abs, 1.0)
+
+
+def filtrar_velocidade(p, velocidade_estimada):
+    """Velocidade do GNSS suavizada pela média móvel de p.tamanho_janela_filtro amostras."""
+    return media_movel(velocidade_estimada, p.tamanho_janela_filtro)
+
+
+def calcular_caracteristicas(p, dt, pitch_sensor_giro, velocidade_filtrada):
+    """
+    Pitch médio e proximidade da v-terminal de uma rodada (T,) ou de
+    um lote (N, T) com o mesmo dt. Devolve o dict {nome: array}.
+    """
+    return {
+        'pitch_medio': media_janela_cheia(pitch_sensor_giro, amostras_janela_pitch(p, dt)),
+        'proximidade_v_terminal': proximidade_v_terminal(velocidade_filtrada, p.v_terminal),
+    }
+
+
+def verificar_equivalencia(fabricas=None, sementes=range(3), janelas=(1, 2, 25, 499, 500, 600)):
+    """
+    Compara as características com as implementações antigas:
+    rolling(min_periods=1).mean() do pandas para a média móvel (várias
+    janelas, séries dos cenários, uma por vez e em lote) e o deque +
+    np.mean para o pitch médio. Devolve {característica: maior
+    diferença absoluta}. Precisa do pandas instalado.
+    """
+    from collections import deque
+
+    import pandas as pd
+
+    import parametros as params
+    from simulador_core import rodar_simulacao_headless
+
+    if fabricas is None:
+        fabricas = (params.get_cenario_1_queda, params.get_cenario_2_pouso,
+                    params.get_cenario_3_turbulencia, params.get_cenario_4_flat_spin,
+                    params.get_cenario_5_pouso_turbulencia)
+
+    resultados = [rodar_simulacao_headless(fabrica(), semente)
+                  for fabrica in fabricas for semente in sementes]
+    velocidades = np.array([r.velocidade_estimada_gnss for r in resultados])
+    pitches = np.array([r.pitch_sensor_giro for r in resultados])
+    p = fabricas[0]()
+    dt = resultados[0].tempo[1] - resultados[0].tempo[0]
+
+    diferencas = {'media_movel': 0.0, 'pitch_medio': 0.0}
+    for janela in janelas:
+        referencia = pd.DataFrame(velocidades.T).rolling(window=janela, min_periods=1).mean().to_numpy().T
+        for calculado in (media_movel(velocidades, janela),
+                          np.array([media_movel(v, janela) for v in velocidades])):
+            diferencas['media_movel'] = max(diferencas['media_movel'],
+                                            float(np.max(np.abs(calculado - referencia))))
+
+    janela = amostras_janela_pitch(p, dt)
+    calculado = calcular_caracteristicas(p, dt, pitches, velocidades)['pitch_medio']
+    for linha, pitch in zip(calculado, pitches):
+        historico = deque(maxlen=janela)
+        referencia = []
+        for valor in pitch:
+            historico.append(valor)
+            referencia.append(np.mean(historico) if len(historico) == janela else valor)
+        diferencas['pitch_medio'] = max(diferencas['pitch_medio'],
+                                        float(np.max(np.abs(linha - np.array(referencia)))))
+    return diferencas
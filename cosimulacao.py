@@ -0,0 +1,304 @@
+# 📄 cosimulacao.py
+# Co-simulação em MALHA FECHADA: física, sensores e detector avançam
+# juntos, amostra por amostra, em vez de integrar a trajetória inteira,
+# sujar tudo com ruído e só depois procurar o disparo.
+#
+#   - a física é avançada só até o instante da próxima amostra;
+#   - os sensores leem o estado atual (ruídos e agenda do GNSS, que só
+#     dependem do tempo, são sorteados de uma vez);
+#   - o detector (detector.py) decide amostra a amostra e PARA de ser
+#     avaliado no disparo;
+#   - depois do disparo a física troca para o modelo com paraquedas
+#     (p.C_d_paraquedas, p.A_paraquedas) e segue até o toque no solo,
+#     dando a velocidade de impacto.
+#
+# Com a mesma semente e sem impacto antes de p.tempo_simulacao_max, a
+# grade, os ruídos e a trajetória até o disparo são os mesmos do
+# pipeline em etapas (simulador_core.rodar_simulacao_headless).
+
+import numpy as np
+
+import instrumentacao
+import simulacao_fisica as fisica
+import simulacao_sensores as sensores
+from detector import DetectorDeParaquedas
+from rajadas import estender_rajadas
+from resultado import CANAIS_DECISAO, CANAIS_SENSORES, ResultadoSimulacao
+from simulador_core import criar_geradores
+
+
+class _PropagadorEDO:
+    """
+    Trajetória pelo RK45 do scipy, avançada passo a passo só até o
+    instante pedido (mesmo integrador e tolerâncias do solve_ivp de
+    executar_simulacao). O impacto com o solo é localizado dentro do
+    passo em que h cruza 0, pela interpolação do próprio passo.
+    """
+
+    def __init__(self, fun, t0, y0, t_max):
+        from scipy.integrate import RK45
+
+        self.solver = RK45(fun, t0, np.asarray(y0, dtype=float), t_max)
+        self.interpolante = None
+        self.t_impacto = np.inf
+        self.v_impacto = np.nan
+
+    def estado(self, t):
+        """(altitude, velocidade) no instante t (t não decrescente)."""
+        from scipy.optimize import brentq
+
+        solver = self.solver
+        while solver.t < t and solver.status == 'running' and self.t_impacto == np.inf:
+            t_anterior = solver.t
+            mensagem = solver.step()
+            if solver.status == 'failed':
+                raise RuntimeError(f"Falha na integração: {mensagem}")
+            self.interpolante = solver.dense_output()
+            if solver.y[0] <= 0:
+                self.t_impacto = brentq(lambda s: self.interpolante(s)[0], t_anterior, solver.t)
+                self.v_impacto = float(self.interpolante(self.t_impacto)[1])
+
+        if self.interpolante is None:
+            return solver.y[0], solver.y[1]
+        h, v = self.interpolante(t)
+        return h, v
+
+    @property
+    def avaliacoes(self):
+        return self.solver.nfev
+
+
+class _PropagadorAnalitico:
+    """Queda só com peso + arrasto: estado pela solução fechada (ver _coeficientes_queda)."""
+
+    def __init__(self, p, v_inicial):
+        (self.v_t, self.escala, self.tau0,
+         self.comprimento, self.t_impacto) = fisica._coeficientes_queda(p, v_inicial)
+        self.h0 = p.altitude_inicial
+        self.log_cosh_tau0 = fisica._log_cosh(self.tau0)
+        self.v_impacto = float(-self.v_t * np.tanh(self.escala * self.t_impacto + self.tau0))
+
+    def estado(self, t):
+        x = self.escala * t + self.tau0
+        return self.h0 - self.comprimento * (fisica._log_cosh(x) - self.log_cosh_tau0), -self.v_t * np.tanh(x)
+
+    @property
+    def avaliacoes(self):
+        return 0
+
+
+def _descida_com_paraquedas(p, t_acionamento, estado, dt, rng, rajada):
+    """
+    Integra a descida depois do disparo (_modelo_dinamica_paraquedas)
+    até o solo ou p.tempo_max_descida_paraquedas. Devolve (tempo,
+    altitude, velocidade) na grade de passo dt que continua a da
+    co-simulação (o último ponto é o fim da descida) e se tocou o solo.
+    """
+    from scipy.integrate import solve_ivp
+
+    t_limite = t_acionamento + p.tempo_max_descida_paraquedas
+    if rajada is not None:
+        rajada = estender_rajadas(rajada, p, rng, t_limite)
+
+    solucao = solve_ivp(
+        lambda t, state: fisica._modelo_dinamica_paraquedas(t, state, p, t_acionamento, rng, rajada),
+        (t_acionamento, t_limite),
+        estado,
+        method='RK45',
+        events=fisica._atingiu_solo,
+        dense_output=True
+    )
+    instrumentacao.contar('edo_avaliacoes', solucao.nfev)
+
+    t_fim = solucao.t[-1]
+    tempo = t_acionamento + dt * np.arange(1, int(np.ceil((t_fim - t_acionamento) / dt)) + 1)
+    tempo = np.append(tempo[tempo < t_fim], t_fim)
+    altitude, velocidade = solucao.sol(tempo)
+    return tempo, altitude, velocidade, solucao.status == 1
+
+
+def executar_cosimulacao(p, semente=None, motor=None, instrumentar=False, arquivo_trace=None):
+    """
+    Executa UMA rodada em co-simulação (malha fechada), sem gráficos.
+    semente (opcional): ver simulador_core.criar_geradores. Se None,
+    usa o np.random global.
+    motor (opcional): motor fuzzy do detector; se None, o padrão do
+    DetectorDeParaquedas (p.motor_fuzzy, com o analítico no lugar do vetorizado).
+    instrumentar / arquivo_trace: como em rodar_simulacao_headless.
+
+    A grade de amostragem é linspace(0, p.tempo_simulacao_max,
+    p.n_pontos_saida); a rodada termina no disparo (seguido da descida
+    com paraquedas), no impacto ou em p.tempo_simulacao_max.
+
+    Devolve um ResultadoSimulacao com:
+      - física (tempo, altitude/velocidade/aceleração reais) da rodada
+        inteira, incluindo a descida com paraquedas;
+      - sensores e decisão só até o disparo (NaN depois dele);
+      - paraquedas: dict com 'acionado', 't_acionamento',
+        'altitude_acionamento', 'tocou_solo', 't_impacto', 'v_impacto'
+        e 'amostras_detector' (quantos step() o detector fez).
+    """
+    if instrumentar or arquivo_trace:
+        with instrumentacao.coletar() as coletor:
+            resultado = executar_cosimulacao(p, semente, motor)
+        if arquivo_trace:
+            coletor.exportar_trace(arquivo_trace)
+        resultado.metricas = coletor.metricas()
+        return resultado
+
+    rng_fisica, rng_sensores = (np.random, np.random) if semente is None else criar_geradores(semente, p.cenario_nome)
+
+    tempo = np.linspace(0.0, p.tempo_simulacao_max, p.n_pontos_saida)
+    dt = tempo[1] - tempo[0]
+    T = len(tempo)
+
+    # Física: mesma escolha de executar_simulacao (solução fechada ou RK45)
+    v_inicial = fisica.velocidade_inicial(p)
+    rajada = fisica.preparar_rajadas(p, rng_fisica)
+    if fisica._admite_solucao_analitica(p, v_inicial):
+        instrumentacao.contar('edo_solucoes_analiticas')
+        propagador = _PropagadorAnalitico(p, v_inicial)
+    else:
+        propagador = _PropagadorEDO(
+            lambda t, state: fisica._modelo_dinamica_queda(t, state, p, rng_fisica, rajada),
+            0.0, [p.altitude_inicial, v_inicial], p.tempo_simulacao_max
+        )
+
+    # Sensores: o que só depende do tempo sai de uma vez (mesma ordem de
+    # sorteio de simular_sensores_e_filtros)
+    ruido_gnss, oscilacao, ruido_giro, ruido_acel = sensores._sortear_ruidos(p, rng_sensores, (1, T))
+    leitura_gnss = sensores._leituras_gnss(p, tempo[None, :])[0].tolist()
+    pitch_sensor = (sensores._pitch_real(p, tempo[None, :], oscilacao) + ruido_giro)[0].tolist()
+    ruido_gnss = ruido_gnss[0].tolist()
+    desvio_acel = (p.bias_acel + ruido_acel[0]).tolist()
+    lista_tempo = tempo.tolist()
+
+    detector = DetectorDeParaquedas(p, dt, motor, registrar_eventos=True)  # o log vai no resultado
+    colunas = ('altitude', 'velocidade', 'aceleracao', 'altitude_gnss', 'aceleracao_imu',
+               'velocidade_estimada_gnss', 'velocidade_filtrada_gnss', 'pitch_sensor_giro', 'severidade_pid',
+               'pitch_medio', 'proximidade_v_terminal', 'risco')
+    serie = {nome: np.full(T, np.nan) for nome in colunas}
+    sem_regra = np.zeros(T, dtype=bool)
+
+    n = 0
+    with instrumentacao.medir("cosimulacao"):
+        altitude_lida = velocidade_anterior = 0.0
+        for i in range(T):
+            t = lista_tempo[i]
+            h, v = propagador.estado(t)
+            if t > propagador.t_impacto:
+                break
+
+            # Sensores na amostra atual
+            aceleracao = 0.0 if i == 0 else (v - velocidade_anterior) / (t - lista_tempo[i - 1])
+            velocidade_anterior = v
+            if leitura_gnss[i]:
+                altitude_lida = h + ruido_gnss[i]
+            aceleracao_imu = aceleracao + desvio_acel[i]
+
+            # Detector
+            risco, severidade, disparado = detector.step(altitude_lida, aceleracao_imu, pitch_sensor[i])
+
+            serie['altitude'][i] = h
+            serie['velocidade'][i] = v
+            serie['aceleracao'][i] = aceleracao
+            serie['altitude_gnss'][i] = altitude_lida
+            serie['aceleracao_imu'][i] = aceleracao_imu
+            serie['velocidade_estimada_gnss'][i] = detector.velocidade_estimada
+            serie['velocidade_filtrada_gnss'][i] = detector.velocidade_filtrada
+            serie['pitch_sensor_giro'][i] = pitch_sensor[i]
+            serie['severidade_pid'][i] = severidade
+            serie['pitch_medio'][i] = detector.pitch_medio
+            serie['proximidade_v_terminal'][i] = detector.proximidade_v_terminal
+            serie['risco'][i] = risco
+            sem_regra[i] = detector.sem_regra
+            n = i + 1
+            if disparado:
+                break
+    instrumentacao.contar('edo_avaliacoes', propagador.avaliacoes)
+    instrumentacao.contar('fuzzy_amostras', n)
+    instrumentacao.contar('fuzzy_sem_regra', int(sem_regra[:n].sum()))
+
+    paraquedas = {
+        'acionado': detector.disparado,
+        't_acionamento': np.nan,
+        'altitude_acionamento': np.nan,
+        'tocou_solo': bool(propagador.t_impacto <= p.tempo_simulacao_max),
+        't_impacto': np.nan,
+        'v_impacto': np.nan,
+        'amostras_detector': n,
+    }
+    if paraquedas['tocou_solo']:
+        paraquedas['t_impacto'] = float(propagador.t_impacto)
+        paraquedas['v_impacto'] = propagador.v_impacto
+
+    # Física e registros até a última amostra avaliada
+    tempo_total = tempo[:n]
+    altitude = serie['altitude'][:n]
+    velocidade = serie['velocidade'][:n]
+    aceleracao = serie['aceleracao'][:n]
+
+    if detector.disparado:
+        t_acionamento = tempo[n - 1]
+        paraquedas['t_acionamento'] = float(t_acionamento)
+        paraquedas['altitude_acionamento'] = float(altitude[-1])
+        with instrumentacao.medir("descida_paraquedas"):
+            (tempo_descida, altitude_descida,
+             velocidade_descida, tocou_solo) = _descida_com_paraquedas(
+                p, t_acionamento, [altitude[-1], velocidade[-1]], dt, rng_fisica, rajada)
+        paraquedas['tocou_solo'] = bool(tocou_solo)
+        if tocou_solo:
+            paraquedas['t_impacto'] = float(tempo_descida[-1])
+            paraquedas['v_impacto'] = float(velocidade_descida[-1])
+
+        tempo_total = np.concatenate([tempo_total, tempo_descida])
+        velocidade_total = np.concatenate([velocidade, velocidade_descida])
+        aceleracao = np.concatenate([
+            aceleracao, np.diff(velocidade_total[n - 1:]) / np.diff(tempo_total[n - 1:])
+        ])
+        altitude = np.concatenate([altitude, altitude_descida])
+        velocidade = velocidade_total
+
+    disparo = {
+        'disparado': detector.disparado,
+        'i_disparo': detector.i_disparo,
+        't_disparo': paraquedas['t_acionamento'],
+        'contador': detector.timer.contador,
+        'eventos': detector.eventos,
+    }
+    resultado = ResultadoSimulacao.alocar(p.cenario_nome, semente, len(tempo_total), p.dtype_resultado)
+    resultado.tempo = tempo_total
+    resultado.altitude_real = altitude
+    resultado.velocidade_real = velocidade
+    resultado.aceleracao_real = aceleracao
+    # Sensores e decisão não existem depois do disparo: NaN
+    for nome in CANAIS_SENSORES + CANAIS_DECISAO:
+        registro = resultado.canal(nome)
+        registro[:n] = serie[nome][:n]
+        registro[n:] = np.nan
+    resultado.sem_regra[:n] = sem_regra[:n]
+    resultado.disparo = disparo
+    resultado.paraquedas = paraquedas
+    return resultado
+
+
+def verificar_paridade_lote(p, semente=0, motor=None):
+    """
+    Compara a co-simulação com o pipeline em etapas
+    (rodar_simulacao_headless) com a mesma semente: maior diferença de
+    altitude real e de risco nas amostras avaliadas pelas duas, índices
+    de disparo e quantas amostras o detector avaliou em cada modo.
+    """
+    from simulador_core import rodar_simulacao_headless
+
+    lote = rodar_simulacao_headless(p, semente, motor)
+    cosim = executar_cosimulacao(p, semente, motor)
+    n = cosim.paraquedas['amostras_detector']
+    return {
+        'erro_altitude': float(np.max(np.abs(cosim.altitude_real[:n] - lote.altitude_real[:n]))),
+        'erro_risco': float(np.max(np.abs(cosim.risco[:n] - lote.risco[:n]))),
+        'i_disparo_lote': lote.disparo['i_disparo'],
+        'i_disparo_cosimulacao': cosim.disparo['i_disparo'],
+        'amostras_lote': len(lote.tempo),
+        'amostras_cosimulacao': n,
+    }
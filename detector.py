@@ -0,0 +1,270 @@
+# 📄 detector.py
+# Detector de queda em TEMPO REAL: a mesma lógica de decisão do
+# logica_decisao.py (PID, média do pitch, proximidade da v-terminal,
+# fuzzy e timer com histerese), só que amostra por amostra.
+# Todo o estado fica no objeto e tem tamanho fixo: as médias móveis
+# usam buffers circulares, dos eventos do timer só ficam o último e a
+# contagem (o log completo é opcional) e o motor padrão é o analítico,
+# cujo passo faz sempre as mesmas contas em buffers pré-alocados (o
+# caminho escalar do "vetorizado" percorre o universo de saída).
+
+import math
+
+import numpy as np
+from simple_pid import PID
+
+from logica_decisao import TimerDisparo
+
+
+def _criar_avaliador(p, motor):
+    """
+    Função entradas -> (risco, sem_regra) para UMA amostra, com o motor
+    montado uma única vez (ver logica_decisao.calcular_risco).
+    """
+    # Os motores em numpy têm um caminho escalar (calcular_amostra) só
+    # com floats: o custo fixo das operações de array dominaria o passo
+    if motor == "vetorizado":
+        from inferencia_vetorizada import obter_sistema_vetorizado
+        calcular = obter_sistema_vetorizado(p).calcular_amostra
+    elif motor == "analitico":
+        from inferencia_analitica import obter_sistema_analitico
+        calcular = obter_sistema_analitico(p).calcular_amostra
+    elif motor == "tabela":
+        from inferencia_vetorizada import obter_sistema_vetorizado
+        from superficie_risco import obter_superficie
+        calcular = obter_superficie(p, obter_sistema_vetorizado(p)).calcular_amostra
+    elif motor == "skfuzzy":
+        from skfuzzy import control as ctrl
+        from regras_fuzzy import definir_regras, definir_variaveis_fuzzy
+
+        (_, _, *variaveis) = definir_variaveis_fuzzy(p)
+        simulador_risco = ctrl.ControlSystemSimulation(ctrl.ControlSystem(definir_regras(*variaveis)))
+
+        def avaliar(entradas):
+            for rotulo, valor in entradas.items():
+                simulador_risco.input[rotulo] = valor
+            try:
+                simulador_risco.compute()
+                return simulador_risco.output['risco_de_queda'], False
+            except KeyError:
+                return 0.0, True
+        return avaliar
+    else:
+        raise ValueError(f"Motor fuzzy desconhecido: {motor!r}")
+
+    def avaliar(entradas):
+        risco, sem_regra = calcular(entradas)
+        return float(risco), bool(sem_regra)
+    return avaliar
+
+
+class _MediaMovel:
+    """
+    Média das últimas 'n' amostras (ou de todas, enquanto houver menos
+    de 'n'), com buffer circular e soma corrente. A soma é refeita do
+    zero a cada volta do buffer para não acumular erro de arredondamento
+    (custo amortizado O(1)).
+    """
+
+    def __init__(self, n):
+        self.n = n
+        self.buffer = [0.0] * n
+        self.reiniciar()
+
+    def reiniciar(self):
+        for j in range(self.n):
+            self.buffer[j] = 0.0
+        self.soma = 0.0
+        self.quantidade = 0
+        self.posicao = 0
+
+    @property
+    def cheia(self):
+        return self.quantidade == self.n
+
+    def adicionar(self, valor):
+        if self.cheia:
+            self.soma -= self.buffer[self.posicao]
+        else:
+            self.quantidade += 1
+        self.buffer[self.posicao] = valor
+        self.soma += valor
+        self.posicao += 1
+        if self.posicao == self.n:
+            self.posicao = 0
+            self.soma = math.fsum(self.buffer) if self.cheia else self.soma
+        return self.soma / self.quantidade
+
+
+class DetectorDeParaquedas:
+    """
+    Decisão de disparo do paraquedas, uma amostra de sensores por vez.
+
+    Cada step() recebe a leitura atual do GNSS (altitude), do IMU
+    (aceleração vertical) e do giroscópio (pitch) e devolve
+    (risco, severidade_pid, disparado). Reproduz o pipeline em lote:
+      - velocidade = derivada do GNSS, suavizada pela média móvel de
+        p.tamanho_janela_filtro amostras (como caracteristicas.media_movel),
+        ou o estimador GNSS + IMU se p.estimador_velocidade == "kalman";
+      - severidade = simple_pid.PID sobre a velocidade filtrada;
+      - pitch médio = média das últimas p.tempo_persistencia_pitch / dt
+        amostras (o próprio pitch até a janela encher);
+      - proximidade = |v filtrada| / |v_terminal|, limitada a 1;
+      - risco fuzzy pelo motor escolhido (p.motor_fuzzy por padrão);
+      - TimerDisparo (histerese). O disparo fica "travado" depois de
+        acontecer.
+
+    dt: período de amostragem (s), fixo. Diferença do lote: o PID é
+    criado sem sample_time, porque o padrão do simple_pid (0.01 s)
+    congelaria a saída do PID em taxas acima de 100 Hz.
+    motor: se None, p.motor_fuzzy, trocando o "vetorizado" pelo
+    "analitico" (mesmas regras, mesmo risco até o arredondamento).
+    registrar_eventos: guarda em 'eventos' TODOS os eventos do timer
+    (tipo, i, risco), como calcular_disparo; sem ele o estado não cresce
+    com o voo: só 'ultimo_evento' e 'n_eventos'.
+    """
+
+    def __init__(self, p, dt, motor=None, registrar_eventos=False):
+        self.p = p
+        self.dt = dt
+        if motor is None:
+            motor = "analitico" if p.motor_fuzzy == "vetorizado" else p.motor_fuzzy
+        self.motor = motor
+        self._avaliar = _criar_avaliador(p, motor)
+        self.registrar_eventos = registrar_eventos
+        self._media_velocidade = _MediaMovel(p.tamanho_janela_filtro)
+        # p.estimador_velocidade == "kalman": velocidade do estimador GNSS + IMU
+        self._estimador = None
+        if p.estimador_velocidade == "kalman":
+            from estimador import EstimadorKalman
+            self._estimador = EstimadorKalman(p, dt)
+        self._media_pitch = _MediaMovel(max(1, int(p.tempo_persistencia_pitch / dt)))
+        self._v_terminal_abs = abs(p.v_terminal)
+        self.timer = TimerDisparo(p, dt)
+        # Reaproveitado a cada passo (evita montar um dict novo por amostra)
+        self._entradas = {
+            'severidade_pid': 0.0,
+            'altitude': 0.0,
+            'aceleracao_vertical': 0.0,
+            'pitch_medio': 0.0,
+            'proximidade_v_terminal': 0.0,
+        }
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Volta ao estado inicial (novo voo)."""
+        self._pid = PID(
+            self.p.PID_Kp, self.p.PID_Ki, self.p.PID_Kd,
+            setpoint=0.0,
+            output_limits=(0, 100),
+            sample_time=None,
+        )
+        self._media_velocidade.reiniciar()
+        if self._estimador is not None:
+            self._estimador.reiniciar()
+        self._media_pitch.reiniciar()
+        self.timer.reiniciar()
+        self._altitude_anterior = None
+        self.n_amostras = 0
+        # Últimos valores intermediários (para registro/depuração)
+        self.velocidade_estimada = 0.0
+        self.velocidade_filtrada = 0.0
+        self.pitch_medio = 0.0
+        self.proximidade_v_terminal = 0.0
+        self.risco = 0.0
+        self.severidade = 0.0
+        self.sem_regra = False
+        self.disparado = False
+        self.i_disparo = -1
+        self.ultimo_evento = None  # (tipo, i, risco), como em calcular_disparo
+        self.n_eventos = 0
+        self.eventos = [] if self.registrar_eventos else None
+
+    def step(self, altitude_gnss, aceleracao_imu, pitch_sensor_giro):
+        """
+        Processa UMA amostra. Devolve (risco, severidade_pid, disparado).
+        """
+        # --- 1. VELOCIDADE (derivada do GNSS) E FILTRO ---
+        if self._altitude_anterior is None:
+            velocidade = 0.0
+        else:
+            velocidade = (altitude_gnss - self._altitude_anterior) / self.dt
+        self._altitude_anterior = altitude_gnss
+        if self._estimador is None:
+            velocidade_filtrada = self._media_velocidade.adicionar(velocidade)
+        else:
+            velocidade_filtrada = self._estimador.step(altitude_gnss, aceleracao_imu)[1]
+        self.velocidade_estimada = velocidade
+        self.velocidade_filtrada = velocidade_filtrada
+
+        # --- 2. PID ---
+        self.severidade = self._pid(velocidade_filtrada, dt=self.dt)
+
+        # --- 3. MÉDIA DO PITCH ---
+        media = self._media_pitch.adicionar(pitch_sensor_giro)
+        pitch_medio = media if self._media_pitch.cheia else pitch_sensor_giro
+
+        # --- 4. PROXIMIDADE V-TERMINAL ---
+        prox_v_terminal = 0.0
+        if self._v_terminal_abs > 0.1:
+            prox_v_terminal = min(abs(velocidade_filtrada) / self._v_terminal_abs, 1.0)
+
+        # --- 5. FUZZY ---
+        self.pitch_medio = pitch_medio
+        self.proximidade_v_terminal = prox_v_terminal
+        entradas = self._entradas
+        entradas['severidade_pid'] = self.severidade
+        entradas['altitude'] = altitude_gnss
+        entradas['aceleracao_vertical'] = aceleracao_imu
+        entradas['pitch_medio'] = pitch_medio
+        entradas['proximidade_v_terminal'] = prox_v_terminal
+        self.risco, self.sem_regra = self._avaliar(entradas)
+
+        # --- 6. TIMER DE DISPARO ---
+        if not self.disparado:
+            evento = self.timer.step(self.risco)
+            if evento is not None:
+                self._registrar(evento)
+            if self.timer.disparou:
+                self.disparado = True
+                self.i_disparo = self.n_amostras
+                self._registrar("disparo")
+
+        self.n_amostras += 1
+        return self.risco, self.severidade, self.disparado
+
+    def _registrar(self, tipo):
+        self.ultimo_evento = (tipo, self.n_amostras, self.risco)
+        self.n_eventos += 1
+        if self.eventos is not None:
+            self.eventos.append(self.ultimo_evento)
+
+
+def verificar_paridade_lote(p, semente=0, motor=None):
+    """
+    Roda o pipeline em lote (rodar_simulacao_headless) e passa as mesmas
+    leituras de sensores, uma a uma, pelo detector. Devolve a maior
+    diferença de risco e de severidade, os índices de disparo dos dois
+    e se os eventos do timer (log completo do detector) são os mesmos.
+    """
+    from simulador_core import rodar_simulacao_headless
+
+    resultado = rodar_simulacao_headless(p, semente, motor)
+    sensores = resultado.sensores
+    detector = DetectorDeParaquedas(p, resultado.tempo[1] - resultado.tempo[0], motor, registrar_eventos=True)
+
+    risco = np.empty(len(resultado.tempo))
+    severidade = np.empty(len(resultado.tempo))
+    for i in range(len(resultado.tempo)):
+        risco[i], severidade[i], _ = detector.step(
+            sensores['altitude_gnss'][i], sensores['aceleracao_imu'][i], sensores['pitch_sensor_giro'][i]
+        )
+
+    return {
+        'erro_risco': float(np.max(np.abs(risco - resultado.risco))),
+        'erro_severidade': float(np.max(np.abs(severidade - resultado.severidade_pid))),
+        'i_disparo_lote': resultado.disparo['i_disparo'],
+        'i_disparo_detector': detector.i_disparo,
+        'eventos_iguais': [(tipo, i) for tipo, i, _ in detector.eventos]
+                          == [(tipo, i) for tipo, i, _ in resultado.disparo['eventos']],
+    }
@@ -0,0 +1,58 @@
+# 📄 estatistica.py
+# Intervalos de confiança usados nos resumos das campanhas: proporção
+# (taxa de disparo) por Wilson ou Clopper-Pearson, e quantis pelas
+# estatísticas de ordem (sem hipótese de distribuição).
+
+import numpy as np
+
+
+def intervalo_wilson(k, n, confianca=0.95):
+    """Intervalo de Wilson para a proporção k/n (k e n podem ser reais, ex.: n efetivo)."""
+    from scipy.stats import norm
+
+    if n <= 0:
+        return (0.0, 1.0)
+    z = norm.ppf(0.5 + confianca / 2)
+    p = k / n
+    centro = (p + z * z / (2 * n)) / (1 + z * z / n)
+    meia = z / (1 + z * z / n) * np.sqrt(p * (1 - p) / n + z * z / (4 * n * n))
+    return (float(max(0.0, centro - meia)), float(min(1.0, centro + meia)))
+
+
+def intervalo_clopper_pearson(k, n, confianca=0.95):
+    """Intervalo "exato" (Clopper-Pearson, pela distribuição beta) para a proporção k/n."""
+    from scipy.stats import beta
+
+    if n <= 0:
+        return (0.0, 1.0)
+    alfa = 1 - confianca
+    inferior = 0.0 if k <= 0 else float(beta.ppf(alfa / 2, k, n - k + 1))
+    superior = 1.0 if k >= n else float(beta.ppf(1 - alfa / 2, k + 1, n - k))
+    return (inferior, superior)
+
+
+INTERVALOS = {
+    'wilson': intervalo_wilson,
+    'clopper_pearson': intervalo_clopper_pearson,
+}
+
+
+def intervalo_quantil(amostra, q, confianca=0.95):
+    """
+    Quantil q da amostra e intervalo de confiança sem hipótese de
+    distribuição (estatísticas de ordem, posições pela binomial).
+    Devolve (valor, mínimo, máximo); limites NaN se a amostra for
+    pequena demais para a confiança pedida.
+    """
+    from scipy.stats import binom
+
+    amostra = np.sort(np.asarray(amostra, dtype=float))
+    n = len(amostra)
+    if n == 0:
+        return (np.nan, np.nan, np.nan)
+    alfa = 1 - confianca
+    inferior = int(binom.ppf(alfa / 2, n, q))       # posição (1 a n) da estatística de ordem
+    superior = int(binom.ppf(1 - alfa / 2, n, q)) + 1
+    return (float(np.quantile(amostra, q)),
+            float(amostra[inferior - 1]) if inferior >= 1 else np.nan,
+            float(amostra[superior - 1]) if superior <= n else np.nan)
@@ -0,0 +1,274 @@
+# 📄 estimador.py
+# Estimador de altitude e velocidade vertical que funde o GNSS com o
+# IMU (filtro de Kalman), alternativa à derivada do GNSS + média móvel.
+#
+# A derivada do GNSS "amostra e segura" a 5 Hz, suavizada por uma
+# média de p.tamanho_janela_filtro amostras, atrasa a velocidade em
+# ~1.5 s. Aqui o IMU prediz a cada amostra e o GNSS só corrige quando
+# faz uma leitura nova:
+#   estado x = [altitude, velocidade, bias do acelerômetro]
+#   predição: h += dt*v + dt²/2*(a - b);  v += dt*(a - b);  b = b
+#   correção (leitura nova do GNSS): x += K * (altitude_gnss - h)
+# O bias (p.bias_acel no simulador) é estimado, não informado. A
+# velocidade também: começa em 0 com incerteza grande
+# (p.kalman_sigma_velocidade_inicial), e as primeiras leituras do GNSS
+# fixam o valor. O estado inicial do simulador não é usado.
+#
+# A covariância não depende dos dados, só do dt e de QUANDO chegam as
+# leituras. Por isso o lote calcula a sequência de ganhos K uma vez
+# por agenda de leituras e aplica às N rodadas juntas. O modo
+# streaming (EstimadorKalman.step) faz as mesmas contas, amostra a
+# amostra, e dá o mesmo resultado.
+# Escolha do estimador: p.estimador_velocidade ("media_movel" ou "kalman").
+
+import numpy as np
+
+# Até quantas rodadas o lote anda em floats do Python (uma por vez):
+# com poucas linhas, o custo por chamada do numpy domina o passo
+LINHAS_LACO_ESCALAR = 16
+
+# Ganhos por (dt, agenda de leituras, ruídos); ver _ganhos
+_cache_ganhos = {}
+_MAX_GANHOS_GUARDADOS = 64
+
+
+def _matrizes(p, dt):
+    """Transição F e ruído de processo Q do modelo (dt fixo)."""
+    meio_dt2 = 0.5 * dt * dt
+    F = np.array([[1.0, dt, -meio_dt2],
+                  [0.0, 1.0, -dt],
+                  [0.0, 0.0, 1.0]])
+    G = np.array([meio_dt2, dt, 0.0])
+    Q = p.kalman_sigma_acel ** 2 * np.outer(G, G)
+    Q[2, 2] += p.kalman_sigma_bias ** 2 * dt
+    return F, Q
+
+
+def _covariancia_inicial(p):
+    return np.diag([p.sigma_ruido_gnss ** 2,
+                    p.kalman_sigma_velocidade_inicial ** 2,
+                    p.kalman_sigma_bias_inicial ** 2])
+
+
+def _passo_covariancia(P, F, Q, R, mediu):
+    """
+    Um passo da covariância: predição e, se 'mediu', correção pela
+    altitude do GNSS. Devolve (P novo, ganho K (3,) ou None).
+    """
+    P = F @ P @ F.T + Q
+    if not mediu:
+        return P, None
+    K = P[:, 0] / (P[0, 0] + R)
+    A = np.eye(3)
+    A[:, 0] -= K
+    P = A @ P @ A.T + R * np.outer(K, K)  # forma de Joseph (mantém P simétrica e positiva)
+    return P, K
+
+
+def _chave_ganhos(p, dt, leituras):
+    return (float(dt), np.packbits(leituras).tobytes(), len(leituras), p.sigma_ruido_gnss,
+            p.kalman_sigma_acel, p.kalman_sigma_bias, p.kalman_sigma_velocidade_inicial,
+            p.kalman_sigma_bias_inicial)
+
+
+def _ganhos(p, dt, leituras):
+    """
+    Ganhos K (T, 3) da agenda 'leituras' (T,) de bool; zero nas
+    amostras sem leitura nova. Guardados por (dt, agenda, ruídos).
+    """
+    chave = _chave_ganhos(p, dt, leituras)
+    ganhos = _cache_ganhos.get(chave)
+    if ganhos is None:
+        F, Q = _matrizes(p, dt)
+        R = p.sigma_ruido_gnss ** 2
+        P = _covariancia_inicial(p)
+        ganhos = np.zeros((len(leituras), 3))
+        for t in range(1, len(leituras)):
+            P, K = _passo_covariancia(P, F, Q, R, leituras[t])
+            if K is not None:
+                ganhos[t] = K
+        if len(_cache_ganhos) >= _MAX_GANHOS_GUARDADOS:
+            _cache_ganhos.pop(next(iter(_cache_ganhos)))
+        _cache_ganhos[chave] = ganhos
+    return ganhos
+
+
+def leituras_novas(altitude_gnss):
+    """
+    Máscara das amostras com leitura NOVA do GNSS (a altitude mudou em
+    relação à amostra anterior; o GNSS "amostra e segura" entre
+    leituras). A primeira amostra conta como leitura. (T,) ou (N, T).
+    """
+    altitude_gnss = np.asarray(altitude_gnss)
+    leituras = np.ones(altitude_gnss.shape, dtype=bool)
+    leituras[..., 1:] = altitude_gnss[..., 1:] != altitude_gnss[..., :-1]
+    return leituras
+
+
+def _estimar_linha(altitude, aceleracao, ganhos, dt):
+    """Uma rodada em floats do Python (mesmas contas do lote)."""
+    meio_dt2 = 0.5 * dt * dt
+    h = altitude[0]
+    v = 0.0
+    b = 0.0
+    alturas = [h]
+    velocidades = [v]
+    vieses = [b]
+    for t in range(1, len(altitude)):
+        a = aceleracao[t] - b
+        h = h + dt * v + meio_dt2 * a
+        v = v + dt * a
+        k_h, k_v, k_b = ganhos[t]
+        if k_h != 0.0:
+            inovacao = altitude[t] - h
+            h = h + k_h * inovacao
+            v = v + k_v * inovacao
+            b = b + k_b * inovacao
+        alturas.append(h)
+        velocidades.append(v)
+        vieses.append(b)
+    return alturas, velocidades, vieses
+
+
+def _estimar_grupo(altitude, aceleracao, ganhos, dt):
+    """Rodadas (N, T) com a mesma agenda e o mesmo dt, passo a passo com as N juntas."""
+    N, T = altitude.shape
+    if N <= LINHAS_LACO_ESCALAR:
+        lista_ganhos = ganhos.tolist()
+        linhas = [_estimar_linha(alt, acel, lista_ganhos, dt)
+                  for alt, acel in zip(altitude.tolist(), aceleracao.tolist())]
+        return tuple(np.array([linha[k] for linha in linhas]) for k in range(3))
+
+    meio_dt2 = 0.5 * dt * dt
+    alturas = np.empty((N, T))
+    velocidades = np.empty((N, T))
+    vieses = np.empty((N, T))
+    h = altitude[:, 0].copy()
+    v = np.zeros(N)
+    b = np.zeros(N)
+    alturas[:, 0], velocidades[:, 0], vieses[:, 0] = h, v, b
+    for t in range(1, T):
+        a = aceleracao[:, t] - b
+        h = h + dt * v + meio_dt2 * a
+        v = v + dt * a
+        k_h, k_v, k_b = ganhos[t]
+        if k_h != 0.0:
+            inovacao = altitude[:, t] - h
+            h = h + k_h * inovacao
+            v = v + k_v * inovacao
+            b = b + k_b * inovacao
+        alturas[:, t], velocidades[:, t], vieses[:, t] = h, v, b
+    return alturas, velocidades, vieses
+
+
+def estimar_lote(p, tempo, altitude_gnss, aceleracao_imu):
+    """
+    Altitude, velocidade e bias estimados de uma rodada (T,) ou de um
+    lote (N, T). 'tempo' (T,) ou (N, T), com passo fixo em cada rodada
+    (rodadas com dt ou agenda de leituras diferentes são agrupadas).
+    Devolve o dict {'altitude', 'velocidade', 'bias_acel'} no formato
+    de 'altitude_gnss'.
+    """
+    altitude_gnss = np.asarray(altitude_gnss, dtype=float)
+    altitude = np.atleast_2d(altitude_gnss)
+    aceleracao = np.atleast_2d(np.asarray(aceleracao_imu, dtype=float))
+    tempo = np.broadcast_to(np.atleast_2d(tempo), altitude.shape)
+    N, T = altitude.shape
+
+    saida = {nome: np.empty((N, T)) for nome in ('altitude', 'velocidade', 'bias_acel')}
+    if T == 0:
+        return {nome: serie.reshape(altitude_gnss.shape) for nome, serie in saida.items()}
+
+    dts = tempo[:, 1] - tempo[:, 0] if T > 1 else np.ones(N)
+    leituras = leituras_novas(altitude)
+    grupos = {}
+    for linha in range(N):
+        grupos.setdefault((float(dts[linha]), leituras[linha].tobytes()), []).append(linha)
+
+    for (dt, _), linhas in grupos.items():
+        ganhos = _ganhos(p, dt, leituras[linhas[0]])
+        estimado = _estimar_grupo(altitude[linhas], aceleracao[linhas], ganhos, dt)
+        for nome, serie in zip(saida, estimado):
+            saida[nome][linhas] = serie
+    return {nome: serie.reshape(altitude_gnss.shape) for nome, serie in saida.items()}
+
+
+class EstimadorKalman:
+    """
+    Modo streaming: uma amostra (altitude do GNSS, aceleração do IMU)
+    por step(), com dt fixo. Mesmas contas de estimar_lote.
+    """
+
+    def __init__(self, p, dt):
+        self.p = p
+        self.dt = dt
+        self._F, self._Q = _matrizes(p, dt)
+        self._R = p.sigma_ruido_gnss ** 2
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Volta ao estado inicial (novo voo)."""
+        self._P = _covariancia_inicial(self.p)
+        self._altitude_anterior = None
+        self.altitude = 0.0
+        self.velocidade = 0.0
+        self.bias_acel = 0.0
+
+    def step(self, altitude_gnss, aceleracao_imu):
+        """Processa UMA amostra. Devolve (altitude, velocidade) estimadas."""
+        if self._altitude_anterior is None:
+            self._altitude_anterior = altitude_gnss
+            self.altitude = altitude_gnss
+            self.velocidade = 0.0
+            return self.altitude, self.velocidade
+
+        mediu = altitude_gnss != self._altitude_anterior
+        self._altitude_anterior = altitude_gnss
+        self._P, K = _passo_covariancia(self._P, self._F, self._Q, self._R, mediu)
+
+        dt = self.dt
+        a = aceleracao_imu - self.bias_acel
+        h = self.altitude + dt * self.velocidade + 0.5 * dt * dt * a
+        v = self.velocidade + dt * a
+        b = self.bias_acel
+        if K is not None:
+            k_h, k_v, k_b = K.tolist()
+            inovacao = altitude_gnss - h
+            h = h + k_h * inovacao
+            v = v + k_v * inovacao
+            b = b + k_b * inovacao
+        self.altitude, self.velocidade, self.bias_acel = h, v, b
+        return h, v
+
+
+def verificar_streaming(fabricas=None, semente=0):
+    """
+    Compara EstimadorKalman.step (amostra a amostra) com estimar_lote
+    (uma rodada e o lote com todos os cenários) nas séries dos sensores.
+    Devolve a maior diferença absoluta da velocidade.
+    """
+    import parametros as params
+    from simulador_core import rodar_simulacao_headless
+
+    if fabricas is None:
+        fabricas = (params.get_cenario_1_queda, params.get_cenario_2_pouso,
+                    params.get_cenario_3_turbulencia, params.get_cenario_4_flat_spin,
+                    params.get_cenario_5_pouso_turbulencia)
+
+    resultados = [rodar_simulacao_headless(fabrica(), semente) for fabrica in fabricas]
+    p = fabricas[0]()
+    tempo = resultados[0].tempo
+    dt = tempo[1] - tempo[0]
+    altitudes = np.array([r.altitude_gnss for r in resultados])
+    aceleracoes = np.array([r.aceleracao_imu for r in resultados])
+
+    lote = estimar_lote(p, tempo, np.tile(altitudes, (LINHAS_LACO_ESCALAR, 1)),
+                        np.tile(aceleracoes, (LINHAS_LACO_ESCALAR, 1)))['velocidade']
+    maior_diferenca = 0.0
+    for linha, (altitude, aceleracao) in enumerate(zip(altitudes, aceleracoes)):
+        estimador = EstimadorKalman(p, dt)
+        streaming = np.array([estimador.step(h, a)[1] for h, a in zip(altitude.tolist(), aceleracao.tolist())])
+        uma = estimar_lote(p, tempo, altitude, aceleracao)['velocidade']
+        maior_diferenca = max(maior_diferenca, float(np.max(np.abs(streaming - uma))),
+                              float(np.max(np.abs(streaming - lote[linha]))))
+    return maior_diferenca
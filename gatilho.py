@@ -0,0 +1,238 @@
+# 📄 gatilho.py
+# Timer de disparo com HISTERESE (o mesmo de logica_decisao.TimerDisparo)
+# avaliado com operações de array sobre séries de risco já calculadas,
+# para MUITAS rodadas e uma GRADE inteira de limiares de uma vez:
+#   (limiar_disparo_risco, limiar_reset_timer, tempo_minimo_disparo).
+#
+# Para cada par (disparo, reset) o estado "timer ativo" é uma trava
+# (liga com risco > disparo, desliga com risco < reset), e o timer é o
+# comprimento do trecho ativo atual. Como o máximo acumulado desse
+# comprimento sobe de 1 em 1, o primeiro instante em que ele chega a k
+# sai de uma tabela: todos os tempos mínimos custam o mesmo que um.
+#
+# Uso típico (ajuste de limiares sem rodar o pipeline de novo):
+#   resultado = campanha.rodar_campanha(fabricas, range(200), guardar_risco=True)
+#   matrizes = gatilho.varrer_campanha(resultado, [80, 85, 90], [70, 75, 80], [1.0, 2.0, 3.0])
+#   gatilho.resumir_limiares(matrizes)
+
+import numpy as np
+
+
+def passos_minimos(dt, tempos_minimos):
+    """
+    Menor número de amostras seguidas com o timer ativo para disparar
+    (contador >= tempo_minimo), para cada dt (N,) e cada tempo mínimo
+    (K,). O contador é somado passo a passo (cumsum), como no
+    TimerDisparo, então o resultado é exato mesmo quando tempo_minimo
+    é múltiplo de dt. 0 = dispara na primeira amostra (tempo_minimo <= 0).
+    Devolve (N, K) inteiros.
+    """
+    dt = np.atleast_1d(np.asarray(dt, dtype=float))
+    tempos_minimos = np.atleast_1d(np.asarray(tempos_minimos, dtype=float))
+    dts, inverso = np.unique(dt, return_inverse=True)
+
+    k_max = int(np.ceil(max(tempos_minimos.max(), 0.0) / dts.min())) + 2
+    contador = np.cumsum(np.broadcast_to(dts[:, None], (len(dts), k_max)), axis=1)
+    passos = (contador[:, :, None] < tempos_minimos[None, None, :]).sum(axis=1) + 1
+    passos[:, tempos_minimos <= 0] = 0
+    return passos[inverso]
+
+
+def _timer_ativo(acima, risco, limiar_reset):
+    """
+    Estado do timer DEPOIS de cada amostra (N, T): liga quando o risco
+    passa do limiar de disparo ('acima'), desliga quando fica abaixo do
+    limiar de reset e, entre os dois, mantém o estado anterior.
+    NaN (fim de uma série mais curta) desliga o timer.
+    """
+    T = risco.shape[1]
+    reset = ~acima & ((risco < limiar_reset) | np.isnan(risco))
+    ultimo_evento = np.maximum.accumulate(np.where(acima | reset, np.arange(T), -1), axis=1)
+    return (ultimo_evento >= 0) & np.take_along_axis(acima, np.maximum(ultimo_evento, 0), axis=1)
+
+
+def _primeiro_indice_por_passos(ativo, largura):
+    """
+    primeiro[n, k] = primeira amostra em que a rodada n completou k
+    amostras seguidas com o timer ativo (-1 se nunca), k = 0..largura-1.
+    """
+    N, T = ativo.shape
+    indices = np.arange(T)
+    ultimo_inativo = np.maximum.accumulate(np.where(ativo, -1, indices), axis=1)
+    maximo = np.maximum.accumulate(indices - ultimo_inativo, axis=1)  # trecho ativo mais longo até aqui
+
+    primeiro = np.full((N, largura), -1)
+    linhas, colunas = np.nonzero(np.diff(maximo, axis=1, prepend=0) > 0)
+    valores = maximo[linhas, colunas]
+    cabe = valores < largura
+    primeiro[linhas[cabe], valores[cabe]] = colunas[cabe]
+    primeiro[:, 0] = 0
+    return primeiro
+
+
+def avaliar_disparos(tempo, risco, limiares_disparo, limiares_reset, tempos_minimos):
+    """
+    Índice da amostra de disparo de cada rodada para cada combinação de
+    limiares, com a mesma regra de logica_decisao.calcular_disparo.
+
+    tempo: (T,) comum ou (N, T), uma grade uniforme por rodada.
+    risco: (N, T) séries de risco (NaN no fim = série mais curta).
+    limiares_disparo (D,), limiares_reset (R,), tempos_minimos (K,).
+    Devolve (N, D, R, K) inteiros, -1 onde não disparou.
+    """
+    risco = np.atleast_2d(np.asarray(risco, dtype=float))
+    N = risco.shape[0]
+    tempo = np.broadcast_to(np.atleast_2d(tempo), risco.shape)
+    limiares_disparo = np.atleast_1d(limiares_disparo)
+    limiares_reset = np.atleast_1d(limiares_reset)
+
+    passos = passos_minimos(tempo[:, 1] - tempo[:, 0], tempos_minimos)  # (N, K)
+    largura = int(passos.max()) + 1
+
+    i_disparo = np.full((N, len(limiares_disparo), len(limiares_reset), passos.shape[1]), -1)
+    for d, limiar_disparo in enumerate(limiares_disparo):
+        acima = risco > limiar_disparo
+        for r, limiar_reset in enumerate(limiares_reset):
+            primeiro = _primeiro_indice_por_passos(_timer_ativo(acima, risco, limiar_reset), largura)
+            i_disparo[:, d, r, :] = np.take_along_axis(primeiro, passos, axis=1)
+    return i_disparo
+
+
+def tempos_de_disparo(tempo, i_disparo):
+    """Instante de disparo (s) a partir de avaliar_disparos (NaN onde não disparou)."""
+    N = i_disparo.shape[0]
+    tempo = np.broadcast_to(np.atleast_2d(tempo), (N, np.shape(tempo)[-1]))
+    linhas = np.arange(N).reshape((N,) + (1,) * (i_disparo.ndim - 1))
+    return np.where(i_disparo >= 0, tempo[linhas, np.maximum(i_disparo, 0)], np.nan)
+
+
+def matrizes_por_cenario(tempo, risco, cenarios, disparo_esperado, t_inicio_falha,
+                         limiares_disparo, limiares_reset, tempos_minimos):
+    """
+    Matrizes (D, R, K) de desempenho do gatilho para cada cenário.
+
+    cenarios (N,): nome do cenário de cada rodada.
+    disparo_esperado (N,): o paraquedas DEVERIA abrir nessa rodada?
+    t_inicio_falha (N,): início da emergência (referência da latência).
+
+    Devolve {cenario: {
+        'disparo_esperado': bool, 'n_rodadas': int,
+        'taxa_disparo': fração das rodadas que dispararam (taxa de
+                        detecção se o disparo é esperado, senão taxa de
+                        falso disparo),
+        'latencia_media', 'latencia_max': t_disparo - t_inicio_falha
+                        (s) entre as rodadas que dispararam (NaN se nenhuma)}}
+    """
+    cenarios = np.asarray(cenarios, dtype=object)
+    disparo_esperado = np.asarray(disparo_esperado, dtype=bool)
+    t_inicio_falha = np.asarray(t_inicio_falha, dtype=float)
+
+    i_disparo = avaliar_disparos(tempo, risco, limiares_disparo, limiares_reset, tempos_minimos)
+    latencia = tempos_de_disparo(tempo, i_disparo) - t_inicio_falha[:, None, None, None]
+    disparou = i_disparo >= 0
+
+    matrizes = {}
+    for cenario in dict.fromkeys(cenarios):  # ordem de aparição
+        linhas = cenarios == cenario
+        n_disparos = disparou[linhas].sum(axis=0)
+        with np.errstate(invalid='ignore'):
+            latencia_media = np.nansum(latencia[linhas], axis=0) / n_disparos
+        latencia_max = np.max(np.where(disparou[linhas], latencia[linhas], -np.inf), axis=0)
+        matrizes[cenario] = {
+            'disparo_esperado': bool(disparo_esperado[linhas][0]),
+            'n_rodadas': int(linhas.sum()),
+            'taxa_disparo': n_disparos / linhas.sum(),
+            'latencia_media': latencia_media,
+            'latencia_max': np.where(n_disparos > 0, latencia_max, np.nan),
+        }
+    return matrizes
+
+
+def varrer_campanha(resultado, limiares_disparo, limiares_reset, tempos_minimos):
+    """
+    matrizes_por_cenario a partir de uma campanha rodada com
+    guardar_risco=True (campanha.rodar_campanha).
+    """
+    if 'risco' not in resultado:
+        raise ValueError("A campanha precisa ser rodada com guardar_risco=True")
+    return matrizes_por_cenario(
+        resultado['tempo'], resultado['risco'], resultado['cenario'],
+        resultado['disparo_esperado'], resultado['t_inicio_falha'],
+        limiares_disparo, limiares_reset, tempos_minimos
+    )
+
+
+def resumir_limiares(matrizes):
+    """
+    Junta os cenários em três matrizes (D, R, K):
+      'taxa_falso_disparo': a PIOR entre os cenários sem disparo esperado;
+      'taxa_deteccao': a PIOR entre os cenários com disparo esperado;
+      'latencia_media': a PIOR latência média entre esses cenários.
+    """
+    esperados = [m for m in matrizes.values() if m['disparo_esperado']]
+    normais = [m for m in matrizes.values() if not m['disparo_esperado']]
+    formato = next(iter(matrizes.values()))['taxa_disparo'].shape
+    return {
+        'taxa_falso_disparo': np.max([m['taxa_disparo'] for m in normais], axis=0) if normais else np.zeros(formato),
+        'taxa_deteccao': np.min([m['taxa_disparo'] for m in esperados], axis=0) if esperados else np.ones(formato),
+        'latencia_media': np.max([m['latencia_media'] for m in esperados], axis=0) if esperados else np.zeros(formato),
+    }
+
+
+def melhores_limiares(resumo, limiares_disparo, limiares_reset, tempos_minimos, n=5):
+    """
+    As 'n' melhores combinações de resumir_limiares: menos falsos
+    disparos, depois mais detecção, depois menor latência.
+    Devolve uma lista de dicts com os limiares e as três métricas.
+    """
+    falso = resumo['taxa_falso_disparo'].ravel()
+    deteccao = resumo['taxa_deteccao'].ravel()
+    latencia = np.nan_to_num(resumo['latencia_media'].ravel(), nan=np.inf)
+    ordem = np.lexsort((latencia, -deteccao, falso))[:n]
+
+    combinacoes = []
+    for posicao in ordem:
+        d, r, k = np.unravel_index(posicao, resumo['taxa_falso_disparo'].shape)
+        combinacoes.append({
+            'limiar_disparo_risco': float(limiares_disparo[d]),
+            'limiar_reset_timer': float(limiares_reset[r]),
+            'tempo_minimo_disparo': float(tempos_minimos[k]),
+            'taxa_falso_disparo': float(falso[posicao]),
+            'taxa_deteccao': float(deteccao[posicao]),
+            'latencia_media': float(latencia[posicao]),
+        })
+    return combinacoes
+
+
+def verificar_paridade(n_rodadas=200, n_pontos=500, semente=0):
+    """
+    Compara avaliar_disparos com logica_decisao.calcular_disparo (o
+    loop amostra a amostra) em séries de risco sintéticas que cruzam os
+    limiares muitas vezes, numa grade que inclui tempos mínimos
+    múltiplos exatos de dt. Devolve o número de divergências.
+    """
+    from parametros import Parametros
+    from logica_decisao import calcular_disparo
+
+    rng = np.random.default_rng(semente)
+    tempo = np.linspace(0.0, 60.0, n_pontos)
+    dt = tempo[1] - tempo[0]
+    # Passeio aleatório limitado em [0, 100]: trechos longos perto dos limiares
+    risco = np.clip(80 + np.cumsum(rng.normal(0, 2.5, (n_rodadas, n_pontos)), axis=1), 0, 100)
+
+    limiares_disparo = np.array([80.0, 85.0, 90.0])
+    limiares_reset = np.array([70.0, 80.0, 85.0])
+    tempos_minimos = np.array([0.0, dt, 0.5, 2.0, 10 * dt, 3.0])
+    i_disparo = avaliar_disparos(tempo, risco, limiares_disparo, limiares_reset, tempos_minimos)
+
+    divergencias = 0
+    p = Parametros()
+    for d, limiar_disparo in enumerate(limiares_disparo):
+        for r, limiar_reset in enumerate(limiares_reset):
+            for k, tempo_minimo in enumerate(tempos_minimos):
+                p.limiar_disparo_risco = limiar_disparo
+                p.limiar_reset_timer = limiar_reset
+                p.tempo_minimo_disparo = tempo_minimo
+                for n in range(n_rodadas):
+                    divergencias += calcular_disparo(p, tempo, risco[n])['i_disparo'] != i_disparo[n, d, r, k]
+    return int(divergencias)
@@ -0,0 +1,307 @@
+# 📄 inferencia_analitica.py
+# Motor Mamdani ANALÍTICO: mesmas regras do motor vetorizado, mas sem
+# nenhum array de universo. As pertinências saem direto dos pontos
+# [a, b, c] dos triângulos (regras_fuzzy.TRIANGULOS) e o centroide do
+# conjunto de saída (triângulos recortados, unidos por máximo) é
+# integrado de forma EXATA.
+#
+# Por que é exato: a MF agregada max_k min(corte_k, tri_k(x)) é linear
+# por partes, e as "quinas" só podem estar em
+#   - vértices dos triângulos (constantes);
+#   - cruzamentos entre lados de dois triângulos (constantes);
+#   - pontos em que um lado atinge o nível de corte de algum termo
+#     (dependem dos cortes de cada amostra).
+# Entre quinas consecutivas a função é uma reta: área e momento de cada
+# trapézio saem em fórmula fechada. No skfuzzy (e no motor vetorizado) o
+# centroide é feito sobre np.arange(0, 101, 1) mais os pontos de corte:
+# falta o cruzamento entre termos de saída. Hoje as regras só usam
+# 'Baixo' e 'Alto', que não se cruzam, e os dois motores coincidem; com
+# termos que se cruzam (ex.: 'Moderado') o erro do universo discreto
+# chega a ~0.01 de risco (ver verificar_exatidao).
+
+import numpy as np
+
+from inferencia_vetorizada import TAMANHO_BLOCO_PADRAO, obter_sistema_vetorizado
+
+# Motores já montados neste processo (chave -> SistemaFuzzyAnalitico)
+_sistemas_em_memoria = {}
+
+
+def _triangulo(x, a, b, c):
+    """Pertinência de fuzz.trimf(x, [a, b, c]), sem universo."""
+    y = np.zeros_like(x)
+    if a != b:
+        np.copyto(y, (x - a) / (b - a), where=(a < x) & (x < b))
+    if b != c:
+        np.copyto(y, (c - x) / (c - b), where=(b < x) & (x < c))
+    y[x == b] = 1.0
+    return y
+
+
+def _triangulo_escalar(x, a, b, c):
+    """_triangulo para UM valor (floats do Python, sem numpy)."""
+    if x == b:
+        return 1.0
+    if a < x < b:
+        return (x - a) / (b - a)
+    if b < x < c:
+        return (c - x) / (c - b)
+    return 0.0
+
+
+def _lados(a, b, c):
+    """Retas (inclinação, coeficiente linear) dos lados não verticais do triângulo."""
+    lados = []
+    if a != b:
+        lados.append((1.0 / (b - a), -a / (b - a)))
+    if b != c:
+        lados.append((-1.0 / (c - b), c / (c - b)))
+    return lados
+
+
+class SistemaFuzzyAnalitico:
+    """
+    Inferência com as MFs triangulares em forma fechada. As regras (AND,
+    OR, NOT e acúmulo) vêm do motor vetorizado compilado, que também
+    guarda os triângulos (SistemaFuzzyVetorizado.triangulos).
+    Mesma interface de calcular() que o motor vetorizado.
+    """
+
+    def __init__(self, sistema):
+        if sistema.triangulos is None:
+            raise ValueError("O motor vetorizado não tem os triângulos das MFs (regras_fuzzy.TRIANGULOS).")
+        self.sistema = sistema
+        # Entradas: só as bordas do universo (para o mesmo recorte do skfuzzy)
+        self.antecedentes = {
+            rotulo: (universo[0], universo[-1],
+                     {termo: tuple(float(v) for v in sistema.triangulos[rotulo][termo]) for termo in termos})
+            for rotulo, (universo, termos) in sistema.antecedentes.items()
+        }
+        self.termos_saida = list(sistema.termos_saida)
+        self.triangulos_saida = np.array(
+            [sistema.triangulos[sistema.rotulo_saida][termo] for termo in self.termos_saida], dtype=float
+        )
+        self.limites_saida = (sistema.universo_saida[0], sistema.universo_saida[-1])
+
+        # Quinas que não dependem dos cortes: vértices, bordas e cruzamentos entre lados
+        fixas = [*self.limites_saida, *self.triangulos_saida.ravel()]
+        lados = [_lados(*pontos) for pontos in self.triangulos_saida]
+        for k in range(len(lados)):
+            for j in range(k + 1, len(lados)):
+                for inclinacao_k, linear_k in lados[k]:
+                    for inclinacao_j, linear_j in lados[j]:
+                        if inclinacao_k != inclinacao_j:
+                            fixas.append((linear_j - linear_k) / (inclinacao_k - inclinacao_j))
+        self.quinas_fixas = np.unique(np.clip(fixas, *self.limites_saida))
+
+        # Quinas que dependem dos cortes: x = base + corte * passo, em cada lado
+        bases, passos = [], []
+        for a, b, c in self.triangulos_saida:
+            if a != b:
+                bases.append(a)
+                passos.append(b - a)
+            if b != c:
+                bases.append(c)
+                passos.append(b - c)
+        self.bases_lados = np.array(bases)
+        self.passos_lados = np.array(passos)
+        # As mesmas constantes em listas de floats, para calcular_amostra()
+        self._quinas_fixas_lista = self.quinas_fixas.tolist()
+        self._lados_lista = [(float(base), float(passo)) for base, passo in zip(bases, passos)]
+        self._triangulos_lista = [tuple(pontos) for pontos in self.triangulos_saida.tolist()]
+        # Regras com os termos de saída por posição; 'primeiro' marca a
+        # 1ª regra de cada termo (como o dict de SistemaFuzzyVetorizado.cortes)
+        indice_termo = {termo: k for k, termo in enumerate(self.termos_saida)}
+        vistos = set()
+        self._regras_amostra = []
+        for arvore, e, ou, saidas_regra in sistema._regras_lista:
+            saidas = []
+            for termo, peso in saidas_regra:
+                saidas.append((indice_termo[termo], peso, termo not in vistos))
+                vistos.add(termo)
+            self._regras_amostra.append((arvore, e, ou, saidas))
+        self._antecedentes_lista = {rotulo: (float(inicio), float(fim), termos)
+                                    for rotulo, (inicio, fim, termos) in self.antecedentes.items()}
+        self._limites_saida_lista = tuple(float(limite) for limite in self.limites_saida)
+        # Buffers do passo, reaproveitados a cada amostra
+        self._pertinencias_amostra = {(rotulo, termo): 0.0
+                                      for rotulo, (_, _, termos) in self.antecedentes.items() for termo in termos}
+        self._cortes_amostra = [0.0] * len(self.termos_saida)
+        n_fixas = len(self._quinas_fixas_lista)
+        self._xs_amostra = [0.0] * (n_fixas + len(self._lados_lista) * len(self.termos_saida))
+        self._ys_amostra = [0.0] * len(self._xs_amostra)
+        self._moveis_amostra = [(n_fixas + j * len(self.termos_saida), base, passo)
+                                for j, (base, passo) in enumerate(self._lados_lista)]
+
+    @property
+    def rotulo_saida(self):
+        return self.sistema.rotulo_saida
+
+    # --- ETAPA 1: FUZZIFICAÇÃO ---
+    def fuzzificar(self, entradas):
+        """{(variavel, termo): pertinência}, com as entradas recortadas ao universo."""
+        pertinencias = {}
+        for rotulo, (inicio, fim, termos) in self.antecedentes.items():
+            x = np.clip(np.asarray(entradas[rotulo], dtype=float), inicio, fim)
+            for termo, (a, b, c) in termos.items():
+                pertinencias[(rotulo, termo)] = _triangulo(x, a, b, c)
+        return pertinencias
+
+    # --- ETAPA 3: DEFUZZIFICAÇÃO (centroide exato) ---
+    def integrais_saida(self, cortes):
+        """
+        Área e momento exatos do conjunto de saída agregado.
+        cortes: (n, termos), na ordem de self.termos_saida.
+        Devolve (momento, area, sem_regra).
+        """
+        n = cortes.shape[0]
+        # Cada lado atingindo o nível de corte de cada termo: (n, lados * termos)
+        moveis = (self.bases_lados[None, :, None]
+                  + cortes[:, None, :] * self.passos_lados[None, :, None]).reshape(n, -1)
+        x = np.concatenate([np.broadcast_to(self.quinas_fixas, (n, len(self.quinas_fixas))),
+                            np.clip(moveis, *self.limites_saida)], axis=1)
+        x.sort(axis=1)
+
+        y = np.zeros_like(x)
+        for k, (a, b, c) in enumerate(self.triangulos_saida):
+            np.maximum(y, np.minimum(cortes[:, k:k + 1], _triangulo(x, a, b, c)), out=y)
+
+        x1, x2 = x[:, :-1], x[:, 1:]
+        y1, y2 = y[:, :-1], y[:, 1:]
+        largura = x2 - x1
+        area = (0.5 * largura * (y1 + y2)).sum(axis=1)
+        momento = (largura / 6.0 * (y1 * (2.0 * x1 + x2) + y2 * (x1 + 2.0 * x2))).sum(axis=1)
+        sem_regra = ~(cortes > 0).any(axis=1)
+        return momento, area, sem_regra
+
+    def defuzzificar(self, cortes):
+        """Centroide de cada amostra. Devolve (centroide, sem_regra); sem regra o risco é 0."""
+        momento, area, sem_regra = self.integrais_saida(cortes)
+        centroide = momento / np.fmax(area, np.finfo(float).eps)
+        centroide[sem_regra] = 0.0
+        return centroide, sem_regra
+
+    def calcular(self, entradas, tamanho_bloco=TAMANHO_BLOCO_PADRAO, rastro=None):
+        """
+        Avalia o sistema para arrays de entradas (qualquer formato
+        compatível por broadcasting). rastro: ver o calcular() do motor
+        vetorizado. Devolve (saida, sem_regra).
+        """
+        rotulos = list(self.antecedentes)
+        arrays = np.broadcast_arrays(*[np.asarray(entradas[r], dtype=float) for r in rotulos])
+        formato = arrays[0].shape
+        planos = [a.ravel() for a in arrays]
+
+        saida = np.empty(planos[0].size)
+        sem_regra = np.empty(planos[0].size, dtype=bool)
+        if rastro is not None:
+            rastro.preparar(self.sistema, planos[0].size)
+        for inicio in range(0, planos[0].size, tamanho_bloco):
+            fim = inicio + tamanho_bloco
+            bloco = {r: a[inicio:fim] for r, a in zip(rotulos, planos)}
+            pertinencias = self.fuzzificar(bloco)
+            forcas = self.sistema.ativacoes(pertinencias)
+            if rastro is not None:
+                rastro.gravar(inicio, pertinencias, forcas)
+            cortes = self.sistema.cortes(forcas)
+            cortes = np.stack([np.broadcast_to(cortes[termo], bloco[rotulos[0]].shape)
+                               for termo in self.termos_saida], axis=1)
+            saida[inicio:fim], sem_regra[inicio:fim] = self.defuzzificar(cortes)
+
+        return saida.reshape(formato), sem_regra.reshape(formato)
+
+    def calcular_amostra(self, entradas):
+        """
+        calcular() para UMA amostra (dict de escalares), só com floats
+        do Python: para o detector em tempo real, onde o custo fixo das
+        operações de array dominaria. O número de quinas é fixo e as
+        contas reaproveitam os buffers montados no __init__ (nada cresce
+        com a amostra). Devolve (risco, sem_regra).
+        """
+        pertinencias = self._pertinencias_amostra
+        for rotulo, (inicio, fim, termos) in self._antecedentes_lista.items():
+            x = min(max(float(entradas[rotulo]), inicio), fim)
+            for termo, (a, b, c) in termos.items():
+                pertinencias[(rotulo, termo)] = _triangulo_escalar(x, a, b, c)
+        cortes = self._cortes_amostra
+        acumular = self.sistema._acumular_escalar
+        for arvore, e, ou, saidas in self._regras_amostra:
+            forca = self.sistema._avaliar_no(arvore, e, ou, pertinencias)
+            for k, peso, primeiro in saidas:
+                cortes[k] = forca * peso if primeiro else acumular(forca * peso, cortes[k])
+        if not any(corte > 0 for corte in cortes):
+            return 0.0, True
+
+        inicio, fim = self._limites_saida_lista
+        xs, ys = self._xs_amostra, self._ys_amostra
+        n_termos = len(cortes)
+        xs[:len(self._quinas_fixas_lista)] = self._quinas_fixas_lista  # o sort anterior as embaralhou
+        for posicao, base, passo in self._moveis_amostra:
+            for k in range(n_termos):
+                xs[posicao + k] = min(max(base + cortes[k] * passo, inicio), fim)
+        xs.sort()
+        triangulos = self._triangulos_lista
+        for j, x in enumerate(xs):
+            y = 0.0
+            for k in range(n_termos):
+                y = max(y, min(cortes[k], _triangulo_escalar(x, *triangulos[k])))
+            ys[j] = y
+        area = momento = 0.0
+        for j in range(len(xs) - 1):
+            x1, x2, y1, y2 = xs[j], xs[j + 1], ys[j], ys[j + 1]
+            largura = x2 - x1
+            area += 0.5 * largura * (y1 + y2)
+            momento += largura / 6.0 * (y1 * (2.0 * x1 + x2) + y2 * (x1 + 2.0 * x2))
+        return momento / max(area, np.finfo(float).eps), False
+
+
+def obter_sistema_analitico(p):
+    """O motor analítico, montado sobre o motor vetorizado compilado (e seu cache)."""
+    sistema = obter_sistema_vetorizado(p)
+    chave = id(sistema)
+    if chave not in _sistemas_em_memoria:
+        _sistemas_em_memoria[chave] = SistemaFuzzyAnalitico(sistema)
+    return _sistemas_em_memoria[chave]
+
+
+def verificar_exatidao(p, n_amostras=2000, semente=0, n_pontos=200001):
+    """
+    Dois testes com entradas aleatórias:
+      - cortes aleatórios em TODOS os termos de saída de TRIANGULOS,
+        inclusive os que nenhuma regra usa hoje ('Moderado', que cruza
+        os outros dois): centroide dos dois motores contra a integral
+        numérica numa malha fina de n_pontos ('erro_analitico',
+        'erro_vetorizado');
+      - entradas aleatórias pela base de regras real: maior diferença
+        de risco entre os dois motores ('diferenca_motores').
+    """
+    import copy
+
+    sistema = obter_sistema_vetorizado(p)
+    completo = copy.copy(sistema)
+    completo.termos_saida = {termo: _triangulo(sistema.universo_saida, *map(float, pontos))
+                             for termo, pontos in sistema.triangulos[sistema.rotulo_saida].items()}
+    analitico = SistemaFuzzyAnalitico(completo)
+    rng = np.random.default_rng(semente)
+
+    cortes = rng.uniform(0.0, 1.0, (n_amostras, len(analitico.termos_saida)))
+    risco_analitico, _ = analitico.defuzzificar(cortes)
+    risco_vetorizado, _ = completo.defuzzificar(
+        {termo: cortes[:, k] for k, termo in enumerate(analitico.termos_saida)})
+    x = np.linspace(*analitico.limites_saida, n_pontos)
+    risco_fino = np.empty(n_amostras)
+    for i in range(n_amostras):
+        y = np.zeros_like(x)
+        for k, (a, b, c) in enumerate(analitico.triangulos_saida):
+            np.maximum(y, np.minimum(cortes[i, k], _triangulo(x, a, b, c)), out=y)
+        risco_fino[i] = np.trapezoid(x * y, x) / np.trapezoid(y, x)
+
+    entradas = {rotulo: rng.uniform(inicio, fim, n_amostras)
+                for rotulo, (inicio, fim, _) in analitico.antecedentes.items()}
+    diferenca = np.abs(obter_sistema_analitico(p).calcular(entradas)[0] - sistema.calcular(entradas)[0])
+
+    return {
+        'erro_analitico': float(np.max(np.abs(risco_analitico - risco_fino))),
+        'erro_vetorizado': float(np.max(np.abs(risco_vetorizado - risco_fino))),
+        'diferenca_motores': float(np.max(diferenca)),
+    }
@@ -0,0 +1,453 @@
+# 📄 inferencia_vetorizada.py
+# Motor Mamdani VETORIZADO para a base de regras de regras_fuzzy.py.
+# Em vez de um ControlSystemSimulation.compute() por amostra, avalia a
+# série temporal inteira (ou um lote de rodadas) em operações de array.
+
+import bisect
+import hashlib
+import json
+import operator
+import os
+import pickle
+
+import numpy as np
+
+# Muda sempre que o formato do motor compilado mudar (invalida o cache)
+VERSAO_MOTOR = 3
+
+# O que entra na chave do motor compilado (ver _chave_motor): o código
+# de onde ele sai e os campos do Parametros lidos ao montá-lo
+# (regras_fuzzy.definir_variaveis_fuzzy; hoje nenhum, os universos e
+# as MFs são constantes do módulo, ver tests/test_inferencia_vetorizada.py)
+MODULOS_MOTOR = ('regras_fuzzy', 'inferencia_vetorizada')
+CAMPOS_MOTOR = ()
+
+# Motores já montados neste processo (chave -> SistemaFuzzyVetorizado)
+_sistemas_em_memoria = {}
+
+# Diferença máxima aceita entre este motor e o compute() do skfuzzy.
+# (Na prática a diferença fica na ordem de 1e-12: é só arredondamento.)
+TOLERANCIA_PARIDADE = 1e-9
+
+# Quantas amostras são defuzzificadas por vez (limita o uso de memória)
+TAMANHO_BLOCO_PADRAO = 2048
+
+
+def _compilar_antecedente(no, antecedentes):
+    """
+    Traduz a árvore do antecedente do skfuzzy em tuplas simples
+    (('termo', variável, termo), ('and'|'or', a, b), ('not', a)) e
+    registra em 'antecedentes' os universos e MFs usados.
+    O skfuzzy só é necessário aqui: o motor compilado é só numpy.
+    """
+    from skfuzzy.control.term import Term, TermAggregate
+
+    if isinstance(no, Term):
+        var = no.parent
+        universo, termos = antecedentes.setdefault(
+            var.label, (np.asarray(var.universe, dtype=float), {})
+        )
+        termos[no.label] = np.asarray(no.mf, dtype=float)
+        return ('termo', var.label, no.label)
+    if isinstance(no, TermAggregate):
+        if no.kind == 'not':
+            return ('not', _compilar_antecedente(no.term1, antecedentes))
+        if no.kind in ('and', 'or'):
+            return (no.kind, _compilar_antecedente(no.term1, antecedentes),
+                    _compilar_antecedente(no.term2, antecedentes))
+        raise NotImplementedError(no.kind)
+    raise TypeError(f"Antecedente não suportado: {no!r}")
+
+
+# Funções de acúmulo do skfuzzy -> equivalentes do numpy (o motor
+# compilado não pode depender do skfuzzy para ser carregado do cache)
+_ACUMULO_NUMPY = {'accumulation_max': np.fmax, 'accumulation_mult': np.multiply}
+
+# AND/OR/acúmulo do numpy -> mesmas contas em floats do Python (calcular_amostra)
+_ESCALAR = {np.fmin: min, np.fmax: max, np.multiply: operator.mul}
+
+
+def _interp_escalar(x, xs, ys):
+    """np.interp(x, xs, ys) para UM x dentro de [xs[0], xs[-1]], em floats do Python."""
+    j = bisect.bisect_right(xs, x) - 1
+    if j >= len(xs) - 1:
+        return ys[-1]
+    return (ys[j + 1] - ys[j]) / (xs[j + 1] - xs[j]) * (x - xs[j]) + ys[j]
+
+
+class SistemaFuzzyVetorizado:
+    """
+    Versão "compilada" de um ctrl.ControlSystem do skfuzzy.
+
+    Reproduz exatamente a inferência do skfuzzy (entradas recortadas ao
+    universo, AND=fmin, OR=fmax, NOT=1-x, acúmulo por máximo e centroide
+    sobre o universo de saída "reamostrado" nos pontos de corte), só que
+    para arrays de entradas de qualquer formato.
+
+    triangulos (opcional): os pontos [a, b, c] das MFs (regras_fuzzy.TRIANGULOS),
+    guardados junto para o motor analítico (inferencia_analitica.py).
+    """
+
+    def __init__(self, lista_de_regras, triangulos=None):
+        self.triangulos = triangulos
+        self.regras = []
+        self.antecedentes = {}
+        termos_saida = {}
+        consequente = None
+
+        for n, regra in enumerate(lista_de_regras, start=1):
+            arvore = _compilar_antecedente(regra.antecedent, self.antecedentes)
+            # Sem label, o skfuzzy usa id(regra), que muda a cada execução
+            rotulo = regra.label if isinstance(regra.label, str) else f'regra_{n}'
+
+            saidas_regra = []
+            for termo_ponderado in regra.consequent:
+                termo = termo_ponderado.term
+                if consequente is None:
+                    consequente = termo.parent
+                elif termo.parent is not consequente:
+                    raise ValueError("O motor vetorizado suporta apenas UM consequente.")
+                termos_saida[termo.label] = np.asarray(termo.mf, dtype=float)
+                saidas_regra.append((termo.label, float(termo_ponderado.weight)))
+
+            self.regras.append((rotulo, arvore, regra.and_func, regra.or_func, saidas_regra))
+
+        if consequente is None:
+            raise ValueError("Nenhuma regra com consequente foi fornecida.")
+
+        self.rotulo_saida = consequente.label
+        self.universo_saida = np.asarray(consequente.universe, dtype=float)
+        self.termos_saida = termos_saida
+        acumular = consequente.accumulation_method
+        self.acumular = _ACUMULO_NUMPY.get(getattr(acumular, '__name__', None), acumular)
+
+        # As mesmas tabelas em listas de floats, para calcular_amostra()
+        self._antecedentes_lista = {
+            rotulo: (universo.tolist(), {termo: mf.tolist() for termo, mf in termos.items()})
+            for rotulo, (universo, termos) in self.antecedentes.items()
+        }
+        self._regras_lista = [(arvore, _ESCALAR.get(e, e), _ESCALAR.get(ou, ou), saidas)
+                              for _, arvore, e, ou, saidas in self.regras]
+        self._acumular_escalar = _ESCALAR.get(self.acumular, self.acumular)
+        self._universo_saida_lista = self.universo_saida.tolist()
+        self._termos_saida_lista = {termo: mf.tolist() for termo, mf in self.termos_saida.items()}
+
+    def assinatura(self):
+        """
+        Hash do conteúdo do motor (universos, MFs, regras e saída).
+        Identifica a base de regras em caches (ex.: superficie_risco.py).
+        """
+        h = hashlib.sha256()
+        descricao = {
+            'regras': [(rotulo, arvore, e.__name__, ou.__name__, saidas)
+                       for rotulo, arvore, e, ou, saidas in self.regras],
+            'saida': self.rotulo_saida,
+            'acumular': self.acumular.__name__,
+        }
+        h.update(json.dumps(descricao, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+        for rotulo in sorted(self.antecedentes):
+            universo, termos = self.antecedentes[rotulo]
+            h.update(rotulo.encode('utf-8'))
+            h.update(universo.tobytes())
+            for termo in sorted(termos):
+                h.update(termo.encode('utf-8'))
+                h.update(termos[termo].tobytes())
+        h.update(self.universo_saida.tobytes())
+        for termo in sorted(self.termos_saida):
+            h.update(termo.encode('utf-8'))
+            h.update(self.termos_saida[termo].tobytes())
+        return h.hexdigest()[:16]
+
+    # --- ETAPA 1: FUZZIFICAÇÃO ---
+    def fuzzificar(self, entradas):
+        """
+        Devolve {(variavel, termo): pertinência} para entradas 1-D
+        (já achatadas). Valores fora do universo são recortados às bordas,
+        igual ao 'clip_to_bounds' do skfuzzy.
+        """
+        pertinencias = {}
+        for rotulo, (universo, termos) in self.antecedentes.items():
+            x = np.clip(entradas[rotulo], universo[0], universo[-1])
+            for termo, mf in termos.items():
+                pertinencias[(rotulo, termo)] = np.interp(x, universo, mf)
+        return pertinencias
+
+    # --- ETAPA 2: REGRAS (ativação e acúmulo) ---
+    def _avaliar_no(self, no, e, ou, pertinencias):
+        tipo = no[0]
+        if tipo == 'termo':
+            return pertinencias[(no[1], no[2])]
+        if tipo == 'and':
+            return e(self._avaliar_no(no[1], e, ou, pertinencias),
+                     self._avaliar_no(no[2], e, ou, pertinencias))
+        if tipo == 'or':
+            return ou(self._avaliar_no(no[1], e, ou, pertinencias),
+                      self._avaliar_no(no[2], e, ou, pertinencias))
+        if tipo == 'not':
+            return 1. - self._avaliar_no(no[1], e, ou, pertinencias)
+        raise NotImplementedError(tipo)
+
+    def ativacoes(self, pertinencias):
+        """Força de disparo de cada regra, na ordem da lista de regras."""
+        return [self._avaliar_no(arvore, e, ou, pertinencias)
+                for _, arvore, e, ou, _ in self.regras]
+
+    def cortes(self, forcas):
+        """Nível de corte de cada termo de saída (acúmulo por máximo)."""
+        cortes = {}
+        for (*_, saidas_regra), forca in zip(self.regras, forcas):
+            for termo, peso in saidas_regra:
+                valor = forca * peso
+                cortes[termo] = valor if termo not in cortes else self.acumular(valor, cortes[termo])
+        return cortes
+
+    def integrais_saida(self, cortes):
+        """
+        Área e momento (área x centroide) do conjunto de saída agregado.
+
+        O universo de saída é reamostrado nos pontos onde cada termo cruza
+        o seu nível de corte (o mesmo que o _interp_universe_fast faz no
+        skfuzzy). Pontos "sem cruzamento" viram cópias de universo[0] e só
+        geram segmentos de largura zero, que não contribuem com área.
+        Devolve (momento, area, sem_regra); sem_regra marca as amostras em
+        que a MF agregada é toda nula (o caso do KeyError no skfuzzy).
+        """
+        x = self.universo_saida
+        dx = np.diff(x)
+        n = len(next(iter(cortes.values())))
+
+        pontos = [np.broadcast_to(x, (n, len(x)))]
+        for termo, corte in cortes.items():
+            mf = self.termos_saida[termo]
+            c = corte[:, None]
+            acima = np.where(c == 0., mf > c, mf >= c)
+            cruza = acima[:, 1:] != acima[:, :-1]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                x_cruz = x[:-1] + (c - mf[:-1]) * dx / np.diff(mf)
+            pontos.append(np.where(cruza, x_cruz, x[0]))
+        pontos = np.sort(np.concatenate(pontos, axis=1), axis=1)
+
+        mf_saida = np.zeros_like(pontos)
+        for termo, corte in cortes.items():
+            recorte = np.minimum(corte[:, None], np.interp(pontos, x, self.termos_saida[termo]))
+            np.maximum(mf_saida, recorte, out=mf_saida)
+
+        x1, x2 = pontos[:, :-1], pontos[:, 1:]
+        y1, y2 = mf_saida[:, :-1], mf_saida[:, 1:]
+        soma_y = y1 + y2
+        area = 0.5 * (x2 - x1) * soma_y
+        with np.errstate(divide='ignore', invalid='ignore'):
+            centro = 2.0 / 3.0 * (x2 - x1) * (y2 + 0.5 * y1) / soma_y + x1
+        centro = np.where(soma_y > 0, centro, 0.)
+
+        sem_regra = mf_saida.sum(axis=1) == 0
+        return (centro * area).sum(axis=1), area.sum(axis=1), sem_regra
+
+    # --- ETAPA 3: DEFUZZIFICAÇÃO (centroide) ---
+    def defuzzificar(self, cortes):
+        """
+        Centroide de cada amostra, como em skfuzzy.defuzz(..., 'centroid').
+        Devolve (centroide, sem_regra); sem regra ativada o risco é 0.
+        """
+        momento, area, sem_regra = self.integrais_saida(cortes)
+        centroide = momento / np.fmax(area, np.finfo(float).eps)
+        centroide[sem_regra] = 0.0
+        return centroide, sem_regra
+
+    def calcular(self, entradas, tamanho_bloco=TAMANHO_BLOCO_PADRAO, rastro=None):
+        """
+        Avalia o sistema para arrays de entradas.
+
+        entradas: dict {rótulo do antecedente: array}. Os arrays podem ter
+        qualquer formato compatível por broadcasting (ex.: (T,) para uma
+        série ou (N, T) para um lote de rodadas).
+        rastro (opcional): um rastro_regras.RastroRegras; é alocado para
+        as entradas (achatadas) e recebe as pertinências e as forças
+        das regras de cada bloco.
+        Devolve (saida, sem_regra) no formato comum das entradas. Onde
+        nenhuma regra dispara, a saída é 0 (o fallback do KeyError).
+        """
+        rotulos = list(self.antecedentes)
+        arrays = np.broadcast_arrays(*[np.asarray(entradas[r], dtype=float) for r in rotulos])
+        formato = arrays[0].shape
+        planos = [a.ravel() for a in arrays]
+
+        saida = np.empty(planos[0].size)
+        sem_regra = np.empty(planos[0].size, dtype=bool)
+        if rastro is not None:
+            rastro.preparar(self, planos[0].size)
+        for inicio in range(0, planos[0].size, tamanho_bloco):
+            fim = inicio + tamanho_bloco
+            bloco = {r: a[inicio:fim] for r, a in zip(rotulos, planos)}
+            pertinencias = self.fuzzificar(bloco)
+            forcas = self.ativacoes(pertinencias)
+            if rastro is not None:
+                rastro.gravar(inicio, pertinencias, forcas)
+            cortes = self.cortes(forcas)
+            saida[inicio:fim], sem_regra[inicio:fim] = self.defuzzificar(cortes)
+
+        return saida.reshape(formato), sem_regra.reshape(formato)
+
+    def _centroide_escalar(self, cortes):
+        """defuzzificar() de UMA amostra (cortes: {termo: float}), em floats do Python."""
+        x = self._universo_saida_lista
+        recortes = []
+        cruzamentos = []
+        for termo, corte in cortes.items():
+            mf = self._termos_saida_lista[termo]
+            # Nos nós do universo a MF é o próprio valor tabelado
+            recortes.append([corte if m > corte else m for m in mf])
+            # Pontos em que o termo cruza o seu nível de corte (como em integrais_saida)
+            acima = [m > corte for m in mf] if corte == 0. else [m >= corte for m in mf]
+            cruzamentos += [x[j] + (corte - mf[j]) * (x[j + 1] - x[j]) / (mf[j + 1] - mf[j])
+                            for j in range(len(x) - 1) if acima[j] != acima[j + 1]]
+        y = list(map(max, *recortes)) if len(recortes) > 1 else recortes[0]
+        if not any(y):
+            return 0.0, True
+
+        pontos = list(zip(x, y))  # já em ordem: os cruzamentos entram no lugar
+        for ponto in cruzamentos:
+            bisect.insort(pontos, (ponto, max(min(corte, _interp_escalar(ponto, x, self._termos_saida_lista[termo]))
+                                              for termo, corte in cortes.items())))
+
+        area = momento = 0.0
+        for (x1, y1), (x2, y2) in zip(pontos, pontos[1:]):
+            soma_y = y1 + y2
+            if soma_y > 0:
+                trecho = 0.5 * (x2 - x1) * soma_y
+                area += trecho
+                momento += (2.0 / 3.0 * (x2 - x1) * (y2 + 0.5 * y1) / soma_y + x1) * trecho
+        return momento / max(area, np.finfo(float).eps), False
+
+    def calcular_amostra(self, entradas):
+        """
+        calcular() para UMA amostra (dict de escalares), com as mesmas
+        contas em floats do Python: para o detector em tempo real, onde o
+        custo fixo das operações de array dominaria. Devolve (risco, sem_regra).
+        """
+        pertinencias = {}
+        for rotulo, (universo, termos) in self._antecedentes_lista.items():
+            x = min(max(float(entradas[rotulo]), universo[0]), universo[-1])
+            for termo, mf in termos.items():
+                pertinencias[(rotulo, termo)] = _interp_escalar(x, universo, mf)
+        cortes = {}
+        for arvore, e, ou, saidas_regra in self._regras_lista:
+            forca = self._avaliar_no(arvore, e, ou, pertinencias)
+            for termo, peso in saidas_regra:
+                valor = forca * peso
+                cortes[termo] = valor if termo not in cortes else self._acumular_escalar(valor, cortes[termo])
+        return self._centroide_escalar(cortes)
+
+
+def criar_sistema_vetorizado(p):
+    """
+    Monta o motor vetorizado a partir de regras_fuzzy.py
+    (as mesmas variáveis e regras usadas pelo caminho do skfuzzy).
+    """
+    from regras_fuzzy import TRIANGULOS, definir_regras, definir_variaveis_fuzzy
+
+    (fuzzy_vars, fuzzy_defs,
+     sev_pid,
+     pitch, altitude, acel_v,
+     pitch_medio, proximidade_v_terminal, risco_de_queda) = definir_variaveis_fuzzy(p)
+
+    lista_de_regras = definir_regras(
+        sev_pid,
+        pitch, altitude, acel_v,
+        pitch_medio, proximidade_v_terminal, risco_de_queda
+    )
+    return SistemaFuzzyVetorizado(lista_de_regras, TRIANGULOS)
+
+
+def _chave_motor(p):
+    """
+    Chave do motor compilado, como as do cache_etapas.py: hash do código
+    de MODULOS_MOTOR (lido sem importar, então não carrega o skfuzzy),
+    dos CAMPOS_MOTOR de 'p' e de VERSAO_MOTOR.
+    """
+    from cache_etapas import chave_conteudo
+    return chave_conteudo('', p, CAMPOS_MOTOR, MODULOS_MOTOR, f'versao={VERSAO_MOTOR}')
+
+
+def diretorio_cache(p):
+    """
+    Pasta do cache em disco do motor compilado e da superfície tabelada
+    (p.superficie_diretorio_cache), ou None se desligado. Um caminho
+    relativo é relativo à pasta do projeto, não ao diretório de trabalho.
+    """
+    if not p.superficie_diretorio_cache:
+        return None
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        os.path.expanduser(p.superficie_diretorio_cache))
+
+
+def obter_sistema_vetorizado(p):
+    """
+    Devolve o motor vetorizado, na ordem: memória do processo -> motor
+    compilado no cache em disco (diretorio_cache(p)) -> monta a partir
+    de regras_fuzzy.py (importa o skfuzzy) e salva.
+    Com o cache em disco, um processo novo não precisa importar o skfuzzy
+    (que por sua vez importa matplotlib e networkx).
+    """
+    chave = _chave_motor(p)
+    if chave in _sistemas_em_memoria:
+        return _sistemas_em_memoria[chave]
+
+    diretorio = diretorio_cache(p)
+    caminho = None if diretorio is None else os.path.join(diretorio, f'motor_{chave}.pkl')
+
+    if caminho is not None and os.path.exists(caminho):
+        with open(caminho, 'rb') as arquivo:
+            sistema = pickle.load(arquivo)
+    else:
+        sistema = criar_sistema_vetorizado(p)
+        if caminho is not None:
+            os.makedirs(diretorio, exist_ok=True)
+            # Grava num temporário e renomeia (processos paralelos)
+            temporario = f'{caminho}.{os.getpid()}.tmp'
+            with open(temporario, 'wb') as arquivo:
+                pickle.dump(sistema, arquivo)
+            os.replace(temporario, caminho)
+
+    _sistemas_em_memoria[chave] = sistema
+    return sistema
+
+
+def verificar_paridade(p, n_amostras=2000, semente=0):
+    """
+    Compara o motor vetorizado com o ControlSystemSimulation do skfuzzy
+    em entradas aleatórias cobrindo todo o universo de cada variável.
+    Devolve a maior diferença absoluta de 'risco_de_queda' (os casos sem
+    regra ativada contam como risco 0 nos dois lados).
+    """
+    from skfuzzy import control as ctrl
+    from regras_fuzzy import definir_regras, definir_variaveis_fuzzy
+
+    (_, _, sev_pid, pitch, altitude, acel_v,
+     pitch_medio, proximidade_v_terminal, risco_de_queda) = definir_variaveis_fuzzy(p)
+    lista_de_regras = definir_regras(sev_pid, pitch, altitude, acel_v,
+                                     pitch_medio, proximidade_v_terminal, risco_de_queda)
+    simulador = ctrl.ControlSystemSimulation(ctrl.ControlSystem(lista_de_regras))
+    sistema = SistemaFuzzyVetorizado(lista_de_regras)
+
+    rng = np.random.default_rng(semente)
+    entradas = {}
+    for rotulo, (universo, _) in sistema.antecedentes.items():
+        # Sorteia um pouco além das bordas para exercitar o recorte
+        margem = 0.05 * (universo[-1] - universo[0])
+        entradas[rotulo] = rng.uniform(universo[0] - margem, universo[-1] + margem, n_amostras)
+
+    risco_vetorizado, _ = sistema.calcular(entradas)
+
+    maior_diferenca = 0.0
+    for i in range(n_amostras):
+        for rotulo in entradas:
+            simulador.input[rotulo] = entradas[rotulo][i]
+        try:
+            simulador.compute()
+            risco_skfuzzy = simulador.output[sistema.rotulo_saida]
+        except KeyError:
+            risco_skfuzzy = 0.0
+        maior_diferenca = max(maior_diferenca, abs(risco_skfuzzy - risco_vetorizado[i]))
+
+    return maior_diferenca
@@ -0,0 +1,170 @@
+# 📄 instrumentacao.py
+# Medições OPCIONAIS dos pontos quentes da simulação: tempo por estágio
+# e contadores (avaliações da EDO, passos rejeitados, compute() do
+# skfuzzy, fallback "Nenhuma regra ativada", debug do flicker).
+#
+# Desligada por padrão: sem coletor ativo, medir() devolve um contexto
+# vazio compartilhado e contar() só testa uma variável global.
+#
+# Uso:
+#   with instrumentacao.coletar() as coletor:
+#       core.rodar_simulacao_headless(p, semente=0)
+#   coletor.metricas()                  # dict
+#   coletor.exportar_trace("trace.json")  # abre no chrome://tracing / Perfetto
+
+import contextlib
+import json
+import os
+import threading
+import time
+
+# Coletor ativo neste processo (None = instrumentação desligada)
+_coletor = None
+
+# Contexto "não faz nada", reutilizado quando a instrumentação está desligada
+_NULO = contextlib.nullcontext()
+
+# Estágios do pipeline, na ordem (usados como nomes em medir())
+ETAPAS = ("fisica", "sensores", "decisao", "disparo")
+
+# Contadores registrados pelos módulos (documentação dos nomes usados)
+CONTADORES = {
+    'edo_avaliacoes': "chamadas do lado direito da EDO (solve_ivp.nfev)",
+    'edo_passos_aceitos': "passos aceitos pelo RK45",
+    'edo_passos_rejeitados': "passos rejeitados pelo RK45 (refeitos com h menor)",
+    'edo_solucoes_analiticas': "rodadas resolvidas pela solução fechada (sem EDO)",
+    'edo_avaliacoes_lote': "avaliações do lado direito no RK4 em lote (por veículo)",
+    'fuzzy_amostras': "amostras avaliadas pelo sistema fuzzy (qualquer motor)",
+    'fuzzy_compute': "chamadas de ControlSystemSimulation.compute() (motor skfuzzy)",
+    'fuzzy_sem_regra': "amostras sem regra ativada (o fallback do KeyError, risco = 0)",
+    'fuzzy_flicker': "vezes em que o debug do flicker dispararia/disparou",
+    'cache_acertos': "etapas reaproveitadas do cache_etapas (memória ou disco)",
+    'cache_calculos': "etapas calculadas e guardadas no cache_etapas",
+}
+
+
+class Coletor:
+    """Acumula tempos por estágio, contadores e o trace de eventos."""
+
+    def __init__(self):
+        self.tempos = {}       # nome -> [segundos, ...]
+        self.contadores = {}   # nome -> total
+        self.eventos = []      # (nome, inicio_s, duracao_s) para o trace
+        self._origem = time.perf_counter()
+
+    def registrar_tempo(self, nome, inicio, duracao):
+        self.tempos.setdefault(nome, []).append(duracao)
+        self.eventos.append((nome, inicio - self._origem, duracao))
+
+    def contar(self, nome, n=1):
+        self.contadores[nome] = self.contadores.get(nome, 0) + n
+
+    def metricas(self):
+        """
+        Resumo em dict (serializável em JSON / enviável entre processos):
+          'tempos': {estágio: {'chamadas', 'total_s', 'medio_s', 'max_s'}}
+          'contadores': {nome: total}
+        """
+        return {
+            'tempos': {
+                nome: {
+                    'chamadas': len(duracoes),
+                    'total_s': sum(duracoes),
+                    'medio_s': sum(duracoes) / len(duracoes),
+                    'max_s': max(duracoes),
+                }
+                for nome, duracoes in self.tempos.items()
+            },
+            'contadores': dict(self.contadores),
+        }
+
+    def exportar_trace(self, caminho):
+        """
+        Salva os eventos no formato "Trace Event" (JSON) do Chrome:
+        abre em chrome://tracing ou ui.perfetto.dev. Os contadores vão
+        como metadados do trace.
+        """
+        pid = os.getpid()
+        tid = threading.get_ident()
+        trace = {
+            'traceEvents': [
+                {'name': nome, 'ph': 'X', 'pid': pid, 'tid': tid,
+                 'ts': 1e6 * inicio, 'dur': 1e6 * duracao}
+                for nome, inicio, duracao in self.eventos
+            ],
+            'displayTimeUnit': 'ms',
+            'otherData': {'contadores': self.contadores},
+        }
+        with open(caminho, "w", encoding="utf-8") as arquivo:
+            json.dump(trace, arquivo, ensure_ascii=False)
+
+
+class _Medicao:
+    """Contexto que mede o tempo de parede de um bloco."""
+
+    __slots__ = ('coletor', 'nome', 'inicio')
+
+    def __init__(self, coletor, nome):
+        self.coletor = coletor
+        self.nome = nome
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *excecao):
+        self.coletor.registrar_tempo(self.nome, self.inicio, time.perf_counter() - self.inicio)
+        return False
+
+
+def ativa():
+    """True se há um coletor ativo (para pular contas só usadas nas métricas)."""
+    return _coletor is not None
+
+
+def medir(nome):
+    """Contexto que mede o bloco no coletor ativo (ou não faz nada)."""
+    if _coletor is None:
+        return _NULO
+    return _Medicao(_coletor, nome)
+
+
+def contar(nome, n=1):
+    """Soma 'n' ao contador 'nome' do coletor ativo (ou não faz nada)."""
+    if _coletor is not None:
+        _coletor.contar(nome, n)
+
+
+@contextlib.contextmanager
+def coletar():
+    """
+    Liga a instrumentação dentro do bloco, com um Coletor novo, e
+    restaura o estado anterior na saída (pode ser aninhado).
+    """
+    global _coletor
+    anterior = _coletor
+    _coletor = Coletor()
+    try:
+        yield _coletor
+    finally:
+        _coletor = anterior
+
+
+def somar_metricas(lista_metricas):
+    """
+    Junta métricas de várias rodadas (ex.: uma por processo de uma
+    campanha) num único dict no mesmo formato de Coletor.metricas().
+    """
+    tempos = {}
+    contadores = {}
+    for metricas in lista_metricas:
+        for nome, t in metricas['tempos'].items():
+            total = tempos.setdefault(nome, {'chamadas': 0, 'total_s': 0.0, 'max_s': 0.0})
+            total['chamadas'] += t['chamadas']
+            total['total_s'] += t['total_s']
+            total['max_s'] = max(total['max_s'], t['max_s'])
+        for nome, n in metricas['contadores'].items():
+            contadores[nome] = contadores.get(nome, 0) + n
+    for t in tempos.values():
+        t['medio_s'] = t['total_s'] / t['chamadas']
+    return {'tempos': tempos, 'contadores': contadores}
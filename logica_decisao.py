@@ -1,18 +1,146 @@
 # 📄 logica_decisao.py
 
 import numpy as np
-import skfuzzy as fuzz
-from skfuzzy import control as ctrl
-from simple_pid import PID # <-- IMPORTANTE
-from collections import deque
-from regras_fuzzy import definir_regras, definir_variaveis_fuzzy
+import instrumentacao
+from caracteristicas import calcular_caracteristicas
+from pid_lote import severidade_pid
+from inferencia_vetorizada import obter_sistema_vetorizado
 
+# O skfuzzy (e o regras_fuzzy.py, que depende dele) só é importado onde
+# é usado: o motor vetorizado compilado não precisa dele, e importá-lo
+# também carrega matplotlib e networkx.
 
-def criar_e_calcular_risco_fuzzy(p, tempo, dados_sensores):
+
+def calcular_entradas_fuzzy(p, tempo, dados_sensores):
+    """
+    Calcula as entradas do sistema fuzzy a partir dos sensores:
+    severidade PID, média do pitch e proximidade da v-terminal (as
+    duas outras entradas vêm direto dos sensores).
+    Devolve o dict {rótulo do antecedente: array de valores}.
+    """
+    # --- CÁLCULO DO dt_constante ---
+    if len(tempo) > 1:
+        dt_constante = tempo[1] - tempo[0]
+    else:
+        dt_constante = 1.0 # Um valor seguro para evitar divisão por zero
+
+    # --- PID (série inteira de uma vez, ver pid_lote.py) ---
+    # Mesmo resultado do simple_pid.PID chamado amostra a amostra: o
+    # termo "I" (Integral) acumula ao longo de toda a série.
+    lista_severidade_pid = severidade_pid(p, dt_constante, dados_sensores['velocidade_filtrada_gnss'])
+
+    # --- MÉDIA DO PITCH E PROXIMIDADE V-TERMINAL (ver caracteristicas.py) ---
+    # O pitch médio é o próprio pitch até a janela de
+    # p.tempo_persistencia_pitch segundos encher.
+    caracteristicas = calcular_caracteristicas(p, dt_constante, dados_sensores['pitch_sensor_giro'],
+                                               dados_sensores['velocidade_filtrada_gnss'])
+
+    return {
+        'severidade_pid': lista_severidade_pid,
+        'altitude': dados_sensores['altitude_gnss'],
+        'aceleracao_vertical': dados_sensores['aceleracao_imu'],
+        'pitch_medio': caracteristicas['pitch_medio'],
+        'proximidade_v_terminal': caracteristicas['proximidade_v_terminal'],
+    }
+
+
+def _avaliar_motor(p, entradas_fuzzy, motor, rastro=None):
+    """Roda o motor escolhido. Devolve (risco, sem_regra)."""
+    if motor == "vetorizado":
+        # Série inteira de uma vez (mesmo resultado, ver inferencia_vetorizada.py)
+        return obter_sistema_vetorizado(p).calcular(entradas_fuzzy, rastro=rastro)
+
+    if motor == "analitico":
+        # Pertinências e centroide em forma fechada (ver inferencia_analitica.py)
+        from inferencia_analitica import obter_sistema_analitico
+        return obter_sistema_analitico(p).calcular(entradas_fuzzy, rastro=rastro)
+
+    if rastro is not None:
+        raise ValueError(f"O motor {motor!r} não grava o rastro das regras "
+                         f"(use 'vetorizado' ou 'analitico', ver rastro_regras.py)")
+
+    if motor == "tabela":
+        # Consulta a superfície tabelada (gerada uma vez e guardada em disco)
+        from superficie_risco import obter_superficie
+        return obter_superficie(p, obter_sistema_vetorizado(p)).calcular(entradas_fuzzy)
+
+    if motor == "skfuzzy":
+        # Caminho original: um compute() por amostra
+        from skfuzzy import control as ctrl
+        from regras_fuzzy import definir_regras, definir_variaveis_fuzzy
+
+        (_, _, *variaveis) = definir_variaveis_fuzzy(p)
+        sistema_de_controle = ctrl.ControlSystem(definir_regras(*variaveis))
+        simulador_risco = ctrl.ControlSystemSimulation(sistema_de_controle)
+
+        n = len(entradas_fuzzy['severidade_pid'])
+        risco = np.zeros(n)
+        sem_regra = np.zeros(n, dtype=bool)
+        for i in range(n):
+            for rotulo, serie in entradas_fuzzy.items():
+                simulador_risco.input[rotulo] = serie[i]
+            try:
+                simulador_risco.compute()
+                risco[i] = simulador_risco.output['risco_de_queda']
+            except KeyError:
+                sem_regra[i] = True
+        instrumentacao.contar('fuzzy_compute', n)
+        return risco, sem_regra
+
+    raise ValueError(f"Motor fuzzy desconhecido: {motor!r}")
+
+
+def indices_flicker(p, risco, sem_regra):
+    """
+    Instantes em que o risco "despenca" de acima do limiar de disparo
+    para abaixo do limiar de reset (o gatilho do debug do flicker).
+    Amostras sem regra ativada têm risco 0 e não contam.
+    """
+    risco = np.asarray(risco, dtype=float)
+    anterior = np.concatenate(([0.0], risco[:-1]))
+    flicker = ~np.asarray(sem_regra) & (risco < p.limiar_reset_timer) & (anterior > p.limiar_disparo_risco)
+    return np.nonzero(flicker)[0]
+
+
+def calcular_risco(p, entradas_fuzzy, motor=None, rastro=None):
+    """
+    Avalia o risco fuzzy para as entradas (ver calcular_entradas_fuzzy),
+    sem prints.
+    motor: "vetorizado" (série inteira de uma vez), "analitico" (idem, com
+    pertinências e centroide em forma fechada, ver inferencia_analitica.py),
+    "tabela" (superfície pré-calculada e interpolada, ver
+    superficie_risco.py) ou "skfuzzy"
+    (um compute() por amostra). Se None, usa p.motor_fuzzy.
+    rastro (opcional): um rastro_regras.RastroRegras que recebe as forças
+    das regras e as pertinências de cada amostra (só "vetorizado" e
+    "analitico").
+    Devolve (risco, sem_regra) como arrays; sem regra ativada o risco é 0.
+    """
+    if motor is None:
+        motor = p.motor_fuzzy
+
+    risco, sem_regra = _avaliar_motor(p, entradas_fuzzy, motor, rastro)
+
+    if instrumentacao.ativa():
+        instrumentacao.contar('fuzzy_amostras', np.size(risco))
+        instrumentacao.contar('fuzzy_sem_regra', int(np.count_nonzero(sem_regra)))
+        instrumentacao.contar('fuzzy_flicker', len(indices_flicker(p, risco, sem_regra)))
+    return risco, sem_regra
+
+
+def criar_e_calcular_risco_fuzzy(p, tempo, dados_sensores, motor=None, decisao=None):
     """
     Cria e executa o sistema de Lógica Fuzzy.
     AGORA TAMBÉM CALCULA A SEVERIDADE PID.
+    motor: ver calcular_risco(). Se None, usa p.motor_fuzzy.
+    decisao (opcional): (entradas_fuzzy, risco, sem_regra) já calculados
+    (ex.: vindos do cache_etapas); só os relatórios são refeitos.
+    Versão "de relatório": imprime os alertas e o debug do flicker e
+    devolve também as variáveis fuzzy (para analisar_resultados).
     """
+    from rastro_regras import MOTORES_COM_RASTRO, RastroRegras, rastrear_entradas
+    from regras_fuzzy import definir_variaveis_fuzzy
+
     print("Criando sistema de Lógica Fuzzy...")
     # --- A. FUZZIFICAÇÃO (Chamando o arquivo externo) ---
     (fuzzy_vars, fuzzy_defs,
@@ -20,137 +148,151 @@ def criar_e_calcular_risco_fuzzy(p, tempo, dados_sensores):
      pitch, altitude, acel_v,
      pitch_medio, proximidade_v_terminal, risco_de_queda) = definir_variaveis_fuzzy(p)
 
-    # --- B. DEFINIR REGRAS (Chamando o arquivo externo) ---
-    lista_de_regras = definir_regras(
-        sev_pid, # <-- REATIVADO
-        pitch, altitude, acel_v,
-        pitch_medio, proximidade_v_terminal, risco_de_queda
-    )
-
-    # --- C. SISTEMA DE CONTROLE ---
-    sistema_de_controle = ctrl.ControlSystem(lista_de_regras)
-    simulador_risco = ctrl.ControlSystemSimulation(sistema_de_controle)
-
-    # --- D. INICIALIZAÇÃO DOS CÁLCULOS (ANTES DO LOOP) ---
-    risco_calculado_fuzzy = []
-    lista_pitch_medio = []
-    lista_prox_v_terminal = []
-    
-    # --- CORREÇÃO DO PID (INÍCIO) ---
-    # 1. O PID é criado UMA VEZ, fora do loop.
-    #    Isso permite que o termo "I" (Integral) acumule.
-    pid_controller_severidade = PID(
-        p.PID_Kp, p.PID_Ki, p.PID_Kd, 
-        setpoint=0.0,           # O objetivo é velocidade vertical ZERO
-        output_limits=(0, 100)  # A saída é a "Severidade" (0 a 100)
-    )
-    # 2. Lista para armazenar a saída do PID
-    lista_severidade_pid = []
-    # --- CORREÇÃO DO PID (FIM) ---
-
-    # --- CÁLCULO DO dt_constante ---
-    if len(tempo) > 1:
-        dt_constante = tempo[1] - tempo[0]
+    # --- B. ENTRADAS (PID E MÉDIAS) ---
+    if decisao is None:
+        entradas_fuzzy = calcular_entradas_fuzzy(p, tempo, dados_sensores)
     else:
-        dt_constante = 1.0 # Um valor seguro para evitar divisão por zero
+        entradas_fuzzy, risco_array, sem_regra = decisao
+    lista_severidade_pid = np.asarray(entradas_fuzzy['severidade_pid'])
+    lista_pitch_medio = np.asarray(entradas_fuzzy['pitch_medio'])
+    lista_prox_v_terminal = np.asarray(entradas_fuzzy['proximidade_v_terminal'])
 
-    # --- INICIALIZAR MEMÓRIAS (DEQUES) ANTES DO LOOP ---
-    num_amostras_pitch_medio = int(p.tempo_persistencia_pitch / dt_constante)
-    if num_amostras_pitch_medio < 1: num_amostras_pitch_medio = 1 # Garantia mínima
-    historico_pitch_tendencia = deque(maxlen=num_amostras_pitch_medio)
-    
-    risco_anterior = 0.0
+    # --- C. ALIMENTAR O CÉREBRO FUZZY ---
+    # (o rastro das regras sai junto da inferência, para o debug do flicker)
+    rastro = None
+    if decisao is None:
+        if (p.motor_fuzzy if motor is None else motor) in MOTORES_COM_RASTRO:
+            rastro = RastroRegras(tempo)
+        risco_array, sem_regra = calcular_risco(p, entradas_fuzzy, motor, rastro=rastro)
+    risco_calculado_fuzzy = np.asarray(risco_array)
+    flickers = set(indices_flicker(p, risco_calculado_fuzzy, sem_regra).tolist())
+    if flickers and rastro is None:
+        # Risco do cache ou de um motor sem rastro: refaz a inferência só pelo rastro
+        rastro = rastrear_entradas(p, entradas_fuzzy, tempo)[2]
 
-    # --- INÍCIO DO LOOP PRINCIPAL ---
+    # --- D. DEBUGAR O "FLICKER" E AS AMOSTRAS SEM REGRA ---
     for i in range(len(tempo)):
-        
-        # --- 1. LER DADOS ATUAIS ---
-        pitch_atual = dados_sensores['pitch_sensor_giro'][i]
-        altitude_atual = dados_sensores['altitude_gnss'][i]
-        tempo_atual = tempo[i]
-        velocidade_atual_filtrada = dados_sensores['velocidade_filtrada_gnss'][i] # <-- Pego aqui
-        
-        # --- 2. ATUALIZAR O PID ---
-        #    (O PID é ATUALIZADO, não recriado)
-        #    Ele recebe a velocidade ATUAL e o dt
-        severidade_atual = pid_controller_severidade(velocidade_atual_filtrada, dt=dt_constante)
-        lista_severidade_pid.append(severidade_atual) # Salva o resultado
-
-        # --- 3. CALCULAR MÉDIA DO PITCH ---
-        historico_pitch_tendencia.append(pitch_atual)
-        
-        pitch_medio_recente = pitch_atual # Default
-        if len(historico_pitch_tendencia) == num_amostras_pitch_medio:
-             pitch_medio_recente = np.mean(historico_pitch_tendencia) 
-
-        # --- 4. CÁLCULO DA PROXIMIDADE V-TERMINAL ---
-        velocidade_atual_abs = abs(velocidade_atual_filtrada)
-        v_terminal_abs = abs(p.v_terminal) 
-
-        prox_v_terminal = 0.0 # Default seguro
-        if v_terminal_abs > 0.1: # Evita divisão por zero
-            prox_v_terminal = min(velocidade_atual_abs / v_terminal_abs, 1.0)
-
-
-        # --- 5. SALVAR VALORES PARA RELATÓRIO ---
-        lista_pitch_medio.append(pitch_medio_recente)
-        lista_prox_v_terminal.append(prox_v_terminal)
-              
-        # --- 6. ALIMENTAR O CÉREBRO FUZZY ---
-        simulador_risco.input['severidade_pid'] = severidade_atual # <-- REATIVADO
-        simulador_risco.input['altitude'] = altitude_atual
-        simulador_risco.input['aceleracao_vertical'] = dados_sensores['aceleracao_imu'][i]
-        simulador_risco.input['pitch_medio'] = pitch_medio_recente
-        simulador_risco.input['proximidade_v_terminal'] = prox_v_terminal
-    
-        # --- 7. COMPUTAR, SALVAR SAÍDA E DEBUGAR O "FLICKER" ---
-        try: 
-            simulador_risco.compute()
-            risco_atual = simulador_risco.output['risco_de_queda']
-            risco_calculado_fuzzy.append(risco_atual)
-            
-            # --- DEBUG V2.0 (POR QUE AS REGRAS 'ALTO' FALHAM?) ---
-            if (risco_atual < p.limiar_reset_timer and risco_anterior > p.limiar_disparo_risco):
-                
-                # Calcular pertinências
-                pert_pitch_neutro = fuzz.interp_membership(
-                    pitch_medio.universe, pitch_medio['Neutro_Medio'].mf, pitch_medio_recente
-                )
-                pert_sev_critico = fuzz.interp_membership(
-                    sev_pid.universe, sev_pid['Crítico'].mf, severidade_atual # <-- USA O VALOR ATUAL
-                )
-                pert_prox_v_alta = fuzz.interp_membership(
-                    proximidade_v_terminal.universe, proximidade_v_terminal['Alta'].mf, prox_v_terminal
-                )
-
-                # Imprime o relatório da "falha"
-                print("\n--- DEBUG DO \"FLICKER\" (FALHA 'ALTO') DETECTADO! ---")
-                print(f"Instante: t={tempo[i]:.2f}s")
-                print(f"RISCO DESPENCOU: {risco_anterior:.2f} -> {risco_atual:.2f}\n")
-                
-                print("--- ANÁLISE DOS INPUTS (O que oscilou?) ---")
-                print(f"Input 'Severidade PID': {severidade_atual:.2f}\n")
-                
-                print("--- PERTINÊNCIA (Nível de 'Verdade' das regras 'ALTO') ---")
-                print(f"regra_flat_spin:")
-                print(f"  ...Pertinência 'Pitch é Neutro': {pert_pitch_neutro:.2%}")
-                print(f"regra_v_terminal:")
-                print(f"  ...Pertinência 'Proximidade V-Term é Alta': {pert_prox_v_alta:.2%}")
-                print(f"  ...Pertinência 'Severidade PID é Crítico': {pert_sev_critico:.2%}")
-                print("---------------------------------------------------\n")
-
-            risco_anterior = risco_atual # Atualiza a memória para o próximo passo
-
-        except KeyError: 
+        if sem_regra[i]:
             print(f"--- ALERTA FUZZY ---")
             print(f"Nenhuma regra ativada no instante t={tempo[i]:.2f}s.")
             print(f"Assumindo Risco = 0 (seguro) para este instante.")
-            risco_calculado_fuzzy.append(0)
-            risco_anterior = 0.0 # Reseta a memória em caso de erro
+            continue
+
+        # --- DEBUG V2.0 (POR QUE AS REGRAS 'ALTO' FALHAM?) ---
+        if i in flickers:
+            risco_anterior = float(risco_calculado_fuzzy[i - 1])
+            risco_atual = float(risco_calculado_fuzzy[i])
+
+            # Pertinências e forças das regras: lidas do rastro da inferência
+            pert_pitch_neutro = rastro.pertinencia('pitch_medio', 'Neutro_Medio')[i]
+            pert_sev_critico = rastro.pertinencia('severidade_pid', 'Crítico')[i]
+            pert_prox_v_alta = rastro.pertinencia('proximidade_v_terminal', 'Alta')[i]
+
+            # Imprime o relatório da "falha"
+            print("\n--- DEBUG DO \"FLICKER\" (FALHA 'ALTO') DETECTADO! ---")
+            print(f"Instante: t={tempo[i]:.2f}s")
+            print(f"RISCO DESPENCOU: {risco_anterior:.2f} -> {risco_atual:.2f}\n")
+            
+            print("--- ANÁLISE DOS INPUTS (O que oscilou?) ---")
+            print(f"Input 'Severidade PID': {lista_severidade_pid[i]:.2f}\n")
+            
+            print("--- PERTINÊNCIA (Nível de 'Verdade' das regras 'ALTO') ---")
+            print(f"regra_flat_spin:")
+            print(f"  ...Pertinência 'Pitch é Neutro': {pert_pitch_neutro:.2%}")
+            print(f"regra_v_terminal:")
+            print(f"  ...Pertinência 'Proximidade V-Term é Alta': {pert_prox_v_alta:.2%}")
+            print(f"  ...Pertinência 'Severidade PID é Crítico': {pert_sev_critico:.2%}")
+
+            print("--- FORÇA DAS REGRAS (amostra anterior -> agora) ---")
+            for regra, forca_anterior, forca_atual in zip(rastro.regras, rastro.forcas[i - 1], rastro.forcas[i]):
+                print(f"  {regra}: {forca_anterior:.2%} -> {forca_atual:.2%}")
+            print("---------------------------------------------------\n")
     
     #print("Processamento Fuzzy concluído.")
     
-    # --- 8. RETORNAR RESULTADOS ---
+    # --- E. RETORNAR RESULTADOS ---
     return (risco_calculado_fuzzy, 
             lista_severidade_pid, # <-- RETORNO NOVO
-            lista_pitch_medio, lista_prox_v_terminal, fuzzy_vars, fuzzy_defs)
\ No newline at end of file
+            lista_pitch_medio, lista_prox_v_terminal, fuzzy_vars, fuzzy_defs)
+
+class TimerDisparo:
+    """
+    Timer de disparo com HISTERESE, uma amostra por vez.
+    Ativa quando Risco > limiar_disparo_risco, só reseta quando
+    Risco < limiar_reset_timer, e dispara quando o timer chega a
+    tempo_minimo_disparo. (Usado por calcular_disparo e pelo detector
+    em tempo real, detector.py.)
+    """
+
+    def __init__(self, p, dt):
+        self.limiar_disparo = p.limiar_disparo_risco
+        self.limiar_reset = p.limiar_reset_timer
+        self.tempo_minimo = p.tempo_minimo_disparo
+        self.dt = dt
+        self.reiniciar()
+
+    def reiniciar(self):
+        self.contador = 0.0
+        self.ativo = False
+
+    @property
+    def disparou(self):
+        return self.contador >= self.tempo_minimo
+
+    def step(self, risco_atual):
+        """
+        Avança o timer com o risco de UMA amostra. Devolve a transição
+        ocorrida ("ativado", "resetado" ou None); o disparo é lido em
+        self.disparou.
+        """
+        evento = None
+
+        # CONDIÇÃO DE ATIVAÇÃO: Risco > 85
+        if risco_atual > self.limiar_disparo:
+            self.contador += self.dt
+            if not self.ativo:
+                evento = "ativado"
+            self.ativo = True
+
+        # CONDIÇÃO DE RESET: Risco < 80 (o limiar de histerese)
+        elif risco_atual < self.limiar_reset:
+            if self.ativo:
+                evento = "resetado"
+            self.contador = 0.0
+            self.ativo = False
+
+        else: # Risco está na "zona segura" (entre 80 e 85)
+            if self.ativo:
+                # O timer já estava rodando? Continua rodando!
+                self.contador += self.dt
+
+        return evento
+
+
+def calcular_disparo(p, tempo, risco_calculado_fuzzy):
+    """
+    Timer de disparo com HISTERESE (sem prints, sem gráficos), aplicado
+    à série inteira (ver TimerDisparo).
+
+    Devolve um dict com:
+      'disparado' (bool), 'i_disparo' (-1 se não disparou),
+      't_disparo' (nan se não disparou), 'contador' (timer no fim) e
+      'eventos': lista de (tipo, i, risco) com tipo em
+      "ativado", "resetado" ou "disparo" (para o relatório de debug).
+    """
+    timer = TimerDisparo(p, tempo[1] - tempo[0])
+    eventos = []
+
+    for i in range(len(risco_calculado_fuzzy)):
+        risco_atual = float(risco_calculado_fuzzy[i])
+        evento = timer.step(risco_atual)
+        if evento is not None:
+            eventos.append((evento, i, risco_atual))
+
+        if timer.disparou:
+            eventos.append(("disparo", i, risco_atual))
+            return {'disparado': True, 'i_disparo': i, 't_disparo': tempo[i],
+                    'contador': timer.contador, 'eventos': eventos}
+
+    return {'disparado': False, 'i_disparo': -1, 't_disparo': np.nan,
+            'contador': timer.contador, 'eventos': eventos}
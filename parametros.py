@@ -14,19 +14,13 @@ class Parametros:
         self.C_d = 0.8        # Coeficiente de arrasto (adimensional)
         self.A = 0.5          # Área de referência (m^2)
 
-        # --- CÁLCULO AUTOMÁTICO DA VELOCIDADE TERMINAL ---
-        # v_t = sqrt( (2 * m * g) / (rho * A * C_d) )
-        # Usamos -np.sqrt(...) porque é uma velocidade de queda (negativa)
-        try:
-            self.v_terminal = -np.sqrt( (2 * self.m * self.g) / (self.rho * self.A * self.C_d) )
-        except ZeroDivisionError:
-            self.v_terminal = -100.0 # Valor de segurança
-        # --- FIM DO CÁLCULO ---
+        # (v_terminal é calculada a partir destes, ver a propriedade abaixo)
 
         # --- CONDIÇÕES INICIAIS DA SIMULAÇÃO ---
         self.altitude_inicial = 1000.0
         self.velocidade_inicial_padrao = 0.0
         self.tempo_simulacao_max = 60 # segundos
+        self.n_pontos_saida = 500 # pontos da grade de saída (linspace até o fim da rodada)
         
         # --- PARÂMETROS ESPECÍFICOS DE FÍSICA ---
         # Para Cenário de Pouso
@@ -36,6 +30,21 @@ class Parametros:
         self.K_nivelado_vel = 150.0
         # Força das rajadas de turbulência (em Newtons)
         self.forca_rajada_turbulencia = 50.0 # Newtons (ex: 50N para cima ou para baixo)
+        # Modelo das rajadas (ver rajadas.py):
+        #   "ou" -> série Ornstein-Uhlenbeck gerada uma vez e interpolada
+        #   "ruido_branco" -> original, um sorteio novo a cada avaliação da EDO
+        self.modelo_rajada = "ou"
+        self.tempo_correlacao_rajada = 0.5 # s (quanto tempo uma rajada "dura")
+        self.dt_rajada = 0.05 # s (resolução da série de rajadas)
+        # Queda só com peso + arrasto (Cenários 1 e 4): usa a solução
+        # fechada (tanh / log cosh) em vez do solve_ivp. False força a EDO.
+        self.fisica_analitica = True
+
+        # --- PARAQUEDAS (co-simulação, ver cosimulacao.py) ---
+        self.C_d_paraquedas = 1.5  # Coeficiente de arrasto do velame aberto
+        self.A_paraquedas = 2.0    # Área do velame (m^2)
+        self.tempo_abertura_paraquedas = 0.5 # s do acionamento até o velame cheio
+        self.tempo_max_descida_paraquedas = 600.0 # s (limite da descida após o disparo)
 
         # --- PARÂMETROS DOS SENSORES (RUÍDO, BIAS, FILTRO) ---
         self.taxa_atualizacao_gnss = 5.0 # Hz
@@ -44,6 +53,14 @@ class Parametros:
         self.bias_acel = 0.02          # m/s^2
         self.sigma_ruido_giro = 0.5    # graus
         self.tamanho_janela_filtro = 25  # pontos
+        # Velocidade vertical usada pela decisão (ver estimador.py):
+        #   "media_movel" -> derivada do GNSS + média de tamanho_janela_filtro pontos
+        #   "kalman" -> fusão GNSS + IMU (Kalman), estima também o bias do acelerômetro
+        self.estimador_velocidade = "media_movel"
+        self.kalman_sigma_acel = 0.2    # m/s^2 (ruído de processo: IMU + erro de modelo)
+        self.kalman_sigma_bias = 0.001  # m/s^2/sqrt(s) (deriva do bias)
+        self.kalman_sigma_velocidade_inicial = 50.0 # m/s (velocidade inicial desconhecida, começa em 0)
+        self.kalman_sigma_bias_inicial = 0.05      # m/s^2
 
         # --- PARÂMETROS DE ANÁLISE TEMPORAL ---
         self.tempo_analise_altitude = 5.0 # Segundos
@@ -59,7 +76,34 @@ class Parametros:
         self.limiar_disparo_risco = 85.0 # Risco > 85
         self.limiar_reset_timer = 80.0 # --- NOVO PARÂMETRO DE HISTERESE ---
         self.tempo_minimo_disparo = 2.0  # por 2 segundos
-        
+        # Motor de inferência: "vetorizado" (série inteira de uma vez),
+        # "analitico" (idem, triângulos e centroide em forma fechada),
+        # "tabela" (superfície pré-calculada + interpolação multilinear)
+        # ou "skfuzzy" (original, um compute() por amostra)
+        self.motor_fuzzy = "vetorizado"
+        # Superfície tabelada: pedaços por intervalo entre quebras das MFs
+        # (6 -> ~460 mil nós) e pasta do cache. Erro contra a inferência
+        # exata (superficie_risco.relatorio_validacao), em pontos de risco:
+        #   cenários (5 x 20 sementes): RMS 0.14, p99 0.4, MÁXIMO ~9;
+        #   entradas uniformes:         RMS 0.42, p99 1.1, MÁXIMO ~14-17.
+        # Perto dos limiares (risco exato entre 75 e 90) o máximo fica em
+        # ~4.6 nos cenários (~8.7 uniformes): o disparo do "tabela" pode
+        # sair alguns pontos adiantado ou atrasado em relação ao exato.
+        # (a mesma pasta guarda o motor vetorizado compilado; caminho
+        # relativo = relativo à pasta do projeto, não ao diretório de trabalho)
+        self.superficie_subdivisoes = 6
+        self.superficie_diretorio_cache = ".cache_superficie_risco"
+        # Cache das etapas física/sensores/decisão (ver cache_etapas.py),
+        # só para rodadas com semente. Diretório None = só na memória.
+        # Desligado nas rodadas headless (campanhas, benchmarks): o
+        # rodar_simulacao_completa (notebook) liga por conta própria.
+        self.cache_etapas = False
+        self.cache_etapas_max_itens = 32
+        self.cache_etapas_diretorio = None # ex.: ".cache_etapas" (arquivos .npz)
+        # Precisão das séries do ResultadoSimulacao (ver resultado.py):
+        # "float32" guarda com metade da memória; as contas seguem em float64
+        self.dtype_resultado = "float64"
+
         # --- PARÂMETROS DO CENÁRIO ESPECÍFICO ---
         # (Estes serão SOBRESCRITOS pelas funções abaixo)
         self.cenario_nome = "Default"
@@ -69,6 +113,24 @@ class Parametros:
         self.tempo_inicio_turbulencia = 0.0
         self.duracao_turbulencia = 0.0
         self.amplitude_pitch_turbulencia = 0.0
+        # Gabarito (avaliação do gatilho, ver gatilho.py): o paraquedas
+        # DEVERIA abrir? E a partir de quando conta a latência de detecção
+        # (a física já cai desde t = 0; a Queda LOC-I conta do mergulho)
+        self.disparo_esperado = False
+        self.tempo_inicio_falha = 0.0
+
+    # --- CÁLCULO AUTOMÁTICO DA VELOCIDADE TERMINAL ---
+    # Propriedade (e não um campo fixado no __init__): mudar m, C_d, A...
+    # depois de criar o Parametros (ex.: sensibilidade.py) atualiza a v_t.
+    @property
+    def v_terminal(self):
+        # v_t = sqrt( (2 * m * g) / (rho * A * C_d) )
+        # Usamos -np.sqrt(...) porque é uma velocidade de queda (negativa)
+        try:
+            return -np.sqrt( (2 * self.m * self.g) / (self.rho * self.A * self.C_d) )
+        except ZeroDivisionError:
+            return -100.0 # Valor de segurança
+    # --- FIM DO CÁLCULO ---
 
 
 # --- FUNÇÕES GERADORAS DE CENÁRIO ---
@@ -80,6 +142,8 @@ def get_cenario_1_queda():
     p.cenario_nome = "Cenário 1: Queda LOC-I"
     p.tempo_inicio_mergulho = 2.0
     p.pitch_mergulho_graus = -45.0
+    p.disparo_esperado = True
+    p.tempo_inicio_falha = p.tempo_inicio_mergulho  # a latência conta do início do mergulho
     
     return p
 
@@ -118,6 +182,7 @@ def get_cenario_4_flat_spin():
     p.tempo_inicio_turbulencia = 0.0
     p.duracao_turbulencia = 0.0 # <-- Duração zero = sem oscilação
     p.amplitude_pitch_turbulencia = 0.0
+    p.disparo_esperado = True
 
     return p
 
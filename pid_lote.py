@@ -0,0 +1,110 @@
+# 📄 pid_lote.py
+# PID da severidade para MUITAS rodadas de uma vez, com dt fixo.
+# Reproduz o simple_pid.PID (2.x) como ele é usado no pipeline:
+# setpoint 0, proporcional sobre o erro, derivada sobre a medida,
+# saída e integral limitadas a output_limits (anti-windup), e o
+# "congelamento" do sample_time quando dt < sample_time.
+#
+# Só a integral tem memória com recorte (I_t = clip(I_{t-1} + Ki*e_t*dt));
+# ela anda amostra por amostra, mas com as N rodadas em cada passo.
+# P e D saem da série inteira de uma vez. As contas seguem a mesma
+# ordem do simple_pid, então o resultado é idêntico bit a bit.
+
+import numpy as np
+
+# sample_time padrão do simple_pid.PID (o usado em calcular_entradas_fuzzy)
+SAMPLE_TIME_SIMPLE_PID = 0.01
+# Até quantas rodadas a integral anda em floats do Python (uma por vez):
+# com poucas linhas, o custo por chamada do numpy domina o passo do lote
+LINHAS_LACO_ESCALAR = 16
+
+
+def _integral_escalar(incrementos, minimo, maximo):
+    """Integral com recorte de UMA rodada, em floats (mesmas contas do lote)."""
+    integral = []
+    acumulado = 0.0
+    for incremento in incrementos:
+        acumulado += incremento
+        if minimo is not None and acumulado < minimo:
+            acumulado = minimo
+        elif maximo is not None and acumulado > maximo:
+            acumulado = maximo
+        integral.append(acumulado)
+    return integral
+
+
+def pid_lote(entrada, dt, Kp, Ki, Kd, setpoint=0.0, limites=(0, 100), sample_time=SAMPLE_TIME_SIMPLE_PID):
+    """
+    Saída do PID para entrada (T,) ou (N, T), amostrada a cada 'dt'
+    segundos. Cada linha é um PID independente, começando do zero
+    (integral inicial 0, como starting_output=0 no simple_pid).
+    limites: (mínimo, máximo) da saída e da integral; None = sem limite.
+    sample_time: como no simple_pid: se dt < sample_time, a saída fica
+    presa no primeiro valor. None desliga.
+    Devolve um array do formato de 'entrada'.
+    """
+    entrada = np.asarray(entrada, dtype=float)
+    serie = np.atleast_2d(entrada)
+    minimo, maximo = limites
+
+    erro = setpoint - serie
+    proporcional = Kp * erro
+    incremento = Ki * erro * dt
+    variacao_entrada = np.zeros_like(serie)
+    variacao_entrada[:, 1:] = serie[:, 1:] - serie[:, :-1]
+    derivativo = -Kd * variacao_entrada / dt
+
+    if serie.shape[0] <= LINHAS_LACO_ESCALAR:
+        integral = np.array([_integral_escalar(linha, minimo, maximo) for linha in incremento.tolist()])
+    else:
+        integral = np.empty_like(serie)
+        acumulado = np.zeros(serie.shape[0])
+        for t in range(serie.shape[1]):
+            np.add(acumulado, incremento[:, t], out=acumulado)
+            np.clip(acumulado, minimo, maximo, out=acumulado)
+            integral[:, t] = acumulado
+
+    saida = proporcional + integral + derivativo
+    np.clip(saida, minimo, maximo, out=saida)
+    if sample_time is not None and dt < sample_time:
+        saida[:, 1:] = saida[:, :1]
+    return saida.reshape(entrada.shape)
+
+
+def severidade_pid(p, dt, velocidade_filtrada):
+    """Severidade (0 a 100) do pipeline: pid_lote com os ganhos PID_* de 'p'."""
+    return pid_lote(velocidade_filtrada, dt, p.PID_Kp, p.PID_Ki, p.PID_Kd)
+
+
+def verificar_paridade(fabricas=None, sementes=range(3)):
+    """
+    Compara pid_lote (todas as rodadas num lote (N, T)) com um
+    simple_pid.PID por rodada, chamado amostra a amostra, nas
+    velocidades filtradas dos cenários. Também testa dt < sample_time
+    (subamostrando o tempo). Devolve a maior diferença absoluta (0.0 =
+    idêntico bit a bit).
+    """
+    from simple_pid import PID
+
+    import parametros as params
+    from simulador_core import rodar_simulacao_headless
+
+    if fabricas is None:
+        fabricas = (params.get_cenario_1_queda, params.get_cenario_2_pouso,
+                    params.get_cenario_3_turbulencia, params.get_cenario_4_flat_spin,
+                    params.get_cenario_5_pouso_turbulencia)
+
+    p = fabricas[0]()
+    velocidades = np.array([rodar_simulacao_headless(fabrica(), semente).velocidade_filtrada_gnss
+                            for fabrica in fabricas for semente in sementes])
+    resultado = rodar_simulacao_headless(p, sementes[0])
+    dt_pipeline = resultado.tempo[1] - resultado.tempo[0]
+
+    maior_diferenca = 0.0
+    for dt in (dt_pipeline, 0.004):
+        lote = severidade_pid(p, dt, velocidades)
+        for linha, velocidade in zip(lote, velocidades):
+            pid = PID(p.PID_Kp, p.PID_Ki, p.PID_Kd, setpoint=0.0, output_limits=(0, 100))
+            referencia = np.array([pid(v, dt=dt) for v in velocidade])
+            maior_diferenca = max(maior_diferenca, float(np.max(np.abs(linha - referencia))))
+    return maior_diferenca
@@ -0,0 +1,103 @@
+# 📄 rajadas.py
+# Modelo de rajadas de turbulência.
+# Em vez de sortear uma força nova a CADA avaliação da EDO (o que deixa
+# o lado direito descontínuo e não reprodutível), a série de rajadas é
+# gerada UMA vez por rodada e a EDO só interpola essa série.
+
+import math
+
+import numpy as np
+
+
+class CampoRajada:
+    """
+    Série de força de rajada (N) amostrada numa grade uniforme
+    t = 0, dt, 2dt, ... e interpolada linearmente entre as amostras.
+    Fora da série, mantém o valor da ponta.
+    """
+
+    def __init__(self, dt, valores):
+        self.dt = dt
+        self.valores = np.asarray(valores, dtype=float)
+        self._lista = self.valores.tolist()  # acesso rápido no caso escalar
+        self._ultimo = len(self._lista) - 1
+
+    @property
+    def tempos(self):
+        return np.arange(len(self.valores)) * self.dt
+
+    def __call__(self, t):
+        """Força no instante t (float). Usado dentro da EDO escalar."""
+        posicao = t / self.dt
+        if posicao <= 0.0:
+            return self._lista[0]
+        i = int(posicao)
+        if i >= self._ultimo:
+            return self._lista[self._ultimo]
+        fracao = posicao - i
+        return self._lista[i] + fracao * (self._lista[i + 1] - self._lista[i])
+
+    def amostrar(self, t):
+        """Força em vários instantes (array)."""
+        return np.interp(t, self.tempos, self.valores)
+
+
+def n_amostras_rajada(p, duracao=None):
+    """Quantas amostras (e sorteios normais) gerar_rajadas usa para 'duracao' segundos."""
+    if duracao is None:
+        duracao = p.tempo_simulacao_max
+    return int(math.ceil(duracao / p.dt_rajada)) + 2  # +1 ponta final, +1 de folga
+
+
+def gerar_rajadas(p, rng, duracao=None):
+    """
+    Gera a série de rajadas de uma rodada: um processo de
+    Ornstein-Uhlenbeck (ruído branco passado por um filtro passa-baixas
+    de 1ª ordem) com:
+      - desvio-padrão p.forca_rajada_turbulencia / 3 (o mesmo do sorteio
+        original, então a "força típica" das rajadas não muda);
+      - tempo de correlação p.tempo_correlacao_rajada;
+      - amostragem p.dt_rajada.
+    Usa a discretização exata do processo, então o resultado não depende
+    do passo do integrador. rng: np.random.Generator (ou o np.random global).
+    """
+    dt = p.dt_rajada
+    n = n_amostras_rajada(p, duracao)
+
+    sigma = p.forca_rajada_turbulencia / 3
+    phi = math.exp(-dt / p.tempo_correlacao_rajada)
+    ruido = rng.normal(0.0, 1.0, n)
+
+    valores = np.empty(n)
+    valores[0] = sigma * ruido[0]  # começa já no regime estacionário
+    escala = sigma * math.sqrt(1.0 - phi * phi)
+    for k in range(1, n):
+        valores[k] = phi * valores[k - 1] + escala * ruido[k]
+
+    return CampoRajada(dt, valores)
+
+
+def estender_rajadas(campo, p, rng, duracao):
+    """
+    Continua a série 'campo' (mesmo processo de Ornstein-Uhlenbeck, a
+    partir da última amostra) até cobrir 'duracao' segundos. Usado na
+    descida com paraquedas, que pode ir além de p.tempo_simulacao_max.
+    Devolve um CampoRajada novo (ou o próprio 'campo', se já cobre).
+    """
+    dt = campo.dt
+    n = int(math.ceil(duracao / dt)) + 2
+    n_atual = len(campo.valores)
+    if n <= n_atual:
+        return campo
+
+    sigma = p.forca_rajada_turbulencia / 3
+    phi = math.exp(-dt / p.tempo_correlacao_rajada)
+    escala = sigma * math.sqrt(1.0 - phi * phi)
+    ruido = rng.normal(0.0, 1.0, n - n_atual)
+
+    valores = np.empty(n)
+    valores[:n_atual] = campo.valores
+    for k in range(n_atual, n):
+        valores[k] = phi * valores[k - 1] + escala * ruido[k - n_atual]
+
+    return CampoRajada(dt, valores)
@@ -0,0 +1,179 @@
+# 📄 rastro_regras.py
+# Rastro da inferência fuzzy, amostra a amostra: a força de disparo de
+# cada regra (regras_fuzzy.definir_regras) e a pertinência de cada termo
+# de entrada. Serve para ver POR QUE o risco se move entre dois
+# instantes, não só no "flicker".
+#
+# O rastro é um subproduto da inferência: os motores "vetorizado" e
+# "analitico" recebem o RastroRegras em calcular(..., rastro=) e copiam
+# para ele as pertinências e ativações que já calcularam em cada bloco.
+# Os arrays são pré-alocados, (T, n_regras) e (T, n_termos), em ordem
+# de coluna (cada cópia do bloco é contígua na memória).
+# Ligar: rodar_simulacao_headless(p, semente, rastrear=True) -> resultado.rastro.
+
+import numpy as np
+
+# Motores que produzem o rastro durante a inferência ("tabela" não avalia
+# as regras e "skfuzzy" não expõe as ativações)
+MOTORES_COM_RASTRO = ("vetorizado", "analitico")
+
+
+class RastroRegras:
+    """
+    Forças das regras e pertinências dos termos de uma série de T
+    amostras (a ordem achatada das entradas de calcular()).
+      forcas: (T, n_regras), colunas na ordem de 'regras' (rótulos);
+      pertinencias: (T, n_termos), colunas na ordem de 'termos'
+                    ((variável, termo), como no motor vetorizado: os
+                    termos que aparecem em alguma regra, os únicos que
+                    a inferência calcula).
+    Os arrays são alocados pelo motor (preparar) antes do primeiro
+    bloco. tempo (opcional): instantes das amostras, para as consultas
+    por intervalo de tempo (sem ele, t0/t1 são índices de amostra).
+    """
+
+    def __init__(self, tempo=None):
+        self.tempo = None if tempo is None else np.asarray(tempo, dtype=float)
+        self.regras = []
+        self.termos = []
+        self.forcas = np.zeros((0, 0))
+        self.pertinencias = np.zeros((0, 0))
+
+    def __len__(self):
+        return self.forcas.shape[0]
+
+    def preparar(self, sistema, n_amostras):
+        """
+        Aloca os arrays para a inferência de 'n_amostras' do motor
+        compilado 'sistema' (chamado pelo calcular() dos motores).
+        """
+        if self.tempo is not None and len(self.tempo) != n_amostras:
+            raise ValueError(f"Rastro com {len(self.tempo)} instantes para uma inferência de {n_amostras}")
+        self.regras = [rotulo for rotulo, *_ in sistema.regras]
+        self.termos = [(rotulo, termo) for rotulo, (_, termos) in sistema.antecedentes.items()
+                       for termo in termos]
+        self._coluna_regra = {rotulo: k for k, rotulo in enumerate(self.regras)}
+        self._coluna_termo = {chave: k for k, chave in enumerate(self.termos)}
+        self.forcas = np.zeros((n_amostras, len(self.regras)), order='F')
+        self.pertinencias = np.zeros((n_amostras, len(self.termos)), order='F')
+
+    def gravar(self, inicio, pertinencias, forcas):
+        """
+        Copia um bloco da inferência a partir da amostra 'inicio'.
+        pertinencias: {(variável, termo): (n,)} de fuzzificar();
+        forcas: lista (n,) por regra, de ativacoes().
+        """
+        fim = inicio + len(pertinencias[self.termos[0]])
+        if fim > len(self):
+            raise ValueError(f"Rastro de {len(self)} amostras recebeu o bloco {inicio}:{fim}")
+        for k, chave in enumerate(self.termos):
+            self.pertinencias[inicio:fim, k] = pertinencias[chave]
+        for k, forca in enumerate(forcas):
+            self.forcas[inicio:fim, k] = forca
+
+    # --- CONSULTAS ---
+    def forca(self, regra):
+        """Série (T,) da força de disparo da regra (rótulo, ex.: 'regra_flat_spin')."""
+        return self.forcas[:, self._coluna_regra[regra]]
+
+    def pertinencia(self, variavel, termo):
+        """Série (T,) da pertinência do termo (ex.: ('pitch_medio', 'Neutro_Medio'))."""
+        return self.pertinencias[:, self._coluna_termo[(variavel, termo)]]
+
+    def janela(self, t0=None, t1=None):
+        """
+        Fatia das amostras com t0 <= tempo <= t1 (ou t0 <= índice <= t1
+        sem 'tempo'). None deixa o lado aberto.
+        """
+        if self.tempo is None:
+            inicio = 0 if t0 is None else max(0, int(np.ceil(t0)))
+            fim = len(self) if t1 is None else int(np.floor(t1)) + 1
+            return slice(inicio, fim)
+        inicio = 0 if t0 is None else int(np.searchsorted(self.tempo, t0, side='left'))
+        fim = len(self) if t1 is None else int(np.searchsorted(self.tempo, t1, side='right'))
+        return slice(inicio, fim)
+
+    def ranking_regras(self, t0=None, t1=None):
+        """
+        Regras no intervalo [t0, t1], da mais para a menos dominante.
+        Uma lista de dicts com 'regra', 'fracao_dominante' (fração das
+        amostras com alguma regra ativa em que ela foi a mais forte),
+        'forca_media' e 'forca_max'. Empate na força: vence a regra que
+        vem antes na lista.
+        """
+        forcas = self.forcas[self.janela(t0, t1)]
+        if forcas.shape[0] == 0:
+            return []
+        ativas = forcas.max(axis=1) > 0
+        contagem = np.bincount(forcas[ativas].argmax(axis=1), minlength=len(self.regras))
+        fracao = contagem / max(1, int(ativas.sum()))
+        media = forcas.mean(axis=0)
+        ordem = sorted(range(len(self.regras)), key=lambda k: (-fracao[k], -media[k]))
+        return [{'regra': self.regras[k], 'fracao_dominante': float(fracao[k]),
+                 'forca_media': float(media[k]), 'forca_max': float(forcas[:, k].max())}
+                for k in ordem]
+
+    def regra_dominante(self, t0=None, t1=None):
+        """
+        A regra que dominou entre t0 e t1 (a mais forte no maior número
+        de amostras; ver ranking_regras), ou None se nenhuma regra
+        disparou no intervalo.
+        """
+        ranking = self.ranking_regras(t0, t1)
+        if not ranking or ranking[0]['fracao_dominante'] == 0:
+            return None
+        return ranking[0]['regra']
+
+    def termos_ativos(self, i, minimo=0.01):
+        """{(variável, termo): pertinência} dos termos acima de 'minimo' na amostra i."""
+        linha = self.pertinencias[i]
+        return {chave: float(linha[k]) for k, chave in enumerate(self.termos) if linha[k] > minimo}
+
+    def forcas_amostra(self, i):
+        """{regra: força} na amostra i."""
+        return dict(zip(self.regras, self.forcas[i].tolist()))
+
+
+def rastrear_entradas(p, entradas_fuzzy, tempo=None, motor=None):
+    """
+    Roda a inferência das entradas (ver logica_decisao.calcular_risco)
+    gravando o rastro. Para quando o risco já veio de outro lugar (cache,
+    motor sem rastro) e se quer o rastro mesmo assim.
+    Devolve (risco, sem_regra, rastro).
+    """
+    from logica_decisao import calcular_risco
+
+    if motor is None or motor not in MOTORES_COM_RASTRO:
+        motor = p.motor_fuzzy if p.motor_fuzzy in MOTORES_COM_RASTRO else "vetorizado"
+    rastro = RastroRegras(tempo)
+    risco, sem_regra = calcular_risco(p, entradas_fuzzy, motor, rastro=rastro)
+    return risco, sem_regra, rastro
+
+
+def verificar_rastro(p=None, n_amostras=2000, semente=0):
+    """
+    Confere o rastro gravado pelos dois motores com a avaliação direta
+    (fuzzificar + ativacoes do motor vetorizado) em entradas aleatórias,
+    com blocos menores que a série. Devolve a maior diferença absoluta.
+    """
+    import parametros as params
+    from inferencia_analitica import obter_sistema_analitico
+    from inferencia_vetorizada import obter_sistema_vetorizado
+
+    if p is None:
+        p = params.Parametros()
+    sistema = obter_sistema_vetorizado(p)
+    rng = np.random.default_rng(semente)
+    entradas = {rotulo: rng.uniform(universo[0] - 5, universo[-1] + 5, n_amostras)
+                for rotulo, (universo, _) in sistema.antecedentes.items()}
+    pertinencias = sistema.fuzzificar(entradas)
+    forcas = np.column_stack([np.broadcast_to(f, (n_amostras,)) for f in sistema.ativacoes(pertinencias)])
+
+    maior_diferenca = 0.0
+    for motor in (sistema, obter_sistema_analitico(p)):
+        rastro = RastroRegras()
+        motor.calcular(entradas, tamanho_bloco=n_amostras // 3 + 1, rastro=rastro)
+        referencia = np.column_stack([pertinencias[chave] for chave in rastro.termos])
+        maior_diferenca = max(maior_diferenca, float(np.max(np.abs(rastro.forcas - forcas))),
+                              float(np.max(np.abs(rastro.pertinencias - referencia))))
+    return maior_diferenca
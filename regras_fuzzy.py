@@ -5,6 +5,20 @@ import skfuzzy as fuzz
 from skfuzzy import control as ctrl
 import numpy as np
 
+# Pontos [a, b, c] de cada fuzz.trimf, por variável (rótulo do skfuzzy)
+# e termo. Usados aqui, no relatório (fuzzy_defs) e pelo motor analítico
+# (inferencia_analitica.py), que trabalha direto com os triângulos.
+TRIANGULOS = {
+    'severidade_pid': {'Suave': [0, 0, 50], 'Moderado': [20, 50, 80], 'Crítico': [60, 100, 100]},
+    'pitch': {'Negativo': [-90, -90, -5], 'Neutro': [-20, 0, 20], 'Positivo': [5, 90, 90]},
+    'altitude': {'Baixa': [0, 0, 300], 'Média': [200, 500, 800], 'Alta': [600, 1000, 1000]},
+    'aceleracao_vertical': {'Leve': [-5, 0, 5], 'Moderada': [-10, -7, -3], 'Acentuada': [-15, -12, -8]},
+    'pitch_medio': {'Negativo_Medio': [-90, -90, -8], 'Neutro_Medio': [-15, 0, 15], 'Positivo_Medio': [8, 90, 90]},
+    'proximidade_v_terminal': {'Baixa': [0.0, 0.0, 0.5], 'Media': [0.3, 0.6, 0.9], 'Alta': [0.6, 1.0, 1.0]}, # Ajustado para [0.6, 1.0, 1.0]
+    'risco_de_queda': {'Baixo': [0, 0, 40], 'Moderado': [20, 50, 80], 'Alto': [70, 100, 100]},
+}
+
+
 def definir_variaveis_fuzzy(p):
     """
     Cria todas as variáveis Fuzzy (Antecedents e Consequents)
@@ -15,58 +29,54 @@ def definir_variaveis_fuzzy(p):
     
     universo_severidade = np.arange(0, 101, 1)
     sev_pid = ctrl.Antecedent(universo_severidade, 'severidade_pid')
-    sev_pid['Suave'] = fuzz.trimf(universo_severidade, [0, 0, 50])
-    sev_pid['Moderado'] = fuzz.trimf(universo_severidade, [20, 50, 80])
-    sev_pid['Crítico'] = fuzz.trimf(universo_severidade, [60, 100, 100])
+    sev_pid['Suave'] = fuzz.trimf(universo_severidade, TRIANGULOS[sev_pid.label]['Suave'])
+    sev_pid['Moderado'] = fuzz.trimf(universo_severidade, TRIANGULOS[sev_pid.label]['Moderado'])
+    sev_pid['Crítico'] = fuzz.trimf(universo_severidade, TRIANGULOS[sev_pid.label]['Crítico'])
 
     universo_pitch = np.arange(-90, 91, 1)
     pitch = ctrl.Antecedent(universo_pitch, 'pitch')
-    pitch['Negativo'] = fuzz.trimf(universo_pitch, [-90, -90, -5])
-    pitch['Neutro'] = fuzz.trimf(universo_pitch, [-20, 0, 20])
-    pitch['Positivo'] = fuzz.trimf(universo_pitch, [5, 90, 90])
+    pitch['Negativo'] = fuzz.trimf(universo_pitch, TRIANGULOS[pitch.label]['Negativo'])
+    pitch['Neutro'] = fuzz.trimf(universo_pitch, TRIANGULOS[pitch.label]['Neutro'])
+    pitch['Positivo'] = fuzz.trimf(universo_pitch, TRIANGULOS[pitch.label]['Positivo'])
 
     universo_altitude = np.arange(0, 1001, 1)
     altitude = ctrl.Antecedent(universo_altitude, 'altitude')
-    altitude['Baixa'] = fuzz.trimf(universo_altitude, [0, 0, 300])
-    altitude['Média'] = fuzz.trimf(universo_altitude, [200, 500, 800])
-    altitude['Alta'] = fuzz.trimf(universo_altitude, [600, 1000, 1000])
+    altitude['Baixa'] = fuzz.trimf(universo_altitude, TRIANGULOS[altitude.label]['Baixa'])
+    altitude['Média'] = fuzz.trimf(universo_altitude, TRIANGULOS[altitude.label]['Média'])
+    altitude['Alta'] = fuzz.trimf(universo_altitude, TRIANGULOS[altitude.label]['Alta'])
 
     universo_acel = np.arange(-15, 6, 1)
     acel_v = ctrl.Antecedent(universo_acel, 'aceleracao_vertical')
-    acel_v['Leve'] = fuzz.trimf(universo_acel, [-5, 0, 5])
-    acel_v['Moderada'] = fuzz.trimf(universo_acel, [-10, -7, -3])
-    acel_v['Acentuada'] = fuzz.trimf(universo_acel, [-15, -12, -8])
+    acel_v['Leve'] = fuzz.trimf(universo_acel, TRIANGULOS[acel_v.label]['Leve'])
+    acel_v['Moderada'] = fuzz.trimf(universo_acel, TRIANGULOS[acel_v.label]['Moderada'])
+    acel_v['Acentuada'] = fuzz.trimf(universo_acel, TRIANGULOS[acel_v.label]['Acentuada'])
 
     universo_pitch_medio = np.arange(-90, 91, 1)
     pitch_medio = ctrl.Antecedent(universo_pitch_medio, 'pitch_medio')
-    pitch_medio['Negativo_Medio'] = fuzz.trimf(universo_pitch_medio, [-90, -90, -8])
-    pitch_medio['Neutro_Medio'] = fuzz.trimf(universo_pitch_medio, [-15, 0, 15])
-    pitch_medio['Positivo_Medio'] = fuzz.trimf(universo_pitch_medio, [8, 90, 90])
+    pitch_medio['Negativo_Medio'] = fuzz.trimf(universo_pitch_medio, TRIANGULOS[pitch_medio.label]['Negativo_Medio'])
+    pitch_medio['Neutro_Medio'] = fuzz.trimf(universo_pitch_medio, TRIANGULOS[pitch_medio.label]['Neutro_Medio'])
+    pitch_medio['Positivo_Medio'] = fuzz.trimf(universo_pitch_medio, TRIANGULOS[pitch_medio.label]['Positivo_Medio'])
 
     # --- PROXIMIDADE DA VELOCIDADE TERMINAL ---
     universo_prox_v_term = np.arange(0, 1.01, 0.01) # (Um ratio de 0.0 a 1.0)
     proximidade_v_terminal = ctrl.Antecedent(universo_prox_v_term, 'proximidade_v_terminal')
     
-    proximidade_v_terminal['Baixa'] = fuzz.trimf(universo_prox_v_term, [0.0, 0.0, 0.5])
-    proximidade_v_terminal['Media'] = fuzz.trimf(universo_prox_v_term, [0.3, 0.6, 0.9])
-    proximidade_v_terminal['Alta'] = fuzz.trimf(universo_prox_v_term, [0.6, 1.0, 1.0]) # Ajustado para [0.6, 1.0, 1.0]
+    proximidade_v_terminal['Baixa'] = fuzz.trimf(universo_prox_v_term, TRIANGULOS[proximidade_v_terminal.label]['Baixa'])
+    proximidade_v_terminal['Media'] = fuzz.trimf(universo_prox_v_term, TRIANGULOS[proximidade_v_terminal.label]['Media'])
+    proximidade_v_terminal['Alta'] = fuzz.trimf(universo_prox_v_term, TRIANGULOS[proximidade_v_terminal.label]['Alta'])
 
     universo_risco = np.arange(0, 101, 1)
     risco_de_queda = ctrl.Consequent(universo_risco, 'risco_de_queda')
-    risco_de_queda['Baixo'] = fuzz.trimf(universo_risco, [0, 0, 40])
-    risco_de_queda['Moderado'] = fuzz.trimf(universo_risco, [20, 50, 80])
-    risco_de_queda['Alto'] = fuzz.trimf(universo_risco, [70, 100, 100])
+    risco_de_queda['Baixo'] = fuzz.trimf(universo_risco, TRIANGULOS[risco_de_queda.label]['Baixo'])
+    risco_de_queda['Moderado'] = fuzz.trimf(universo_risco, TRIANGULOS[risco_de_queda.label]['Moderado'])
+    risco_de_queda['Alto'] = fuzz.trimf(universo_risco, TRIANGULOS[risco_de_queda.label]['Alto'])
 
     # --- PACOTE DE DEFINIÇÕES FUZZY (relatório) ---
-    fuzzy_defs = {
-        'sev_pid': {'Suave': '[0, 0, 50]', 'Moderado': '[20, 50, 80]', 'Crítico': '[60, 100, 100]'},
-        'pitch': {'Negativo': '[-90, -90, -5]', 'Neutro': '[-20, 0, 20]', 'Positivo': '[5, 90, 90]'},
-        'altitude': {'Baixa': '[0, 0, 300]', 'Média': '[200, 500, 800]', 'Alta': '[600, 1000, 1000]'},
-        'acel_v': {'Leve': '[-5, 0, 5]', 'Moderada': '[-10, -7, -3]', 'Acentuada': '[-15, -12, -8]'},
-        'pitch_medio': {'Negativo_Medio': '[-90, -90, -8]', 'Neutro_Medio': '[-15, 0, 15]', 'Positivo_Medio': '[8, 90, 90]'},
-        'risco_de_queda': {'Baixo': '[0, 0, 40]', 'Moderado': '[20, 50, 80]', 'Alto': '[70, 100, 100]'},
-        'proximidade_v_terminal': {'Baixa': '[0.0, 0.0, 0.5]','Media': '[0.3, 0.6, 0.9]','Alta': '[0.6, 1.0, 1.0]'}
-    }
+    apelidos = {'sev_pid': 'severidade_pid', 'pitch': 'pitch', 'altitude': 'altitude',
+                'acel_v': 'aceleracao_vertical', 'pitch_medio': 'pitch_medio',
+                'risco_de_queda': 'risco_de_queda', 'proximidade_v_terminal': 'proximidade_v_terminal'}
+    fuzzy_defs = {apelido: {termo: str(pontos) for termo, pontos in TRIANGULOS[rotulo].items()}
+                  for apelido, rotulo in apelidos.items()}
     # --- FIM DO PACOTE DE DEFINIÇÕES ---
 
     # --- PACOTE DE VARIÁVEIS FUZZY (para o relatório) ---
@@ -90,27 +100,27 @@ def definir_regras(sev_pid,
     # Regra 1: MERGULHO (Pitch Negativo)
     regra_mergulho = ctrl.Rule(
         pitch_medio['Negativo_Medio'] & (proximidade_v_terminal['Alta'] | sev_pid['Crítico']),
-        risco_de_queda['Alto'])
+        risco_de_queda['Alto'], label='regra_mergulho')
 
     # Regra 3: MERGULHO ACELERADO
     regra_emergencia_3 = ctrl.Rule(
-        pitch_medio['Negativo_Medio'] & acel_v['Acentuada'], risco_de_queda['Alto'])
+        pitch_medio['Negativo_Medio'] & acel_v['Acentuada'], risco_de_queda['Alto'], label='regra_emergencia_3')
 
     # Regra 4: REGRA DE SEGURANÇA (BAIXO)
     regra_segura = ctrl.Rule(
         (pitch_medio['Neutro_Medio'] & proximidade_v_terminal['Baixa'] & altitude['Baixa']) |
         pitch_medio['Positivo_Medio'],
-        risco_de_queda['Baixo'])
+        risco_de_queda['Baixo'], label='regra_segura')
 
     # Regra 5: REGRA "PEGA-TUDO" (DEFAULT)
     regra_default_segura = ctrl.Rule(
         (pitch_medio['Neutro_Medio'] | pitch_medio['Positivo_Medio']) & ~sev_pid['Crítico'],
-        risco_de_queda['Baixo'])
+        risco_de_queda['Baixo'], label='regra_default_segura')
 
     # Regra 6: FLAT SPIN (V5.0) - ATUALIZADA
     regra_flat_spin = ctrl.Rule(
         pitch_medio['Neutro_Medio'] & proximidade_v_terminal['Alta'] & sev_pid['Crítico'],
-        risco_de_queda['Alto'])
+        risco_de_queda['Alto'], label='regra_flat_spin')
     
     
     return [regra_mergulho, regra_emergencia_3, regra_segura, regra_default_segura, regra_flat_spin]
\ No newline at end of file
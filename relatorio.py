@@ -0,0 +1,437 @@
+# 📄 relatorio.py
+# Relatório de uma CAMPANHA inteira (muitas rodadas guardadas no
+# armazenamento.py), sem notebook: Markdown, HTML e CSV em arquivos.
+#
+# É o "relatório do instante crítico" do visualizacao.analisar_resultados
+# feito para N rodadas de uma vez:
+#   - instante crítico de cada rodada = o do disparo ou, sem disparo, o
+#     do risco máximo (o mesmo critério de analisar_resultados);
+#   - os valores dos 6 canais nesse instante são lidos do armazém por
+#     indexação (só as amostras pedidas saem do disco);
+#   - as pertinências saem de UM np.interp por termo sobre as N rodadas
+#     (o fuzz.interp_membership de cada termo, vetorizado).
+# O relatório traz as estatísticas de disparo por cenário, a pertinência
+# média no instante crítico e os piores casos.
+
+import csv
+import html
+import os
+
+import numpy as np
+
+from armazenamento import ArmazemResultados
+from estatistica import intervalo_wilson
+from resultado import CANAIS
+
+# Variável fuzzy (apelido de regras_fuzzy) -> (canal do armazém, descrição, formato do valor)
+VARIAVEIS = (
+    ('pitch_medio', 'pitch_medio', 'Pitch Médio', '{:.2f} graus'),
+    ('proximidade_v_terminal', 'proximidade_v_terminal', 'Proximidade V-Terminal', '{:.1%}'),
+    ('sev_pid', 'severidade_pid', 'Severidade PID', '{:.2f}'),
+    ('altitude', 'altitude_gnss', 'Altitude (Bruta)', '{:.2f} m'),
+    ('acel_v', 'aceleracao_imu', 'Aceleração (Bruta)', '{:.2f} m/s^2'),
+    ('risco_de_queda', 'risco', 'SAÍDA: Risco', '{:.2f}'),
+)
+
+# Pertinência mínima para um termo contar como "ativo" (a mesma de analisar_resultados)
+PERTINENCIA_MINIMA = 0.01
+
+# Rodadas lidas do armazém por vez (limita a memória da busca do instante crítico)
+TAMANHO_BLOCO = 4096
+
+
+def _abrir_fonte(fonte):
+    """
+    (armazém, gabarito) a partir de um diretório de armazém, de um
+    ArmazemResultados ou do dict de campanha.rodar_campanha(...,
+    armazem=...). O gabarito (disparo_esperado, t_inicio_falha por
+    posição) só vem no dict da campanha; nos outros casos é None.
+    """
+    if isinstance(fonte, dict):
+        gabarito = {'disparo_esperado': np.asarray(fonte['disparo_esperado']),
+                    't_inicio_falha': np.asarray(fonte['t_inicio_falha'])}
+        return fonte['armazem'], gabarito
+    if isinstance(fonte, ArmazemResultados):
+        return fonte, None
+    return ArmazemResultados.abrir(fonte), None
+
+
+def indices_criticos(armazem, posicoes):
+    """
+    Índice da amostra crítica de cada rodada em 'posicoes': a do disparo
+    (t_disparo do índice) ou, se não disparou, a do risco máximo.
+    """
+    indice = armazem.indice[posicoes]
+    canal_tempo = CANAIS.index('tempo')
+    canal_risco = CANAIS.index('risco')
+    criticos = np.empty(len(posicoes), dtype=np.int64)
+    for inicio in range(0, len(posicoes), TAMANHO_BLOCO):
+        bloco = slice(inicio, inicio + TAMANHO_BLOCO)
+        linhas = posicoes[bloco]
+        disparado = indice['disparado'][bloco]
+        risco = np.asarray(armazem.series[canal_risco, linhas], dtype=float)
+        # NaN não vence o argmax
+        criticos[bloco] = np.argmax(np.where(np.isnan(risco), -np.inf, risco), axis=1)
+        if disparado.any():
+            tempo = np.asarray(armazem.series[canal_tempo, linhas[disparado]], dtype=float)
+            t_disparo = indice['t_disparo'][bloco][disparado]
+            # t_disparo é uma amostra da grade; argmin absorve o arredondamento do float32
+            criticos[bloco][disparado] = np.argmin(np.abs(tempo - t_disparo[:, None]), axis=1)
+    return criticos
+
+
+def valores_criticos(armazem, posicoes, criticos):
+    """{canal: valores (N,) no instante crítico}, dos canais de VARIAVEIS e do tempo."""
+    canais = ['tempo'] + [canal for _, canal, _, _ in VARIAVEIS]
+    return {canal: np.asarray(armazem.series[CANAIS.index(canal), posicoes, criticos], dtype=float)
+            for canal in canais}
+
+
+def pertinencias(fuzzy_vars, valores):
+    """
+    Pertinência de cada termo nos valores do instante crítico.
+    valores: {canal: (N,)}. Devolve {apelido: {termo: (N,)}}.
+    Igual a fuzz.interp_membership termo a termo (zero fora do universo).
+    """
+    saida = {}
+    for apelido, canal, _, _ in VARIAVEIS:
+        variavel = fuzzy_vars[apelido]
+        saida[apelido] = {termo: np.interp(valores[canal], variavel.universe, objeto.mf, left=0.0, right=0.0)
+                          for termo, objeto in variavel.terms.items()}
+    return saida
+
+
+def analisar_campanha(fonte, p=None):
+    """
+    Reúne os dados do relatório de uma campanha guardada.
+
+    fonte: diretório do armazém, ArmazemResultados ou o dict de
+           rodar_campanha(..., armazem=...) (este traz também o
+           gabarito: acertos, falsos disparos e atraso).
+    p: Parametros das definições fuzzy (None = Parametros() padrão;
+       as funções de pertinência não dependem do cenário).
+
+    Devolve um dict com 'rodadas' (arrays alinhados, um por rodada
+    gravada: cenário, semente, disparo, instante crítico, valores e
+    pertinências) e 'cenarios' (nomes), 'fuzzy_defs' e 'com_gabarito'.
+    """
+    import parametros as params
+    from regras_fuzzy import definir_variaveis_fuzzy
+
+    armazem, gabarito = _abrir_fonte(fonte)
+    if p is None:
+        p = params.Parametros()
+    fuzzy_vars, fuzzy_defs = definir_variaveis_fuzzy(p)[:2]
+
+    posicoes = armazem.posicoes()
+    indice = armazem.indice[posicoes]
+    criticos = indices_criticos(armazem, posicoes)
+    valores = valores_criticos(armazem, posicoes, criticos)
+
+    rodadas = {
+        'posicao': posicoes,
+        'indice_cenario': indice['indice_cenario'].astype(int),
+        'semente': indice['semente'].astype(np.int64),
+        'disparado': indice['disparado'].astype(bool),
+        't_disparo': indice['t_disparo'].astype(float),
+        'risco_max': indice['risco_max'].astype(float),
+        'i_critico': criticos,
+        'valores': valores,
+        'pertinencias': pertinencias(fuzzy_vars, valores),
+    }
+    if gabarito is not None:
+        rodadas['disparo_esperado'] = gabarito['disparo_esperado'][posicoes].astype(bool)
+        rodadas['t_inicio_falha'] = gabarito['t_inicio_falha'][posicoes].astype(float)
+    return {'rodadas': rodadas, 'cenarios': list(armazem.cenarios), 'fuzzy_defs': fuzzy_defs,
+            'com_gabarito': gabarito is not None}
+
+
+def estatisticas_cenarios(analise, confianca=0.95):
+    """
+    Uma linha (dict) por cenário: n, taxa de disparo (com intervalo de
+    Wilson), tempo de disparo (média, mediana, p5, p95, máximo), risco
+    máximo (média, máximo) e, com gabarito, acertos, falsos disparos,
+    disparos perdidos e atraso médio (t_disparo - t_inicio_falha).
+    """
+    rodadas = analise['rodadas']
+    linhas = []
+    for i, nome in enumerate(analise['cenarios']):
+        selecao = rodadas['indice_cenario'] == i
+        n = int(selecao.sum())
+        if n == 0:
+            continue
+        disparado = rodadas['disparado'][selecao]
+        t_disparo = rodadas['t_disparo'][selecao][disparado]
+        risco_max = rodadas['risco_max'][selecao]
+        n_disparos = int(disparado.sum())
+        inferior, superior = intervalo_wilson(n_disparos, n, confianca)
+        tem_disparo = t_disparo.size > 0
+        linha = {
+            'cenario': nome, 'n': n, 'disparos': n_disparos, 'taxa_disparo': n_disparos / n,
+            'taxa_inferior': inferior, 'taxa_superior': superior,
+            't_disparo_medio': float(t_disparo.mean()) if tem_disparo else np.nan,
+            't_disparo_mediana': float(np.median(t_disparo)) if tem_disparo else np.nan,
+            't_disparo_p5': float(np.percentile(t_disparo, 5)) if tem_disparo else np.nan,
+            't_disparo_p95': float(np.percentile(t_disparo, 95)) if tem_disparo else np.nan,
+            't_disparo_max': float(t_disparo.max()) if tem_disparo else np.nan,
+            'risco_max_medio': float(risco_max.mean()), 'risco_max_max': float(risco_max.max()),
+        }
+        if analise['com_gabarito']:
+            esperado = rodadas['disparo_esperado'][selecao]
+            atraso = t_disparo - rodadas['t_inicio_falha'][selecao][disparado]
+            linha.update({
+                'acertos': int(np.count_nonzero(disparado == esperado)),
+                'falsos_disparos': int(np.count_nonzero(disparado & ~esperado)),
+                'disparos_perdidos': int(np.count_nonzero(~disparado & esperado)),
+                'atraso_medio': float(np.nanmean(atraso)) if np.isfinite(atraso).any() else np.nan,
+            })
+        linhas.append(linha)
+    return linhas
+
+
+def pertinencia_media(analise):
+    """
+    Por cenário e variável: valor médio no instante crítico e, por
+    termo, pertinência média e fração das rodadas com o termo ativo
+    (> PERTINENCIA_MINIMA). Devolve uma lista de dicts.
+    """
+    rodadas = analise['rodadas']
+    linhas = []
+    for i, nome in enumerate(analise['cenarios']):
+        selecao = rodadas['indice_cenario'] == i
+        if not selecao.any():
+            continue
+        for apelido, canal, descricao, _ in VARIAVEIS:
+            for termo, graus in rodadas['pertinencias'][apelido].items():
+                linhas.append({
+                    'cenario': nome, 'variavel': descricao, 'apelido': apelido,
+                    'valor_medio': float(np.nanmean(rodadas['valores'][canal][selecao])),
+                    'termo': termo, 'faixa': analise['fuzzy_defs'][apelido][termo],
+                    'pertinencia_media': float(graus[selecao].mean()),
+                    'fracao_ativo': float(np.mean(graus[selecao] > PERTINENCIA_MINIMA)),
+                })
+    return linhas
+
+
+def piores_casos(analise, n=10):
+    """
+    Posições (em 'rodadas') dos piores casos:
+      'quase_disparos' -> as n rodadas SEM disparo de maior risco máximo;
+      'disparos_tardios' -> as n rodadas com disparo de maior t_disparo
+                            (com gabarito: maior atraso desde a falha).
+    """
+    rodadas = analise['rodadas']
+    sem_disparo = np.flatnonzero(~rodadas['disparado'])
+    com_disparo = np.flatnonzero(rodadas['disparado'])
+    atraso = rodadas['t_disparo'][com_disparo]
+    if analise['com_gabarito']:
+        atraso = atraso - np.nan_to_num(rodadas['t_inicio_falha'][com_disparo])
+    return {
+        'quase_disparos': sem_disparo[np.argsort(-rodadas['risco_max'][sem_disparo], kind='stable')[:n]],
+        'disparos_tardios': com_disparo[np.argsort(-atraso, kind='stable')[:n]],
+    }
+
+
+def _termos_ativos(analise, apelido, linha):
+    """Termos ativos de uma rodada: "87.0% 'Alto'" separados por '; '."""
+    graus = analise['rodadas']['pertinencias'][apelido]
+    ativos = [f"{graus[termo][linha] * 100:.1f}% '{termo}'" for termo in graus
+              if graus[termo][linha] > PERTINENCIA_MINIMA]
+    return '; '.join(ativos) if ativos else 'Nenhuma'
+
+
+def _numero(valor, formato='{:.2f}'):
+    return '-' if valor is None or (isinstance(valor, float) and np.isnan(valor)) else formato.format(valor)
+
+
+def _tabelas(analise, n_piores):
+    """
+    As tabelas do relatório como (título, cabeçalho, linhas de texto),
+    usadas tanto no Markdown quanto no HTML.
+    """
+    tabelas = []
+
+    cabecalho = ['Cenário', 'N', 'Disparos', 'Taxa (IC 95%)', 't disparo médio (s)',
+                 'mediana', 'p5', 'p95', 'máx.', 'Risco máx. médio', 'Risco máx.']
+    if analise['com_gabarito']:
+        cabecalho += ['Acertos', 'Falsos disparos', 'Disparos perdidos', 'Atraso médio (s)']
+    linhas = []
+    for estatistica in estatisticas_cenarios(analise):
+        linha = [estatistica['cenario'], str(estatistica['n']), str(estatistica['disparos']),
+                 f"{estatistica['taxa_disparo']:.1%} [{estatistica['taxa_inferior']:.1%}, "
+                 f"{estatistica['taxa_superior']:.1%}]"]
+        linha += [_numero(estatistica[chave]) for chave in
+                  ('t_disparo_medio', 't_disparo_mediana', 't_disparo_p5', 't_disparo_p95',
+                   't_disparo_max', 'risco_max_medio', 'risco_max_max')]
+        if analise['com_gabarito']:
+            linha += [str(estatistica['acertos']), str(estatistica['falsos_disparos']),
+                      str(estatistica['disparos_perdidos']), _numero(estatistica['atraso_medio'])]
+        linhas.append(linha)
+    tabelas.append(('Disparos por cenário', cabecalho, linhas))
+
+    # Uma linha por (cenário, variável); só os termos ativos em alguma rodada
+    formatos = {descricao: formato for _, _, descricao, formato in VARIAVEIS}
+    agrupadas = {}
+    for linha in pertinencia_media(analise):
+        chave = (linha['cenario'], linha['variavel'])
+        if chave not in agrupadas:
+            agrupadas[chave] = [linha['cenario'], linha['variavel'],
+                                _numero(linha['valor_medio'], formatos[linha['variavel']]), []]
+        if linha['fracao_ativo'] > 0:
+            agrupadas[chave][3].append(f"{linha['pertinencia_media']:.1%} '{linha['termo']}' "
+                                       f"(Faixa: {linha['faixa']}; ativo em {linha['fracao_ativo']:.0%})")
+    linhas = [celulas[:3] + ['; '.join(celulas[3]) or 'Nenhuma'] for celulas in agrupadas.values()]
+    tabelas.append(('Pertinência no instante crítico (média por cenário)',
+                    ['Cenário', 'Variável', 'Valor médio', 'Pertinência média dos termos (fração das rodadas '
+                     'com o termo ativo)'], linhas))
+
+    rodadas = analise['rodadas']
+    cabecalho = ['Cenário', 'Semente', 't crítico (s)'] + [descricao for _, _, descricao, _ in VARIAVEIS]
+    for chave, titulo in (('quase_disparos', 'Piores casos: maiores riscos sem disparo'),
+                          ('disparos_tardios', 'Piores casos: disparos mais tardios')):
+        linhas = []
+        for linha in piores_casos(analise, n_piores)[chave]:
+            celulas = [analise['cenarios'][rodadas['indice_cenario'][linha]], str(rodadas['semente'][linha]),
+                       _numero(rodadas['valores']['tempo'][linha])]
+            for apelido, canal, _, formato in VARIAVEIS:
+                celulas.append(f"{_numero(rodadas['valores'][canal][linha], formato)} "
+                               f"({_termos_ativos(analise, apelido, linha)})")
+            linhas.append(celulas)
+        tabelas.append((titulo, cabecalho, linhas))
+    return tabelas
+
+
+def relatorio_markdown(analise, n_piores=10):
+    """Relatório da campanha em Markdown (string)."""
+    partes = [f"# Relatório da campanha ({len(analise['rodadas']['posicao'])} rodadas)\n"]
+    for titulo, cabecalho, linhas in _tabelas(analise, n_piores):
+        partes.append(f"\n## {titulo}\n\n")
+        partes.append('| ' + ' | '.join(cabecalho) + ' |\n')
+        partes.append('|' + ' :--- |' * len(cabecalho) + '\n')
+        for linha in linhas:
+            partes.append('| ' + ' | '.join(celula.replace('|', '\\|') for celula in linha) + ' |\n')
+    return ''.join(partes)
+
+
+def relatorio_html(analise, n_piores=10):
+    """Relatório da campanha em HTML (página única, sem dependências)."""
+    titulo_pagina = f"Relatório da campanha ({len(analise['rodadas']['posicao'])} rodadas)"
+    partes = ['<!DOCTYPE html>\n<html lang="pt-BR">\n<head>\n<meta charset="utf-8">\n',
+              f'<title>{html.escape(titulo_pagina)}</title>\n',
+              '<style>body{font-family:sans-serif} table{border-collapse:collapse;margin-bottom:2em}'
+              ' th,td{border:1px solid #999;padding:2px 6px;font-size:90%} th{background:#eee}</style>\n',
+              f'</head>\n<body>\n<h1>{html.escape(titulo_pagina)}</h1>\n']
+    for titulo, cabecalho, linhas in _tabelas(analise, n_piores):
+        partes.append(f'<h2>{html.escape(titulo)}</h2>\n<table>\n<tr>')
+        partes.extend(f'<th>{html.escape(celula)}</th>' for celula in cabecalho)
+        partes.append('</tr>\n')
+        for linha in linhas:
+            partes.append('<tr>' + ''.join(f'<td>{html.escape(celula)}</td>' for celula in linha) + '</tr>\n')
+        partes.append('</table>\n')
+    partes.append('</body>\n</html>\n')
+    return ''.join(partes)
+
+
+def gravar_csv(analise, diretorio):
+    """
+    Grava cenarios.csv (estatisticas_cenarios), pertinencias.csv
+    (pertinencia_media) e rodadas.csv (uma linha por rodada: disparo,
+    instante crítico, valores e pertinências). Devolve os caminhos.
+    """
+    rodadas = analise['rodadas']
+    caminhos = []
+    for nome, linhas in (('cenarios.csv', estatisticas_cenarios(analise)),
+                         ('pertinencias.csv', pertinencia_media(analise))):
+        caminho = os.path.join(diretorio, nome)
+        with open(caminho, 'w', newline='', encoding='utf-8') as arquivo:
+            if linhas:
+                escritor = csv.DictWriter(arquivo, fieldnames=list(linhas[0]))
+                escritor.writeheader()
+                escritor.writerows(linhas)
+        caminhos.append(caminho)
+
+    colunas = {
+        'cenario': np.array(analise['cenarios'], dtype=object)[rodadas['indice_cenario']],
+        'semente': rodadas['semente'],
+        'disparado': rodadas['disparado'].astype(int),
+        't_disparo': rodadas['t_disparo'],
+        'risco_max': rodadas['risco_max'],
+        't_critico': rodadas['valores']['tempo'],
+    }
+    if analise['com_gabarito']:
+        colunas['disparo_esperado'] = rodadas['disparo_esperado'].astype(int)
+    for apelido, canal, _, _ in VARIAVEIS:
+        colunas[canal] = rodadas['valores'][canal]
+        for termo, graus in rodadas['pertinencias'][apelido].items():
+            colunas[f"{apelido}:{termo}"] = graus
+    caminho = os.path.join(diretorio, 'rodadas.csv')
+    with open(caminho, 'w', newline='', encoding='utf-8') as arquivo:
+        escritor = csv.writer(arquivo)
+        escritor.writerow(colunas)
+        # Colunas -> linhas de uma vez (tolist evita formatar escalares NumPy um a um)
+        escritor.writerows(zip(*(np.asarray(valores).tolist() for valores in colunas.values())))
+    caminhos.append(caminho)
+    return caminhos
+
+
+def gerar_relatorio(fonte, diretorio, formatos=("md", "html", "csv"), p=None, n_piores=10):
+    """
+    Analisa a campanha guardada em 'fonte' (ver analisar_campanha) e
+    grava o relatório em 'diretorio': relatorio.md, relatorio.html e os
+    CSVs de gravar_csv, conforme 'formatos'. Devolve os caminhos gravados.
+    """
+    formatos = tuple(formatos)
+    desconhecidos = set(formatos) - {"md", "html", "csv"}
+    if desconhecidos:
+        raise ValueError(f"Formatos desconhecidos: {sorted(desconhecidos)} (use 'md', 'html' ou 'csv')")
+    analise = analisar_campanha(fonte, p)
+    os.makedirs(diretorio, exist_ok=True)
+    caminhos = []
+    for formato, funcao in (("md", relatorio_markdown), ("html", relatorio_html)):
+        if formato in formatos:
+            caminho = os.path.join(diretorio, f"relatorio.{formato}")
+            with open(caminho, 'w', encoding='utf-8') as arquivo:
+                arquivo.write(funcao(analise, n_piores))
+            caminhos.append(caminho)
+    if "csv" in formatos:
+        caminhos += gravar_csv(analise, diretorio)
+    return caminhos
+
+
+def verificar_pertinencias(fonte, fabricas, n_amostras=20, semente=0):
+    """
+    Refaz (rodar_simulacao_headless) rodadas sorteadas da campanha em
+    'fonte' (gravada com rodar_campanha(fabricas, ..., armazem=...)) e
+    compara com o relatório pelo caminho de analisar_resultados:
+    instante crítico = i_disparo ou argmax do risco, e pertinências por
+    fuzz.interp_membership termo a termo nos valores em float64.
+    As rodadas são refeitas com o motor fuzzy guardado no meta.json.
+    Devolve (instantes críticos diferentes, maior diferença de
+    pertinência); a diferença vem só do dtype do armazém.
+    """
+    import skfuzzy as fuzz
+
+    from regras_fuzzy import definir_variaveis_fuzzy
+    from simulador_core import rodar_simulacao_headless
+
+    analise = analisar_campanha(fonte)
+    motor = _abrir_fonte(fonte)[0].meta.get('motor')
+    rodadas = analise['rodadas']
+    n = len(rodadas['posicao'])
+    sorteadas = np.random.default_rng(semente).choice(n, min(n_amostras, n), replace=False)
+    instantes_diferentes = 0
+    maior_diferenca = 0.0
+    for linha in sorteadas:
+        p = fabricas[rodadas['indice_cenario'][linha]]()
+        refeito = rodar_simulacao_headless(p, int(rodadas['semente'][linha]), motor=motor)
+        i_critico = refeito.disparo['i_disparo'] if refeito.disparado else int(np.argmax(refeito.risco))
+        instantes_diferentes += int(i_critico != rodadas['i_critico'][linha])
+        fuzzy_vars = definir_variaveis_fuzzy(p)[0]
+        for apelido, canal, _, _ in VARIAVEIS:
+            variavel = fuzzy_vars[apelido]
+            valor = float(getattr(refeito, canal)[i_critico])
+            for termo, objeto in variavel.terms.items():
+                referencia = fuzz.interp_membership(variavel.universe, objeto.mf, valor)
+                maior_diferenca = max(maior_diferenca,
+                                      float(abs(referencia - rodadas['pertinencias'][apelido][termo][linha])))
+    return instantes_diferentes, maior_diferenca
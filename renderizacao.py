@@ -0,0 +1,301 @@
+# 📄 renderizacao.py
+# Gráficos das rodadas direto para arquivo (PNG/SVG), sem tela, para
+# salvar as figuras de muitas rodadas (campanhas) ou de rodadas longas.
+# Mesmos três gráficos do visualizacao.py (física, sensores, decisão),
+# com três diferenças:
+#   - sem pyplot: Figure + canvas Agg, nada de estado global nem de
+#     backend interativo;
+#   - as figuras e as linhas são criadas UMA vez (por processo) e a
+#     cada rodada só os dados das linhas mudam (set_data);
+#   - as séries são reduzidas antes de desenhar: por padrão "minmax"
+#     (M4: primeiro, último, mínimo e máximo de cada coluna de pixels,
+#     o traço desenhado fica igual) ou "lttb" (Largest-Triangle-Three-
+#     Buckets, n pontos que preservam a forma). None desenha tudo.
+# renderizar_campanha espalha as rodadas por um pool de processos.
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Pontos por coluna de pixels no "minmax" (primeiro, último, mín., máx.)
+_PONTOS_POR_BALDE = 4
+
+
+def indices_minmax(y, n_baldes):
+    """
+    Índices (ordenados) do primeiro, último, mínimo e máximo de cada um
+    dos 'n_baldes' trechos iguais de y. NaN não é escolhido como
+    mínimo/máximo (a não ser num trecho todo NaN).
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= _PONTOS_POR_BALDE * n_baldes:
+        return np.arange(n)
+    tamanho = -(-n // n_baldes)
+    n_baldes = -(-n // tamanho)
+    completo = np.full(n_baldes * tamanho, np.nan)
+    completo[:n] = y
+    trechos = completo.reshape(n_baldes, tamanho)
+    base = np.arange(n_baldes) * tamanho
+    minimos = base + np.argmin(np.where(np.isnan(trechos), np.inf, trechos), axis=1)
+    maximos = base + np.argmax(np.where(np.isnan(trechos), -np.inf, trechos), axis=1)
+    ultimos = np.minimum(base + tamanho - 1, n - 1)
+    return np.unique(np.concatenate([base, minimos, maximos, ultimos]))
+
+
+def indices_lttb(x, y, n_saida):
+    """
+    Índices dos 'n_saida' pontos escolhidos pelo Largest-Triangle-
+    Three-Buckets (o primeiro e o último sempre entram; de cada balde,
+    o ponto que forma o maior triângulo com o escolhido antes e a
+    média do balde seguinte).
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_saida >= n or n_saida < 3:
+        return np.arange(n)
+    bordas = np.linspace(1, n - 1, n_saida - 1).astype(int)
+    escolhidos = np.empty(n_saida, dtype=int)
+    escolhidos[0] = anterior = 0
+    for balde in range(n_saida - 2):
+        inicio, fim = bordas[balde], bordas[balde + 1]
+        if balde + 2 < len(bordas):
+            proximo = slice(bordas[balde + 1], bordas[balde + 2])
+        else:
+            proximo = slice(n - 1, n)
+        media_x = x[proximo].mean()
+        media_y = np.nanmean(y[proximo]) if not np.isnan(y[proximo]).all() else y[anterior]
+        areas = np.abs((x[anterior] - media_x) * (y[inicio:fim] - y[anterior])
+                       - (x[anterior] - x[inicio:fim]) * (media_y - y[anterior]))
+        anterior = inicio + int(np.argmax(np.nan_to_num(areas, nan=-1.0)))
+        escolhidos[balde + 1] = anterior
+    escolhidos[-1] = n - 1
+    return escolhidos
+
+
+def reduzir(x, y, largura_px, metodo="minmax"):
+    """Série (x, y) reduzida para um eixo de 'largura_px' pixels de largura."""
+    if metodo is None:
+        return x, y
+    if metodo == "minmax":
+        indices = indices_minmax(y, max(1, int(largura_px)))
+    elif metodo == "lttb":
+        indices = indices_lttb(x, y, max(3, 2 * int(largura_px)))
+    else:
+        raise ValueError(f"Redução desconhecida: {metodo!r} (use 'minmax', 'lttb' ou None)")
+    return np.asarray(x)[indices], np.asarray(y)[indices]
+
+
+class Renderizador:
+    """
+    As três figuras do visualizacao.py, criadas no primeiro uso e
+    reaproveitadas: cada desenhar_* só troca os dados das linhas.
+    metodo: redução das séries (ver reduzir). dpi: resolução do PNG.
+    """
+
+    def __init__(self, metodo="minmax", dpi=100):
+        self.metodo = metodo
+        self.dpi = dpi
+        self._figuras = {}  # nome -> (Figure, {nome: artista}, [eixos])
+        self._com_layout = set()  # figuras já ajustadas (tight_layout só no 1º desenho)
+
+    def _nova_figura(self, tamanho, n_eixos):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        figura = Figure(figsize=tamanho, dpi=self.dpi)
+        FigureCanvasAgg(figura)
+        return figura, list(figura.subplots(*n_eixos).flat)
+
+    def _figura(self, nome):
+        if nome not in self._figuras:
+            self._figuras[nome] = getattr(self, f"_criar_{nome}")()
+        return self._figuras[nome]
+
+    def _criar_fisica(self):
+        figura, eixos = self._nova_figura((12, 6), (1, 2))
+        linhas = {'altitude': eixos[0].plot([], [])[0], 'velocidade': eixos[1].plot([], [])[0]}
+        for eixo, titulo, rotulo in ((eixos[0], 'Altitude vs. Tempo (Real)', 'Altitude (m)'),
+                                     (eixos[1], 'Velocidade Vertical vs. Tempo (Real)', 'Velocidade (m/s)')):
+            eixo.set_title(titulo)
+            eixo.set_xlabel('Tempo (s)')
+            eixo.set_ylabel(rotulo)
+            eixo.grid(True)
+        return figura, linhas, eixos
+
+    def _criar_sensores(self):
+        figura, eixos = self._nova_figura((12, 10), (3, 1))
+        linhas = {
+            'altitude': eixos[0].plot([], [], 'b-', label='Altitude Real (Perfeita)')[0],
+            'altitude_gnss': eixos[0].plot([], [], 'r.', markersize=2, label='Leitura GNSS')[0],
+            'aceleracao': eixos[1].plot([], [], 'b-', label='Aceleração Real (Perfeita)')[0],
+            'aceleracao_imu': eixos[1].plot([], [], 'g-', alpha=0.7, label='Leitura IMU (com Bias e Ruído)')[0],
+            'velocidade': eixos[2].plot([], [], 'b-', label='Velocidade Real (Perfeita)')[0],
+            'velocidade_estimada_gnss': eixos[2].plot([], [], 'm-', alpha=0.15, label='Velocidade GNSS (Sujo)')[0],
+            'velocidade_filtrada_gnss': eixos[2].plot([], [], 'r-', linewidth=2,
+                                                      label='Velocidade FILTRADA (Suavizada)')[0],
+            'fronteira': eixos[2].axhline(y=0.0, color='cyan', linestyle='--', linewidth=2),
+        }
+        for eixo, titulo, rotulo in ((eixos[0], 'Simulação do Altímetro GNSS (Input Bruto)', 'Altitude (m)'),
+                                     (eixos[1], 'Simulação do Acelerômetro (Input Bruto)', 'Aceleração (m/s^2)'),
+                                     (eixos[2], 'Resultado do Filtro de Média Móvel (Input Pré-processado)',
+                                      'Velocidade (m/s)')):
+            eixo.set_title(titulo)
+            eixo.set_ylabel(rotulo)
+            eixo.grid(True)
+        eixos[2].set_xlabel('Tempo (s)')
+        return figura, linhas, eixos
+
+    def _criar_decisao(self):
+        figura, eixos = self._nova_figura((14, 8), (2, 1))
+        linhas = {
+            'risco': eixos[0].plot([], [], 'r-', linewidth=2, label='Risco de Queda (Saída Fuzzy)')[0],
+            'severidade_pid': eixos[1].plot([], [], 'b--', alpha=0.7, label='Severidade PID (Input)')[0],
+            'pitch_sensor_giro': eixos[1].plot([], [], 'g--', alpha=0.7, label='Pitch (Input)')[0],
+        }
+        eixos[0].set_title('Decisão do Sistema Fuzzy (Risco de Queda)')
+        eixos[0].set_ylabel('Risco Calculado (0 a 100)')
+        eixos[1].set_title('Principais Sinais de Entrada (Contexto)')
+        eixos[1].set_xlabel('Tempo (s)')
+        eixos[1].set_ylabel('Valor do Sinal')
+        for eixo in eixos:
+            eixo.legend()
+            eixo.grid(True)
+        return figura, linhas, eixos
+
+    def _atualizar(self, nome, tempo, series):
+        """Troca os dados das linhas (reduzidos) e reescala os eixos."""
+        figura, linhas, eixos = self._figura(nome)
+        largura_px = eixos[0].get_window_extent().width
+        tempo = np.asarray(tempo)
+        for chave, serie in series.items():
+            linhas[chave].set_data(*reduzir(tempo, np.asarray(serie), largura_px, self.metodo))
+        for eixo in eixos:
+            eixo.relim()
+            eixo.autoscale_view()
+        if nome not in self._com_layout:
+            figura.tight_layout()
+            self._com_layout.add(nome)
+        return figura, linhas, eixos
+
+    def desenhar_fisica(self, tempo, altitudes, velocidades):
+        """Gráfico 1 (plotar_fisica_base). Devolve a Figure."""
+        return self._atualizar('fisica', tempo, {'altitude': altitudes, 'velocidade': velocidades})[0]
+
+    def desenhar_sensores(self, p, tempo, dados_reais, dados_sensores):
+        """Gráfico 2 (plotar_sensores_consolidados). Devolve a Figure."""
+        series = {'altitude': dados_reais['altitude'], 'aceleracao': dados_reais['aceleracao'],
+                  'velocidade': dados_reais['velocidade']}
+        for chave in ('altitude_gnss', 'aceleracao_imu', 'velocidade_estimada_gnss', 'velocidade_filtrada_gnss'):
+            series[chave] = dados_sensores[chave]
+        figura, linhas, eixos = self._atualizar('sensores', tempo, series)
+
+        # Rótulos que dependem do cenário
+        linhas['altitude_gnss'].set_label(f'Leitura GNSS (5 Hz, $\\sigma$={p.sigma_ruido_gnss}m)')
+        fronteira_perigosa = p.v_terminal * 0.5
+        linhas['fronteira'].set_ydata([fronteira_perigosa, fronteira_perigosa])
+        linhas['fronteira'].set_label(f'Fronteira "Baixo Risco" ({fronteira_perigosa:.2f} m/s)')
+        eixos[2].relim()
+        eixos[2].autoscale_view()
+        for eixo in eixos:
+            eixo.legend()
+        return figura
+
+    def desenhar_decisao(self, tempo, risco_calculado_fuzzy, severidade_pid, pitch_sensor_giro):
+        """Gráfico 3 (plotar_decisao_final). Devolve a Figure."""
+        return self._atualizar('decisao', tempo, {'risco': risco_calculado_fuzzy, 'severidade_pid': severidade_pid,
+                                                  'pitch_sensor_giro': pitch_sensor_giro})[0]
+
+    def salvar_resultado(self, p, resultado, prefixo, formatos=("png",)):
+        """
+        Salva os três gráficos de um ResultadoSimulacao como
+        '<prefixo>_<fisica|sensores|decisao>.<formato>'. Devolve os caminhos.
+        """
+        dados_reais = {'altitude': resultado.altitude_real, 'velocidade': resultado.velocidade_real,
+                       'aceleracao': resultado.aceleracao_real}
+        figuras = {
+            'fisica': self.desenhar_fisica(resultado.tempo, resultado.altitude_real, resultado.velocidade_real),
+            'sensores': self.desenhar_sensores(p, resultado.tempo, dados_reais, resultado.sensores),
+            'decisao': self.desenhar_decisao(resultado.tempo, resultado.risco, resultado.severidade_pid,
+                                             resultado.pitch_sensor_giro),
+        }
+        caminhos = []
+        for nome, figura in figuras.items():
+            for formato in formatos:
+                caminho = f"{prefixo}_{nome}.{formato}"
+                figura.savefig(caminho, format=formato, dpi=self.dpi)
+                caminhos.append(caminho)
+        return caminhos
+
+
+# Um Renderizador por processo do pool (figuras reaproveitadas entre rodadas)
+_renderizadores = {}
+
+
+def _renderizar_rodada(tarefa):
+    """
+    Roda UMA simulação headless e salva os gráficos.
+    (Função de módulo para poder ser enviada aos processos do pool.)
+    """
+    from simulador_core import rodar_simulacao_headless
+
+    indice_cenario, fabrica, semente, motor, diretorio, formatos, metodo, dpi = tarefa
+    if (metodo, dpi) not in _renderizadores:
+        _renderizadores[(metodo, dpi)] = Renderizador(metodo, dpi)
+    p = fabrica()
+    if motor is not None:
+        p.motor_fuzzy = motor
+    resultado = rodar_simulacao_headless(p, semente)
+    prefixo = os.path.join(diretorio, f"cenario{indice_cenario + 1}_semente{semente}")
+    return _renderizadores[(metodo, dpi)].salvar_resultado(p, resultado, prefixo, formatos)
+
+
+def renderizar_campanha(fabricas, sementes, diretorio, formatos=("png",), n_processos=None,
+                        metodo="minmax", dpi=100, motor="vetorizado"):
+    """
+    Salva os três gráficos de cada (cenário, semente) em 'diretorio'
+    ('cenario<i>_semente<s>_<grafico>.<formato>'), espalhando as
+    rodadas por 'n_processos' processos (None = todos os núcleos).
+    fabricas: funções de cenário (funções de módulo, como em
+    campanha.rodar_campanha). Devolve a lista de arquivos.
+    """
+    from campanha import _preparar_motor
+
+    os.makedirs(diretorio, exist_ok=True)
+    tarefas = [(i, fabrica, int(semente), motor, diretorio, tuple(formatos), metodo, dpi)
+               for i, fabrica in enumerate(fabricas) for semente in sementes]
+    if n_processos is None:
+        n_processos = os.cpu_count() or 1
+
+    _preparar_motor(fabricas, motor)
+    if n_processos == 1:
+        caminhos = [_renderizar_rodada(tarefa) for tarefa in tarefas]
+    else:
+        lote = max(1, len(tarefas) // (4 * n_processos))
+        with ProcessPoolExecutor(max_workers=n_processos) as executor:
+            caminhos = list(executor.map(_renderizar_rodada, tarefas, chunksize=lote))
+    return [caminho for lista in caminhos for caminho in lista]
+
+
+def verificar_reducao(n_pontos=20000, largura_px=1000, semente=0):
+    """
+    Confere que a redução "minmax" preserva o traço: em cada coluna de
+    pixels, o mínimo e o máximo da série reduzida são os da série
+    completa (random walk de n_pontos). Devolve (pontos reduzidos,
+    maior diferença dos extremos por coluna).
+    """
+    rng = np.random.default_rng(semente)
+    x = np.arange(n_pontos, dtype=float)
+    y = np.cumsum(rng.normal(size=n_pontos))
+    x_red, y_red = reduzir(x, y, largura_px, "minmax")
+
+    colunas = np.floor(x / n_pontos * largura_px).astype(int)
+    colunas_red = np.floor(x_red / n_pontos * largura_px).astype(int)
+    diferenca = 0.0
+    for coluna in range(largura_px):
+        cheia = y[colunas == coluna]
+        reduzida = y_red[colunas_red == coluna]
+        diferenca = max(diferenca, abs(cheia.min() - reduzida.min()), abs(cheia.max() - reduzida.max()))
+    return len(x_red), float(diferenca)
@@ -0,0 +1,209 @@
+# 📄 resultado.py
+# Resultado estruturado de UMA rodada do pipeline (modo sem gráficos).
+# Todas as séries ficam num único bloco NumPy (canais x amostras),
+# alocado uma vez; cada série é uma "view" (sem cópia) de uma linha.
+
+import json
+
+import numpy as np
+
+# Canais do bloco, na ordem das linhas
+CANAIS = (
+    # física "perfeita"
+    'tempo', 'altitude_real', 'velocidade_real', 'aceleracao_real',
+    # sensores (as chaves do dict de simular_sensores_e_filtros)
+    'altitude_gnss', 'aceleracao_imu', 'velocidade_estimada_gnss',
+    'velocidade_filtrada_gnss', 'pitch_sensor_giro',
+    # decisão
+    'severidade_pid', 'pitch_medio', 'proximidade_v_terminal', 'risco',
+)
+CANAIS_SENSORES = CANAIS[4:9]
+CANAIS_DECISAO = CANAIS[9:]
+_INDICE = {nome: i for i, nome in enumerate(CANAIS)}
+
+
+def _canal(nome):
+    """Propriedade que lê/escreve a linha 'nome' do bloco (view, sem cópia)."""
+    indice = _INDICE[nome]
+
+    def ler(self):
+        return self.bloco[indice]
+
+    def escrever(self, valores):
+        self.bloco[indice] = valores
+
+    return property(ler, escrever, doc=f"Série '{nome}' (view do bloco).")
+
+
+def _para_json(valor):
+    """Escalares NumPy -> Python (para os metadados em JSON)."""
+    if isinstance(valor, np.generic):
+        return valor.item()
+    raise TypeError(f"Não serializável em JSON: {type(valor).__name__}")
+
+
+class ResultadoSimulacao:
+    """
+    Tudo o que uma rodada produz, sem gráficos nem prints:
+      - física "perfeita": tempo, altitude_real, velocidade_real, aceleracao_real;
+      - sensores: as séries de simular_sensores_e_filtros (também como
+        dict em .sensores);
+      - decisão: severidade_pid, pitch_medio, proximidade_v_terminal,
+        risco e sem_regra (amostras em que nenhuma regra disparou);
+      - disparo: o dict de logica_decisao.calcular_disparo;
+      - metricas: dict de instrumentacao.py (None se não instrumentada);
+      - paraquedas: dict da descida com paraquedas (só na co-simulação,
+        ver cosimulacao.py; None no pipeline em etapas);
+      - rastro: rastro_regras.RastroRegras (só com rastrear=True em
+        rodar_simulacao_headless; não vai para salvar()).
+
+    As séries são linhas de self.bloco, um array (len(CANAIS), T) em
+    float64 ou float32 (metade da memória, ver p.dtype_resultado);
+    sem_regra é um array bool à parte. salvar()/carregar() usam um .npz.
+    """
+
+    __slots__ = ('cenario_nome', 'semente', 'bloco', 'sem_regra', 'disparo', 'metricas', 'paraquedas',
+                 'rastro')
+
+    tempo = _canal('tempo')
+    altitude_real = _canal('altitude_real')
+    velocidade_real = _canal('velocidade_real')
+    aceleracao_real = _canal('aceleracao_real')
+    altitude_gnss = _canal('altitude_gnss')
+    aceleracao_imu = _canal('aceleracao_imu')
+    velocidade_estimada_gnss = _canal('velocidade_estimada_gnss')
+    velocidade_filtrada_gnss = _canal('velocidade_filtrada_gnss')
+    pitch_sensor_giro = _canal('pitch_sensor_giro')
+    severidade_pid = _canal('severidade_pid')
+    pitch_medio = _canal('pitch_medio')
+    proximidade_v_terminal = _canal('proximidade_v_terminal')
+    risco = _canal('risco')
+
+    def __init__(self, cenario_nome, semente,
+                 tempo, altitude_real, velocidade_real, aceleracao_real,
+                 sensores,
+                 severidade_pid, pitch_medio, proximidade_v_terminal,
+                 risco, sem_regra,
+                 disparo, metricas=None, paraquedas=None, dtype=np.float64):
+        self._iniciar(cenario_nome, semente, len(tempo), dtype)
+        self.tempo = tempo
+        self.altitude_real = altitude_real
+        self.velocidade_real = velocidade_real
+        self.aceleracao_real = aceleracao_real
+        self.sensores = sensores
+        self.severidade_pid = severidade_pid
+        self.pitch_medio = pitch_medio
+        self.proximidade_v_terminal = proximidade_v_terminal
+        self.risco = risco
+        self.sem_regra[:] = sem_regra
+        self.disparo = disparo
+        self.metricas = metricas
+        self.paraquedas = paraquedas
+
+    def _iniciar(self, cenario_nome, semente, n_amostras, dtype):
+        self.cenario_nome = cenario_nome
+        self.semente = semente
+        self.bloco = np.empty((len(CANAIS), n_amostras), dtype=dtype)
+        self.sem_regra = np.zeros(n_amostras, dtype=bool)
+        self.disparo = None
+        self.metricas = None
+        self.paraquedas = None
+        self.rastro = None
+
+    @classmethod
+    def alocar(cls, cenario_nome, semente, n_amostras, dtype=np.float64):
+        """
+        Resultado com o bloco já alocado (valores indefinidos): cada
+        etapa escreve direto nos seus canais (ex.: resultado.risco = ...).
+        """
+        resultado = cls.__new__(cls)
+        resultado._iniciar(cenario_nome, semente, n_amostras, dtype)
+        return resultado
+
+    def canal(self, nome):
+        """View da série 'nome' (um de CANAIS) no bloco."""
+        return self.bloco[_INDICE[nome]]
+
+    @classmethod
+    def sobre_bloco(cls, cenario_nome, semente, bloco, sem_regra):
+        """
+        Resultado que USA o bloco dado (sem cópia), ex.: uma linha de um
+        .npz ou de um armazém em disco (armazenamento.py).
+        """
+        if bloco.shape != (len(CANAIS), len(sem_regra)):
+            raise ValueError(f"Bloco {bloco.shape} não tem o formato ({len(CANAIS)}, {len(sem_regra)})")
+        resultado = cls.__new__(cls)
+        resultado.cenario_nome = cenario_nome
+        resultado.semente = semente
+        resultado.bloco = bloco
+        resultado.sem_regra = sem_regra
+        resultado.disparo = None
+        resultado.metricas = None
+        resultado.paraquedas = None
+        resultado.rastro = None
+        return resultado
+
+    @property
+    def sensores(self):
+        """Dict {nome: view}, com as mesmas chaves do de simular_sensores_e_filtros."""
+        return {nome: self.bloco[_INDICE[nome]] for nome in CANAIS_SENSORES}
+
+    @sensores.setter
+    def sensores(self, dados_sensores):
+        for nome in CANAIS_SENSORES:
+            self.bloco[_INDICE[nome]] = dados_sensores[nome]
+
+    @property
+    def nbytes(self):
+        """Memória das séries (bloco + sem_regra), em bytes."""
+        return self.bloco.nbytes + self.sem_regra.nbytes
+
+    @property
+    def disparado(self):
+        return self.disparo['disparado']
+
+    @property
+    def t_disparo(self):
+        return self.disparo['t_disparo']
+
+    @property
+    def risco_max(self):
+        return float(np.nanmax(self.risco))  # NaN: amostras não avaliadas (co-simulação)
+
+    def salvar(self, caminho):
+        """
+        Grava a rodada num .npz: o bloco e sem_regra como estão (sem
+        conversão), os nomes dos canais e os metadados (cenário, semente,
+        disparo, métricas, paraquedas) em JSON. Ler com carregar().
+        """
+        metadados = {
+            'cenario_nome': self.cenario_nome,
+            'semente': self.semente,
+            'disparo': self.disparo,
+            'metricas': self.metricas,
+            'paraquedas': self.paraquedas,
+        }
+        np.savez(caminho, bloco=self.bloco, sem_regra=self.sem_regra, canais=np.array(CANAIS),
+                 metadados=np.array(json.dumps(metadados, default=_para_json)))
+
+    @classmethod
+    def carregar(cls, caminho):
+        """Lê um .npz gravado por salvar()."""
+        with np.load(caminho, allow_pickle=False) as arquivo:
+            if tuple(arquivo['canais']) != CANAIS:
+                raise ValueError(f"Os canais de {caminho} não batem com resultado.CANAIS")
+            metadados = json.loads(str(arquivo['metadados']))
+            resultado = cls.sobre_bloco(metadados['cenario_nome'], metadados['semente'],
+                                        arquivo['bloco'], arquivo['sem_regra'])
+        disparo = metadados['disparo']
+        if disparo is not None:
+            disparo['eventos'] = [tuple(evento) for evento in disparo['eventos']]
+        resultado.disparo = disparo
+        resultado.metricas = metadados['metricas']
+        resultado.paraquedas = metadados['paraquedas']
+        return resultado
+
+    def __repr__(self):
+        estado = f"disparo em t={self.t_disparo:.2f}s" if self.disparado else "sem disparo"
+        return (f"ResultadoSimulacao({self.cenario_nome!r}, semente={self.semente}, "
+                f"{len(self.tempo)} amostras, risco máx. {self.risco_max:.1f}, {estado})")
@@ -0,0 +1,287 @@
+# 📄 sensibilidade.py
+# Análise de sensibilidade global (índices de Sobol) do disparo em
+# relação aos campos do Parametros: quais parâmetros físicos e de
+# sensores mexem no instante do disparo e nos disparos indevidos.
+#
+# Desenho de Saltelli com pontos quase-aleatórios (Sobol): duas
+# matrizes A e B (N x k) e, para cada fator i, AB_i = A com a coluna i
+# tirada de B. São N * (k + 2) rodadas, e TODAS servem a todos os
+# índices e a todas as saídas ('t_disparo', 'disparado', 'risco_max'):
+#   1ª ordem  S_i  = média(f(B) * (f(AB_i) - f(A))) / Var   (Saltelli 2010)
+#   total     ST_i = média((f(A) - f(AB_i))²) / (2 Var)     (Jansen)
+# Os intervalos de confiança vêm de bootstrap nas N linhas do desenho
+# (sem rodar nada de novo).
+#
+# As linhas do desenho são avaliadas EM LOTE: física (RK4 em lote,
+# simulacao_fisica.executar_simulacao_lote), sensores e inferência fuzzy
+# de um bloco inteiro de uma vez, cada linha com o seu Parametros. Os
+# blocos vão para um pool de processos (como em campanha.py). A_j,
+# AB_1j ... AB_kj, B_j usam a mesma semente e cada linha do lote tem os
+# seus geradores (criar_geradores): números aleatórios comuns.
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from simulador_core import criar_geradores
+
+# Faixas padrão dos fatores: campo do Parametros -> (mínimo, máximo)
+FATORES_PADRAO = {
+    'm': (3.0, 8.0),
+    'C_d': (0.5, 1.2),
+    'A': (0.3, 0.8),
+    'sigma_ruido_gnss': (0.5, 5.0),
+    'bias_acel': (0.0, 0.2),
+    'sigma_ruido_giro': (0.1, 2.0),
+    'tamanho_janela_filtro': (5, 50),
+    'K_pouso_vel': (50.0, 300.0),
+    'forca_rajada_turbulencia': (0.0, 100.0),
+}
+# Fatores sorteados como inteiros (faixa fechada [mínimo, máximo])
+FATORES_INTEIROS = ('tamanho_janela_filtro',)
+
+SAIDAS = ('t_disparo', 'disparado', 'risco_max')
+
+
+def desenho_saltelli(n_fatores, m_base2, semente=0):
+    """
+    Matrizes A e B (2**m_base2, n_fatores) no cubo unitário, das
+    metades de uma sequência de Sobol embaralhada de 2 * n_fatores
+    dimensões.
+    """
+    from scipy.stats import qmc
+
+    pontos = qmc.Sobol(d=2 * n_fatores, scramble=True, seed=semente).random_base2(m_base2)
+    return pontos[:, :n_fatores], pontos[:, n_fatores:]
+
+
+def escalar_fatores(unitario, fatores):
+    """Leva pontos do cubo unitário (M, k) para as faixas de 'fatores' (dict nome -> (mín, máx))."""
+    valores = np.empty_like(unitario)
+    for i, (nome, (minimo, maximo)) in enumerate(fatores.items()):
+        if nome in FATORES_INTEIROS:
+            valores[:, i] = np.minimum(np.floor(minimo + unitario[:, i] * (maximo - minimo + 1)), maximo)
+        else:
+            valores[:, i] = minimo + unitario[:, i] * (maximo - minimo)
+    return valores
+
+
+def linhas_do_desenho(A, B):
+    """
+    As N * (k + 2) linhas a avaliar, agrupadas por linha j do desenho
+    (A_j, AB_1j, ..., AB_kj, B_j). Devolve (valores (N, k + 2, k),
+    índice j de cada linha (N, k + 2)).
+    """
+    N, k = A.shape
+    linhas = np.repeat(A[:, None, :], k + 2, axis=1)
+    for i in range(k):
+        linhas[:, 1 + i, i] = B[:, i]
+    linhas[:, k + 1] = B
+    return linhas, np.repeat(np.arange(N)[:, None], k + 2, axis=1)
+
+
+def saidas_lote(lista_p, sementes, motor=None):
+    """
+    Saídas (M, 3) ('t_disparo', 'disparado', 'risco_max') de M rodadas
+    pelo pipeline em lote, cada uma com o seu Parametros e a sua
+    semente. O que depende de campos por linha (dt, ganhos do PID,
+    v_terminal, limiares) é calculado por linha ou por grupo; a
+    inferência fuzzy roda uma vez para o lote todo.
+    """
+    import logica_decisao as cerebro
+    from gatilho import avaliar_disparos
+    from simulacao_fisica import executar_simulacao_lote
+    from simulacao_sensores import _grupos, simular_sensores_e_filtros
+
+    geradores = [criar_geradores(int(semente), p.cenario_nome) for p, semente in zip(lista_p, sementes)]
+    tempo, altitude, velocidade, aceleracao = executar_simulacao_lote(
+        lista_p, rngs=[rng_fisica for rng_fisica, _ in geradores])
+    dados = simular_sensores_e_filtros(lista_p, tempo, altitude, velocidade, aceleracao,
+                                       rng=[rng_sensores for _, rng_sensores in geradores], verbose=False)
+
+    # Entradas por linha (o dt de cada rodada vem do instante do impacto)
+    por_linha = [cerebro.calcular_entradas_fuzzy(p, tempo[linha], {nome: serie[linha] for nome, serie in dados.items()})
+                 for linha, p in enumerate(lista_p)]
+    entradas = {rotulo: np.array([e[rotulo] for e in por_linha]) for rotulo in por_linha[0]}
+    risco, _ = cerebro.calcular_risco(lista_p[0], entradas, motor)
+
+    saidas = np.empty((len(lista_p), len(SAIDAS)))
+    saidas[:, 2] = risco.max(axis=1)
+    for p, linhas in _grupos(lista_p, lambda q: (q.limiar_disparo_risco, q.limiar_reset_timer,
+                                                 q.tempo_minimo_disparo, q.tempo_simulacao_max)):
+        i_disparo = avaliar_disparos(tempo[linhas], risco[linhas], p.limiar_disparo_risco,
+                                     p.limiar_reset_timer, p.tempo_minimo_disparo)[:, 0, 0, 0]
+        disparado = i_disparo >= 0
+        # Sem disparo: conta como disparo no fim da janela simulada (censura)
+        t_disparo = np.where(disparado, tempo[linhas, np.maximum(i_disparo, 0)], p.tempo_simulacao_max)
+        saidas[linhas, 0] = t_disparo
+        saidas[linhas, 1] = disparado
+    return saidas
+
+
+def _avaliar_bloco(tarefa):
+    """
+    Roda um bloco de linhas do desenho em lote e devolve as saídas (M, 3).
+    (Função de módulo para poder ser enviada aos processos do pool.)
+    """
+    fabrica, nomes, valores, sementes, motor = tarefa
+    lista_p = []
+    for valores_linha in valores:
+        p = fabrica()
+        if motor is not None:
+            p.motor_fuzzy = motor
+        for nome, valor in zip(nomes, valores_linha):
+            setattr(p, nome, int(valor) if nome in FATORES_INTEIROS else float(valor))
+        lista_p.append(p)
+    if not lista_p:
+        return np.empty((0, len(SAIDAS)))
+    return saidas_lote(lista_p, sementes, motor)
+
+
+def avaliar_desenho(fabrica, nomes, valores, sementes, n_processos=None, motor="vetorizado",
+                    tamanho_bloco=None):
+    """
+    Roda as linhas 'valores' (M, k) (fatores 'nomes') com as 'sementes'
+    (M,), em blocos de linhas consecutivas espalhados pelos processos.
+    Devolve {saida: array (M,)}.
+    """
+    from campanha import _preparar_motor
+
+    if n_processos is None:
+        n_processos = os.cpu_count() or 1
+    M = len(valores)
+    if tamanho_bloco is None:
+        tamanho_bloco = max(1, -(-M // (4 * n_processos)))
+    tarefas = [(fabrica, tuple(nomes), valores[inicio:inicio + tamanho_bloco],
+                sementes[inicio:inicio + tamanho_bloco], motor)
+               for inicio in range(0, M, tamanho_bloco)]
+
+    _preparar_motor([fabrica], motor)
+    if n_processos == 1:
+        blocos = [_avaliar_bloco(tarefa) for tarefa in tarefas]
+    else:
+        with ProcessPoolExecutor(max_workers=n_processos) as executor:
+            blocos = list(executor.map(_avaliar_bloco, tarefas))
+    saidas = np.concatenate(blocos) if blocos else np.empty((0, len(SAIDAS)))
+    return {nome: saidas[:, i] for i, nome in enumerate(SAIDAS)}
+
+
+def indices_sobol(y_A, y_B, y_AB, n_bootstrap=1000, confianca=0.95, semente=0):
+    """
+    Índices de 1ª ordem e total a partir das avaliações do desenho:
+    y_A, y_B (N,) e y_AB (N, k). Intervalos de confiança por bootstrap
+    (percentis) nas N linhas. Sem variância (saída constante) os
+    índices ficam NaN.
+    Devolve {'S1', 'S1_ic', 'ST', 'ST_ic', 'variancia'}; os *_ic são (k, 2).
+    """
+    y_A = np.asarray(y_A, dtype=float)
+    y_B = np.asarray(y_B, dtype=float)
+    y_AB = np.asarray(y_AB, dtype=float)
+    N = len(y_A)
+
+    def estimar(linhas):
+        # linhas: (..., N) índices; devolve S1, ST com formato (..., k)
+        a, b, ab = y_A[linhas], y_B[linhas], y_AB[linhas]
+        juntas = np.concatenate([a, b], axis=-1)
+        # Saídas centradas: o estimador de 1ª ordem é muito ruidoso
+        # quando a média é grande perto do desvio (ex.: risco_max ~ 90)
+        media = juntas.mean(axis=-1)[..., None]
+        a, b, ab = a - media, b - media, ab - media[..., None]
+        variancia = np.var(juntas, axis=-1)[..., None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            primeira = np.mean(b[..., None] * (ab - a[..., None]), axis=-2) / variancia
+            total = 0.5 * np.mean((a[..., None] - ab) ** 2, axis=-2) / variancia
+        return primeira, total, variancia[..., 0]
+
+    S1, ST, variancia = estimar(np.arange(N))
+    reamostras = np.random.default_rng(semente).integers(0, N, (n_bootstrap, N))
+    S1_boot, ST_boot, _ = estimar(reamostras)
+    alfa = (1 - confianca) / 2
+    with np.errstate(invalid='ignore'):
+        S1_ic = np.quantile(S1_boot, [alfa, 1 - alfa], axis=0).T
+        ST_ic = np.quantile(ST_boot, [alfa, 1 - alfa], axis=0).T
+    return {'S1': S1, 'S1_ic': S1_ic, 'ST': ST, 'ST_ic': ST_ic, 'variancia': float(variancia)}
+
+
+def analisar_sensibilidade(fabricas, fatores=None, m_base2=6, n_processos=None, motor="vetorizado",
+                           n_bootstrap=1000, confianca=0.95, semente=0):
+    """
+    Índices de Sobol de cada saída ('t_disparo', 'disparado',
+    'risco_max') em relação a cada fator, por cenário.
+
+    fabricas: funções de cenário do parametros.py (funções de módulo,
+              como em campanha.rodar_campanha).
+    fatores: dict campo -> (mínimo, máximo); None = FATORES_PADRAO.
+    m_base2: N = 2**m_base2 linhas do desenho (N * (k + 2) rodadas
+             por cenário).
+    t_disparo: rodadas sem disparo contam como p.tempo_simulacao_max.
+
+    Devolve {cenario_nome: {saida: indices_sobol(...) + 'fatores'}}
+    e, em '_desenho', as matrizes A e B (valores) e o nº de rodadas.
+    """
+    fatores = dict(FATORES_PADRAO if fatores is None else fatores)
+    nomes = list(fatores)
+    for nome in nomes:
+        # Campos calculados (ex.: v_terminal, propriedade sem setter) não são fatores
+        if not hasattr(fabricas[0](), nome) or isinstance(getattr(type(fabricas[0]()), nome, None), property):
+            raise ValueError(f"Fator {nome!r} não é um campo ajustável do Parametros")
+    k = len(nomes)
+    A, B = (escalar_fatores(matriz, fatores) for matriz in desenho_saltelli(k, m_base2, semente))
+    valores, linha_j = linhas_do_desenho(A, B)
+    N = len(A)
+
+    resultado = {'_desenho': {'fatores': fatores, 'A': A, 'B': B, 'rodadas_por_cenario': N * (k + 2)}}
+    for fabrica in fabricas:
+        # Mesma semente em todas as rodadas da linha j (números aleatórios comuns)
+        y = avaliar_desenho(fabrica, nomes, valores.reshape(-1, k), (semente + linha_j).reshape(-1),
+                            n_processos, motor)
+        por_saida = {}
+        for saida in SAIDAS:
+            serie = y[saida].reshape(N, k + 2)
+            indices = indices_sobol(serie[:, 0], serie[:, -1], serie[:, 1:-1], n_bootstrap, confianca, semente)
+            indices['fatores'] = nomes
+            por_saida[saida] = indices
+        resultado[fabrica().cenario_nome] = por_saida
+    return resultado
+
+
+def tabela_sensibilidade(resultado):
+    """Achata o resultado de analisar_sensibilidade em linhas (uma por cenário, saída e fator)."""
+    linhas = []
+    for cenario, por_saida in resultado.items():
+        if cenario.startswith('_'):
+            continue
+        for saida, indices in por_saida.items():
+            for i, fator in enumerate(indices['fatores']):
+                linhas.append({
+                    'cenario': cenario, 'saida': saida, 'fator': fator,
+                    'S1': float(indices['S1'][i]),
+                    'S1_min': float(indices['S1_ic'][i, 0]), 'S1_max': float(indices['S1_ic'][i, 1]),
+                    'ST': float(indices['ST'][i]),
+                    'ST_min': float(indices['ST_ic'][i, 0]), 'ST_max': float(indices['ST_ic'][i, 1]),
+                })
+    return linhas
+
+
+def verificar_ishigami(m_base2=12, semente=0):
+    """
+    Confere os estimadores na função de Ishigami (a = 7, b = 0.1,
+    fatores uniformes em [-pi, pi]), cujos índices são conhecidos.
+    Devolve a maior diferença absoluta entre estimado e exato.
+    """
+    a, b = 7.0, 0.1
+    fatores = {f'x{i}': (-np.pi, np.pi) for i in range(3)}
+    A, B = (escalar_fatores(matriz, fatores) for matriz in desenho_saltelli(3, m_base2, semente))
+    valores, _ = linhas_do_desenho(A, B)
+    x = valores.reshape(-1, 3)
+    y = (np.sin(x[:, 0]) + a * np.sin(x[:, 1]) ** 2 + b * x[:, 2] ** 4 * np.sin(x[:, 0])).reshape(len(A), 5)
+    indices = indices_sobol(y[:, 0], y[:, -1], y[:, 1:-1], n_bootstrap=200, semente=semente)
+
+    variancia = a ** 2 / 8 + b * np.pi ** 4 / 5 + b ** 2 * np.pi ** 8 / 18 + 0.5
+    V1 = 0.5 * (1 + b * np.pi ** 4 / 5) ** 2
+    V2 = a ** 2 / 8
+    V13 = b ** 2 * np.pi ** 8 * (1 / 18 - 1 / 50)
+    S1_exato = np.array([V1, V2, 0.0]) / variancia
+    ST_exato = np.array([V1 + V13, V2, V13]) / variancia
+    return float(max(np.max(np.abs(indices['S1'] - S1_exato)), np.max(np.abs(indices['ST'] - ST_exato))))
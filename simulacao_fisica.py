@@ -1,14 +1,47 @@
 # 📄 simulacao_fisica.py
 import numpy as np
-from scipy.integrate import solve_ivp
+
+import instrumentacao
+from rajadas import gerar_rajadas
 
 # As funções de física precisam ler os parâmetros
 # Por isso, passamos 'p' (de parametros) para elas.
 
-def _modelo_dinamica_queda(t, state, p):
+# Códigos da dinâmica de cada veículo (mesmos casos de _modelo_dinamica_queda)
+DINAMICA_QUEDA = 0
+DINAMICA_POUSO = 1
+DINAMICA_TURBULENCIA = 2
+DINAMICA_POUSO_TURBULENCIA = 3
+
+
+def _codigo_dinamica(p):
+    """Traduz o nome do cenário no caso usado por _modelo_dinamica_queda."""
+    if "Pouso com Turbulência" in p.cenario_nome:
+        return DINAMICA_POUSO_TURBULENCIA
+    elif "Pouso" in p.cenario_nome:
+        return DINAMICA_POUSO
+    elif "Turbulência" in p.cenario_nome:
+        return DINAMICA_TURBULENCIA
+    return DINAMICA_QUEDA
+
+
+def _forca_rajada(t, p, rng, rajada):
+    """
+    Força da rajada no instante t: interpolada da série pré-gerada
+    (rajada, ver rajadas.py) ou, no modelo "ruido_branco" original,
+    um sorteio novo a cada chamada.
+    """
+    if rajada is not None:
+        return rajada(t)
+    return rng.normal(0, p.forca_rajada_turbulencia / 3)
+
+
+def _modelo_dinamica_queda(t, state, p, rng=np.random, rajada=None):
     """
     Define as Equações Diferenciais Ordinárias (EDOs) da queda.
     AGORA COM LÓGICA DIFERENTE PARA O CENÁRIO DE POUSO.
+    rng: gerador das rajadas (np.random.Generator ou o np.random global).
+    rajada: série de rajadas pré-gerada (CampoRajada) ou None.
     """
     h, v = state
 
@@ -29,7 +62,7 @@ def _modelo_dinamica_queda(t, state, p):
         forca_controle = p.K_pouso_vel * erro_velocidade
 
         # Força da Turbulência (Rajada Vertical Aleatória)
-        forca_rajada = np.random.normal(0, p.forca_rajada_turbulencia / 3)
+        forca_rajada = _forca_rajada(t, p, rng, rajada)
 
         # Força Total = Peso + Arrasto + Controle + Rajada
         forca_total = forca_peso + forca_arrasto + forca_controle + forca_rajada
@@ -46,7 +79,7 @@ def _modelo_dinamica_queda(t, state, p):
         # OBJETIVO: Manter 0 m/s ENQUANTO luta contra rajadas
         erro_velocidade = 0.0 - v 
         forca_controle = p.K_nivelado_vel * erro_velocidade
-        forca_rajada = np.random.normal(0, p.forca_rajada_turbulencia / 3)
+        forca_rajada = _forca_rajada(t, p, rng, rajada)
         forca_total = forca_peso + forca_arrasto + forca_controle + forca_rajada
 
     # CASO 4: QUEDA ou FLAT SPIN (Física original)
@@ -59,35 +92,195 @@ def _modelo_dinamica_queda(t, state, p):
 
     return [dh_dt, dv_dt]
 
+def _modelo_dinamica_paraquedas(t, state, p, t_acionamento, rng=np.random, rajada=None):
+    """
+    EDO da descida DEPOIS do acionamento do paraquedas (co-simulação):
+    motores cortados (sem o "piloto automático" dos cenários de pouso e
+    voo nivelado), peso + arrasto do VANT + arrasto do velame, que abre
+    linearmente em p.tempo_abertura_paraquedas. As rajadas dos cenários
+    com turbulência continuam agindo.
+    """
+    h, v = state
+
+    if p.tempo_abertura_paraquedas > 0:
+        abertura = min(1.0, max(0.0, (t - t_acionamento) / p.tempo_abertura_paraquedas))
+    else:
+        abertura = 1.0
+    area_arrasto = p.C_d * p.A + abertura * p.C_d_paraquedas * p.A_paraquedas
+
+    forca_peso = -p.m * p.g
+    forca_arrasto = 0.5 * p.rho * area_arrasto * (v * abs(v)) * (-1)
+    forca_total = forca_peso + forca_arrasto
+    if _codigo_dinamica(p) in (DINAMICA_TURBULENCIA, DINAMICA_POUSO_TURBULENCIA):
+        forca_total += _forca_rajada(t, p, rng, rajada)
+
+    return [v, forca_total / p.m]
+
+
 def _atingiu_solo(t, state):
     """Evento de parada (não precisa de 'p')"""
     return state[0]
 _atingiu_solo.terminal = True
 _atingiu_solo.direction = -1
 
-def executar_simulacao(p):
+# --- SOLUÇÃO ANALÍTICA (SÓ PESO + ARRASTO) ---
+
+def _log_cosh(x):
+    """log(cosh(x)) sem overflow para |x| grande."""
+    x = np.abs(x)
+    return x + np.log1p(np.exp(-2.0 * x)) - np.log(2.0)
+
+
+def _admite_solucao_analitica(p, v_inicial):
+    """
+    A queda "pura" (CASO 4 de _modelo_dinamica_queda: só peso e arrasto
+    quadrático) tem solução fechada quando o veículo parte em repouso ou
+    descendo mais devagar que a velocidade terminal.
+    """
+    k_arrasto = 0.5 * p.rho * p.C_d * p.A
+    if not p.fisica_analitica or _codigo_dinamica(p) != DINAMICA_QUEDA:
+        return False
+    if k_arrasto <= 0 or p.m <= 0 or p.g <= 0 or p.altitude_inicial <= 0:
+        return False
+    v_t = np.sqrt(p.m * p.g / k_arrasto)
+    return -v_t < v_inicial <= 0
+
+
+def _coeficientes_queda(p, v_inicial):
+    """
+    Constantes da solução fechada de m*dv/dt = -m*g + k*v^2 (descendo, v <= 0):
+        v(t) = -v_t * tanh(g*t/v_t + tau0)
+        h(t) = h0 - (v_t^2/g) * [log cosh(g*t/v_t + tau0) - log cosh(tau0)]
+    com tau0 = atanh(-v0/v_t). O impacto (h = 0) também é fechado:
+        g*t/v_t + tau0 = acosh(exp(g*h0/v_t^2 + log cosh(tau0)))
+    v_t é recalculado de m, C_d e A (p.v_terminal pode estar desatualizado).
+    Devolve (v_t, escala = g/v_t, tau0, comprimento = v_t^2/g, t_impacto).
+    """
+    k_arrasto = 0.5 * p.rho * p.C_d * p.A
+    v_t = np.sqrt(p.m * p.g / k_arrasto)
+    escala = p.g / v_t
+    tau0 = np.arctanh(-v_inicial / v_t)
+    comprimento = v_t ** 2 / p.g
+
+    # acosh(e^L) = L + log(1 + sqrt(1 - e^(-2L))), estável para L grande
+    L = p.altitude_inicial / comprimento + _log_cosh(tau0)
+    t_impacto = (L + np.log1p(np.sqrt(-np.expm1(-2.0 * L))) - tau0) / escala
+    return v_t, escala, tau0, comprimento, t_impacto
+
+
+def _solucao_analitica_queda(p, v_inicial):
+    """
+    Trajetória fechada da queda só com peso + arrasto (ver
+    _coeficientes_queda). Devolve (tempo, altitude, velocidade) na mesma
+    grade do solve_ivp.
+    """
+    v_t, escala, tau0, comprimento, t_impacto = _coeficientes_queda(p, v_inicial)
+    t_final = min(t_impacto, p.tempo_simulacao_max)
+
+    tempo = np.linspace(0.0, t_final, p.n_pontos_saida)
+    x = escala * tempo + tau0
+    velocidade = -v_t * np.tanh(x)
+    altitude = p.altitude_inicial - comprimento * (_log_cosh(x) - _log_cosh(tau0))
+    return tempo, altitude, velocidade
+
+
+def verificar_solucao_analitica(p, v_inicial=None, rtol=1e-10, atol=1e-10):
+    """
+    Compara a solução analítica com o solve_ivp (tolerâncias apertadas,
+    mesmo evento de impacto) para os parâmetros 'p'.
+    Devolve o maior erro absoluto em altitude (m), velocidade (m/s) e
+    no instante final (s).
+    """
+    from scipy.integrate import solve_ivp
+
+    if v_inicial is None:
+        v_inicial = p.velocidade_inicial_padrao
+    tempo, altitude, velocidade = _solucao_analitica_queda(p, v_inicial)
+
+    solucao = solve_ivp(
+        lambda t, state: _modelo_dinamica_queda(t, state, p),
+        (0, p.tempo_simulacao_max),
+        [p.altitude_inicial, v_inicial],
+        method='RK45',
+        events=_atingiu_solo,
+        dense_output=True,
+        rtol=rtol,
+        atol=atol
+    )
+    numerico = solucao.sol(np.minimum(tempo, solucao.t[-1]))
+    return {
+        'erro_altitude': float(np.max(np.abs(numerico[0] - altitude))),
+        'erro_velocidade': float(np.max(np.abs(numerico[1] - velocidade))),
+        'erro_t_final': float(abs(solucao.t[-1] - tempo[-1])),
+    }
+
+
+def velocidade_inicial(p):
+    """Velocidade vertical no instante 0: a de pouso nos cenários de pouso, senão a padrão (0.0)."""
+    if "Pouso" in p.cenario_nome:
+        return p.velocidade_descida_pouso
+    return p.velocidade_inicial_padrao
+
+
+def preparar_rajadas(p, rng):
+    """
+    Série de rajadas da rodada (modelo "ou") ou None (sem turbulência ou
+    modelo "ruido_branco", que sorteia dentro da EDO).
+    """
+    if _codigo_dinamica(p) in (DINAMICA_TURBULENCIA, DINAMICA_POUSO_TURBULENCIA):
+        if p.modelo_rajada == "ou":
+            return gerar_rajadas(p, rng)
+        elif p.modelo_rajada != "ruido_branco":
+            raise ValueError(f"Modelo de rajada desconhecido: {p.modelo_rajada!r}")
+    return None
+
+
+def executar_simulacao(p, rng=None, verbose=True):
     """
     Função principal deste módulo.
     Executa a simulação da física "perfeita".
     Recebe: p (os parâmetros do arquivo parametros.py)
+            rng (opcional): np.random.Generator das rajadas. Se None,
+            usa o estado global do np.random (comportamento original).
+            verbose: False desliga os prints de progresso.
     Devolve: (tempo, altitude_real, velocidade_real, aceleracao_real)
     """
-    print(f"Iniciando simulação da física para: {p.cenario_nome}...")
+    if rng is None:
+        rng = np.random
+
+    if verbose:
+        print(f"Iniciando simulação da física para: {p.cenario_nome}...")
     
     # Define a velocidade inicial com base no cenário
-    if "Pouso" in p.cenario_nome:
-        v_inicial = p.velocidade_descida_pouso 
-        print(f"   -> Usando velocidade inicial de pouso: {v_inicial} m/s")
-    else:
-        v_inicial = p.velocidade_inicial_padrao # Usa 0.0 para outros cenários
-        print(f"   -> Usando velocidade inicial padrão: {v_inicial} m/s")
+    v_inicial = velocidade_inicial(p)
+    if verbose:
+        if "Pouso" in p.cenario_nome:
+            print(f"   -> Usando velocidade inicial de pouso: {v_inicial} m/s")
+        else:
+            print(f"   -> Usando velocidade inicial padrão: {v_inicial} m/s")
 
     estado_inicial = [p.altitude_inicial, v_inicial] # Usa v_inicial
 
+    if _admite_solucao_analitica(p, v_inicial):
+        # Sem rajadas nem controle: dispensa o solve_ivp
+        if verbose:
+            print("   -> Queda só com peso + arrasto: usando a solução analítica")
+        instrumentacao.contar('edo_solucoes_analiticas')
+        (tempo_grafico, altitude_real,
+         velocidade_real) = _solucao_analitica_queda(p, v_inicial)
+        aceleracao_real = np.diff(velocidade_real) / np.diff(tempo_grafico)
+        aceleracao_real = np.insert(aceleracao_real, 0, 0)
+        return (tempo_grafico, altitude_real, velocidade_real, aceleracao_real)
+
+    from scipy.integrate import solve_ivp
+
     tempo_simulacao = (0, p.tempo_simulacao_max)
 
+    # Rajadas: série gerada UMA vez (modelo "ou") em vez de sortear na EDO
+    rajada = preparar_rajadas(p, rng)
+
     solucao = solve_ivp(
-        lambda t, state: _modelo_dinamica_queda(t, state, p), 
+        lambda t, state: _modelo_dinamica_queda(t, state, p, rng, rajada), 
         tempo_simulacao,
         estado_inicial, # Passa o estado inicial correto
         method='RK45',
@@ -95,8 +288,16 @@ def executar_simulacao(p):
         dense_output=True
     )
     
+    # Métricas opcionais (instrumentacao.py). O RK45 gasta 2 avaliações
+    # na partida e 6 por TENTATIVA de passo: o que sobra além dos passos
+    # aceitos foi rejeitado e refeito com um passo menor.
+    passos_aceitos = len(solucao.t) - 1
+    instrumentacao.contar('edo_avaliacoes', solucao.nfev)
+    instrumentacao.contar('edo_passos_aceitos', passos_aceitos)
+    instrumentacao.contar('edo_passos_rejeitados', (solucao.nfev - 2) // 6 - passos_aceitos)
+
     # Preparar resultados
-    tempo_grafico = np.linspace(solucao.t[0], solucao.t[-1], 500)
+    tempo_grafico = np.linspace(solucao.t[0], solucao.t[-1], p.n_pontos_saida)
     estados_grafico = solucao.sol(tempo_grafico)
     
     altitude_real = estados_grafico[0]
@@ -106,4 +307,179 @@ def executar_simulacao(p):
     aceleracao_real = np.diff(velocidade_real) / np.diff(tempo_grafico)
     aceleracao_real = np.insert(aceleracao_real, 0, 0)
     
-    return (tempo_grafico, altitude_real, velocidade_real, aceleracao_real)
\ No newline at end of file
+    return (tempo_grafico, altitude_real, velocidade_real, aceleracao_real)
+
+# --- MODO EM LOTE (MUITOS VEÍCULOS DE UMA VEZ) ---
+
+def _parametros_lote(lista_p):
+    """
+    Junta os parâmetros de N veículos em arrays (N,).
+    O "piloto automático" vira um ganho K e uma velocidade-alvo por
+    veículo (K = 0 na queda livre), e as rajadas um desvio-padrão.
+    """
+    codigos = np.array([_codigo_dinamica(p) for p in lista_p])
+    pouso = (codigos == DINAMICA_POUSO) | (codigos == DINAMICA_POUSO_TURBULENCIA)
+    turbulento = (codigos == DINAMICA_TURBULENCIA) | (codigos == DINAMICA_POUSO_TURBULENCIA)
+
+    def coluna(nome):
+        return np.array([getattr(p, nome) for p in lista_p], dtype=float)
+
+    K = np.where(pouso, coluna('K_pouso_vel'),
+                 np.where(codigos == DINAMICA_TURBULENCIA, coluna('K_nivelado_vel'), 0.0))
+    return {
+        'm': coluna('m'),
+        'peso': -coluna('m') * coluna('g'),
+        'k_arrasto': 0.5 * coluna('rho') * coluna('C_d') * coluna('A'),
+        'K': K,
+        'v_alvo': np.where(pouso, coluna('velocidade_descida_pouso'), 0.0),
+        'sigma_rajada': np.where(turbulento, coluna('forca_rajada_turbulencia') / 3, 0.0),
+        'h0': coluna('altitude_inicial'),
+        'v0': np.where(pouso, coluna('velocidade_descida_pouso'), coluna('velocidade_inicial_padrao')),
+        't_max': coluna('tempo_simulacao_max'),
+    }
+
+
+def _derivadas_lote(h, v, c, forca_rajada):
+    """Mesmas forças de _modelo_dinamica_queda, para arrays de veículos."""
+    forca_arrasto = -c['k_arrasto'] * (v * np.abs(v))
+    forca_controle = c['K'] * (c['v_alvo'] - v)
+    forca_total = c['peso'] + forca_arrasto + forca_controle + forca_rajada
+    return v, forca_total / c['m']
+
+
+def _hermite(y0, y1, d0, d1, s, passo):
+    """Interpolação cúbica de Hermite em s ∈ [0, 1] dentro de um passo."""
+    s2 = s * s
+    s3 = s2 * s
+    return ((2 * s3 - 3 * s2 + 1) * y0 + (s3 - 2 * s2 + s) * passo * d0
+            + (3 * s2 - 2 * s3) * y1 + (s3 - s2) * passo * d1)
+
+
+def _integrar_bloco(c, rajadas, dt, n_pontos):
+    """
+    RK4 de passo fixo para um bloco de veículos, parando cada um no
+    impacto com o solo (máscara) e todos quando o último terminar.
+    rajadas: (2K+1, n) força de rajada nos instantes j*dt/2, ou seja,
+    nas pontas e no meio de cada passo (onde o RK4 avalia a EDO).
+    """
+    n = len(c['m'])
+    K = (rajadas.shape[0] - 1) // 2
+    H = np.empty((K + 1, n))
+    V = np.empty((K + 1, n))
+    H[0], V[0] = c['h0'], c['v0']
+
+    ativo = np.ones(n, dtype=bool)
+    k_final = np.full(n, K - 1)  # último passo usado por cada veículo
+    impactou = np.zeros(n, dtype=bool)
+
+    for k in range(K):
+        h, v = H[k], V[k]
+        f0, f_meio, f1 = rajadas[2 * k], rajadas[2 * k + 1], rajadas[2 * k + 2]
+        k1h, k1v = _derivadas_lote(h, v, c, f0)
+        k2h, k2v = _derivadas_lote(h + 0.5 * dt * k1h, v + 0.5 * dt * k1v, c, f_meio)
+        k3h, k3v = _derivadas_lote(h + 0.5 * dt * k2h, v + 0.5 * dt * k2v, c, f_meio)
+        k4h, k4v = _derivadas_lote(h + dt * k3h, v + dt * k3v, c, f1)
+        H[k + 1] = h + dt / 6 * (k1h + 2 * k2h + 2 * k3h + k4h)
+        V[k + 1] = v + dt / 6 * (k1v + 2 * k2v + 2 * k3v + k4v)
+
+        # Evento "atingiu o solo" (h cruza 0 descendo), por veículo
+        cruzou = ativo & (H[k + 1] <= 0) & (h > 0)
+        impactou |= cruzou
+        k_final[cruzou] = k
+        fim_de_tempo = ativo & ((k + 1) * dt >= c['t_max'])
+        k_final[fim_de_tempo & ~cruzou] = k
+        ativo &= ~(cruzou | fim_de_tempo)
+        if not ativo.any():
+            break
+    instrumentacao.contar('edo_avaliacoes_lote', 4 * (k + 1) * n)
+
+    # Instante do impacto: raiz da cúbica de Hermite no passo do cruzamento
+    colunas = np.arange(n)
+    h0, h1 = H[k_final, colunas], H[k_final + 1, colunas]
+    v0, v1 = V[k_final, colunas], V[k_final + 1, colunas]
+    s_baixo, s_alto = np.zeros(n), np.ones(n)
+    for _ in range(50):
+        s_meio = 0.5 * (s_baixo + s_alto)
+        acima = _hermite(h0, h1, v0, v1, s_meio, dt) > 0
+        s_baixo = np.where(acima, s_meio, s_baixo)
+        s_alto = np.where(acima, s_alto, s_meio)
+    t_final = np.where(impactou, (k_final + s_alto) * dt, c['t_max'])
+
+    # Amostrar cada veículo na sua própria grade linspace(0, t_final, n_pontos)
+    tempo = t_final[:, None] * np.linspace(0.0, 1.0, n_pontos)[None, :]
+    kk = np.minimum((tempo / dt).astype(int), k_final[:, None])
+    s = tempo / dt - kk
+    colunas = np.broadcast_to(colunas[:, None], kk.shape)
+    h0, h1 = H[kk, colunas], H[kk + 1, colunas]
+    v0, v1 = V[kk, colunas], V[kk + 1, colunas]
+    c_pontos = {nome: valor[:, None] for nome, valor in c.items()}
+    _, a0 = _derivadas_lote(h0, v0, c_pontos, rajadas[2 * kk, colunas])
+    _, a1 = _derivadas_lote(h1, v1, c_pontos, rajadas[2 * kk + 2, colunas])
+
+    altitude = _hermite(h0, h1, v0, v1, s, dt)
+    velocidade = _hermite(v0, v1, a0, a1, s, dt)
+    return tempo, altitude, velocidade
+
+
+def _rajadas_lote(lista_p, c, rngs, dt, K):
+    """
+    Força de rajada de cada veículo nos instantes j*dt/2 (j = 0..2K).
+    Modelo "ou": a série de rajadas.py de cada veículo, interpolada.
+    Modelo "ruido_branco": um sorteio independente por instante, o
+    equivalente em lote ao sorteio a cada avaliação da EDO.
+    """
+    tempos = np.arange(2 * K + 1) * (0.5 * dt)
+    rajadas = np.zeros((2 * K + 1, len(lista_p)))
+    for i, p in enumerate(lista_p):
+        if c['sigma_rajada'][i] == 0:
+            continue
+        rng = np.random if rngs is None else rngs[i]
+        if p.modelo_rajada == "ou":
+            rajadas[:, i] = gerar_rajadas(p, rng, duracao=tempos[-1]).amostrar(tempos)
+        elif p.modelo_rajada == "ruido_branco":
+            rajadas[:, i] = rng.normal(0.0, c['sigma_rajada'][i], len(tempos))
+        else:
+            raise ValueError(f"Modelo de rajada desconhecido: {p.modelo_rajada!r}")
+    return rajadas
+
+
+def executar_simulacao_lote(lista_p, rngs=None, dt=0.02, n_pontos=None, tamanho_bloco=1024):
+    """
+    Versão em LOTE de executar_simulacao: integra N veículos (um
+    Parametros por veículo) de uma vez, com um array de estados (N, 2).
+
+    - RK4 de passo fixo 'dt' (em vez do RK45 adaptativo do solve_ivp);
+    - evento de impacto tratado por veículo, como máscara;
+    - rajadas geradas antes da integração (ver _rajadas_lote), com
+      rngs[i] (um Generator por veículo) ou, se rngs for None, com o
+      np.random global;
+    - veículos processados em blocos de 'tamanho_bloco' (memória);
+    - n_pontos: pontos da grade de saída (None = lista_p[0].n_pontos_saida).
+
+    Devolve (tempo, altitude_real, velocidade_real, aceleracao_real),
+    cada um (N, n_pontos), alinhados linha a linha com lista_p. Cada
+    linha usa a mesma grade de executar_simulacao:
+    linspace(0, t_final do veículo, n_pontos).
+    """
+    if n_pontos is None:
+        n_pontos = lista_p[0].n_pontos_saida
+    c = _parametros_lote(lista_p)
+    N = len(lista_p)
+    K = int(np.ceil(c['t_max'].max() / dt))
+    rajadas = _rajadas_lote(lista_p, c, rngs, dt, K)
+
+    tempo = np.empty((N, n_pontos))
+    altitude = np.empty((N, n_pontos))
+    velocidade = np.empty((N, n_pontos))
+    for inicio in range(0, N, tamanho_bloco):
+        fim = min(inicio + tamanho_bloco, N)
+        c_bloco = {nome: valor[inicio:fim] for nome, valor in c.items()}
+        (tempo[inicio:fim], altitude[inicio:fim],
+         velocidade[inicio:fim]) = _integrar_bloco(c_bloco, rajadas[:, inicio:fim], dt, n_pontos)
+
+    # Aceleração como no modo escalar (diferença finita, 0 no início)
+    aceleracao = np.zeros_like(velocidade)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        aceleracao[:, 1:] = np.diff(velocidade, axis=1) / np.diff(tempo, axis=1)
+
+    return (tempo, altitude, velocidade, aceleracao)
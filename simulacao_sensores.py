@@ -1,98 +1,240 @@
 # 📄 simulacao_sensores.py
 import numpy as np
-import pandas as pd
 
-def simular_sensores_e_filtros(p, tempo, alt_real, vel_real, acel_real):
+from caracteristicas import media_movel
+
+# Perfil de pitch "real" de cada cenário (os casos do antigo loop por amostra)
+PITCH_NIVELADO = 0     # Nenhum caso casa (ex.: Flat Spin): pitch sempre 0
+PITCH_MERGULHO = 1     # Queda ou Pouso: rampa de 3 s até o pitch de mergulho
+PITCH_TURBULENCIA = 2  # Turbulência: oscila em torno do pitch base na janela
+
+
+def _codigo_pitch(p):
+    """Traduz o nome do cenário no perfil de pitch (mesma ordem de testes do loop original)."""
+    if "Pouso com Turbulência" in p.cenario_nome:
+        return PITCH_TURBULENCIA
+    elif "Queda" in p.cenario_nome or "Pouso" in p.cenario_nome:
+        return PITCH_MERGULHO
+    elif "Turbulência" in p.cenario_nome:
+        return PITCH_TURBULENCIA
+    return PITCH_NIVELADO
+
+
+def _coluna(p, nome):
     """
-    Função principal: "Suja" todos os dados e aplica filtros.
+    Parâmetro 'nome' pronto para broadcasting com arrays (N, T):
+    um escalar para um único Parametros, ou uma coluna (N, 1) para uma
+    lista de Parametros (um por rodada do lote).
+    """
+    if isinstance(p, (list, tuple)):
+        return np.array([getattr(q, nome) for q in p], dtype=float)[:, None]
+    return getattr(p, nome)
+
+
+def _grupos(p, chave):
+    """
+    Linhas do lote agrupadas por chave(Parametros) (os campos que a
+    etapa usa): lista de (Parametros do grupo, linhas). Um Parametros
+    só vale para todas as linhas: um grupo com slice(None).
+    """
+    if not isinstance(p, (list, tuple)):
+        return [(p, slice(None))]
+    grupos = {}
+    for linha, q in enumerate(p):
+        grupos.setdefault(chave(q), []).append(linha)
+    return [(p[linhas[0]], linhas) for linhas in grupos.values()]
+
+
+def _indices_leitura_gnss(tempo, agenda):
+    """
+    Índices das amostras em que o GNSS faz uma leitura nova.
+
+    Reproduz o loop original: lê na primeira amostra com t >= próxima
+    atualização e só então avança a agenda de UM intervalo. Se a grade
+    for mais grossa que o intervalo do GNSS a agenda "atrasa" e cada
+    amostra vira uma leitura: com j_k = i_k - k isso é um máximo
+    acumulado, sem loop.
+    """
+    k = np.arange(len(agenda))
+    j = np.maximum.accumulate(np.searchsorted(tempo, agenda, side='left') - k)
+    indices = j + k
+    return indices[indices < len(tempo)]
+
+
+def _leituras_gnss(p, tempo):
+    """
+    Máscara (N, T) das amostras em que o GNSS faz uma leitura nova
+    (a agenda só depende do tempo, não da trajetória).
+    """
+    N, T = tempo.shape
+    intervalo = np.broadcast_to(1.0 / np.asarray(_coluna(p, 'taxa_atualizacao_gnss')), (N, 1))
+    t_max = tempo.max(axis=1, keepdims=True)
+    n_agenda = int(np.max(np.ceil(t_max / intervalo))) + 2
+
+    # Agenda somada passo a passo (cumsum), como o 'proxima += intervalo' original
+    agenda = np.zeros((N, n_agenda))
+    agenda[:, 1:] = np.cumsum(np.broadcast_to(intervalo, (N, n_agenda - 1)), axis=1)
+
+    leitura = np.zeros((N, T), dtype=bool)
+    for linha in range(N):  # searchsorted não tem versão em lote
+        leitura[linha, _indices_leitura_gnss(tempo[linha], agenda[linha])] = True
+    leitura[:, 0] = True  # antes da 1ª leitura vale a leitura inicial (t[0])
+    return leitura
+
+
+def _altitude_gnss(p, tempo, alt_real, ruido):
+    """
+    GNSS com "amostra e segura": cada amostra repete a última leitura
+    (altitude real + ruído) feita até ela. Arrays (N, T).
     """
-    print("Iniciando simulação dos sensores...")
-
-    # --- 1. INICIALIZAÇÃO ---
-    
-    # Inicializa arrays vazios que serão preenchidos DENTRO do loop
-    altitude_gnss = np.zeros_like(alt_real)
-    pitch_real_graus = np.zeros_like(tempo)
-    
-    # Variáveis de estado para o GNSS
-    ultima_leitura_gnss = alt_real[0] + np.random.normal(0, p.sigma_ruido_gnss)
-    proxima_atualizacao_gnss = 0.0
-    intervalo_gnss = 1.0 / p.taxa_atualizacao_gnss
-    
-    # Variáveis de estado para a Turbulência
-    tempo_fim_turbulencia = p.tempo_inicio_turbulencia + p.duracao_turbulencia
-
-    # --- 2. LOOP PRINCIPAL DE SIMULAÇÃO DE SENSORES ---
-    # (UM ÚNICO LOOP para calcular tudo que depende do tempo)
-    
-    for i in range(len(tempo)):
-        t = tempo[i] # Tempo atual
-
-        # --- Lógica do Altímetro GNSS (passo-a-passo) ---
-        if t >= proxima_atualizacao_gnss:
-            ultima_leitura_gnss = alt_real[i] + np.random.normal(0, p.sigma_ruido_gnss)
-            proxima_atualizacao_gnss += intervalo_gnss
-        altitude_gnss[i] = ultima_leitura_gnss # Salva a leitura (nova ou antiga)
-
-        # --- Lógica do Pitch ---
-
-        # CASO 1: POUSO COM TURBULÊNCIA (O mais específico)
-        if "Pouso com Turbulência" in p.cenario_nome:
-            tempo_fim_turbulencia = p.tempo_inicio_turbulencia + p.duracao_turbulencia
-            if p.tempo_inicio_turbulencia <= t < tempo_fim_turbulencia:
-                # Oscila em torno do pitch base de POUSO (-5)
-                oscilacao = np.random.normal(0, p.amplitude_pitch_turbulencia / 3)
-                pitch_real_graus[i] = p.pitch_base_graus + oscilacao 
-            else:
-                pitch_real_graus[i] = p.pitch_base_graus # Mantém -5
-
-        # CASO 2: SÓ QUEDA ou SÓ POUSO (Sem turbulência no sensor)
-        elif "Queda" in p.cenario_nome or "Pouso" in p.cenario_nome:
-            if t < p.tempo_inicio_mergulho:
-                pitch_real_graus[i] = 0.0
-            else:
-                fracao = min(1.0, (t - p.tempo_inicio_mergulho) / 3.0) 
-                pitch_real_graus[i] = fracao * p.pitch_mergulho_graus # (-45 ou -5)
-
-        # CASO 3: SÓ TURBULÊNCIA (Voo nivelado)
-        elif "Turbulência" in p.cenario_nome:
-            tempo_fim_turbulencia = p.tempo_inicio_turbulencia + p.duracao_turbulencia
-            if p.tempo_inicio_turbulencia <= t < tempo_fim_turbulencia:
-                # Oscila em torno do pitch base NIVELADO (0)
-                oscilacao = np.random.normal(0, p.amplitude_pitch_turbulencia / 3)
-                pitch_real_graus[i] = p.pitch_base_graus + oscilacao # (p.pitch_base_graus é 0)
-            else:
-                pitch_real_graus[i] = p.pitch_base_graus
+    T = alt_real.shape[1]
+    leitura = _leituras_gnss(p, tempo)
+
+    # Índice da última leitura de cada amostra
+    ultimo = np.maximum.accumulate(np.where(leitura, np.arange(T), 0), axis=1)
+    return np.take_along_axis(alt_real + ruido, ultimo, axis=1)
+
+
+def _pitch_real(p, tempo, oscilacao):
+    """Perfil de pitch "verdadeiro" (graus), montado com máscaras. Arrays (N, T)."""
+    if isinstance(p, (list, tuple)):
+        codigo = np.array([_codigo_pitch(q) for q in p])[:, None]
+    else:
+        codigo = _codigo_pitch(p)
+
+    # Queda ou Pouso: 0 até o mergulho, depois rampa de 3 s até o pitch final
+    inicio_mergulho = _coluna(p, 'tempo_inicio_mergulho')
+    fracao = np.minimum(1.0, (tempo - inicio_mergulho) / 3.0)
+    mergulho = np.where(tempo < inicio_mergulho, 0.0, fracao * _coluna(p, 'pitch_mergulho_graus'))
+
+    # Turbulência: oscila em torno do pitch base dentro da janela
+    inicio = _coluna(p, 'tempo_inicio_turbulencia')
+    fim = inicio + _coluna(p, 'duracao_turbulencia')
+    base = _coluna(p, 'pitch_base_graus')
+    na_janela = (inicio <= tempo) & (tempo < fim)
+    turbulencia = base + np.where(na_janela, oscilacao, 0.0)
+
+    return np.select(
+        [codigo == PITCH_MERGULHO, codigo == PITCH_TURBULENCIA],
+        [mergulho, turbulencia],
+        default=0.0
+    )
 
+
+def _sortear_ruidos(p, rng, formato):
+    """
+    Ruídos de uma rodada (ou lote), sorteados de uma vez e sempre na
+    mesma ordem: (ruido_gnss, oscilacao_pitch, ruido_giro, ruido_acel).
+    Amostras não usadas são descartadas.
+    """
+    if isinstance(rng, (list, tuple)):
+        # Um gerador por linha: cada linha sorteia como uma rodada sozinha
+        normais = np.empty((4,) + formato)
+        for linha, gerador in enumerate(rng):
+            for k in range(4):
+                normais[k, linha] = gerador.normal(0, 1, formato[1])
     else:
-         pitch_real_graus[i] = 0.0
-    # --- FIM DA LÓGICA DO PITCH ---
-    # --- FIM DO LOOP PRINCIPAL ---
-
-    # --- 3. CÁLCULOS PÓS-LOOP (Baseados em arrays completos) ---
-    
-    # Adiciona ruído ao Pitch (agora que pitch_real_graus está preenchido)
-    ruido_giro = np.random.normal(0, p.sigma_ruido_giro, len(pitch_real_graus))
+        normais = [rng.normal(0, 1, formato) for _ in range(4)]
+    sigma_pitch = np.asarray(_coluna(p, 'amplitude_pitch_turbulencia')) / 3
+    ruido_gnss = normais[0] * _coluna(p, 'sigma_ruido_gnss')
+    oscilacao = normais[1] * sigma_pitch
+    ruido_giro = normais[2] * _coluna(p, 'sigma_ruido_giro')
+    ruido_branco_acel = normais[3] * _coluna(p, 'sigma_ruido_acel')
+    return ruido_gnss, oscilacao, ruido_giro, ruido_branco_acel
+
+
+# Campos do Parametros que cada estimador de velocidade lê (ver _filtrar_velocidade)
+CAMPOS_ESTIMADOR = {
+    "media_movel": ('tamanho_janela_filtro',),
+    "kalman": ('sigma_ruido_gnss', 'kalman_sigma_acel', 'kalman_sigma_bias',
+               'kalman_sigma_velocidade_inicial', 'kalman_sigma_bias_inicial'),
+}
+
+
+def _chave_estimador(p):
+    """O estimador da rodada e os campos que ele lê (rodadas com a mesma chave filtram juntas)."""
+    if p.estimador_velocidade not in CAMPOS_ESTIMADOR:
+        raise ValueError(f"Estimador de velocidade desconhecido: {p.estimador_velocidade!r}")
+    return (p.estimador_velocidade,) + tuple(getattr(p, campo) for campo in CAMPOS_ESTIMADOR[p.estimador_velocidade])
+
+
+def _filtrar_velocidade(p, tempo, velocidade_estimada_gnss, altitude_gnss, aceleracao_imu):
+    """
+    Velocidade filtrada (N, T): média móvel ao longo do tempo (soma
+    acumulada, ver caracteristicas.py) ou estimador GNSS + IMU, que não
+    atrasa (ver estimador.py). No lote cada linha usa o estimador (e a
+    janela ou os ruídos) do seu 'p': as linhas são agrupadas por
+    _chave_estimador e cada grupo é filtrado de uma vez.
+    """
+    velocidade_filtrada = np.empty(velocidade_estimada_gnss.shape)
+    for q, linhas in _grupos(p, _chave_estimador):
+        if q.estimador_velocidade == "media_movel":
+            velocidade_filtrada[linhas] = media_movel(velocidade_estimada_gnss[linhas], q.tamanho_janela_filtro)
+        else:
+            from estimador import estimar_lote
+            velocidade_filtrada[linhas] = estimar_lote(q, tempo[linhas], altitude_gnss[linhas],
+                                                       aceleracao_imu[linhas])['velocidade']
+    return velocidade_filtrada
+
+
+def simular_sensores_e_filtros(p, tempo, alt_real, vel_real, acel_real, rng=None, verbose=True):
+    """
+    Função principal: "Suja" todos os dados e aplica filtros.
+    rng (opcional): np.random.Generator dos ruídos. Se None, usa o
+    estado global do np.random (comportamento original). No lote pode
+    ser uma lista com um Generator por rodada: cada linha sai igual à
+    rodada sozinha com o seu gerador.
+    verbose: False desliga o print de progresso.
+
+    Aceita uma rodada (arrays (T,)) ou um LOTE de rodadas (arrays
+    (N, T), como os de executar_simulacao_lote). No lote, 'p' pode ser
+    um Parametros para todas as rodadas ou uma lista com um por rodada,
+    e 'tempo' pode ser (T,) comum ou (N, T). Os arrays devolvidos têm o
+    formato das entradas.
+    """
+    if rng is None:
+        rng = np.random
+
+    if verbose:
+        print("Iniciando simulação dos sensores...")
+
+    # --- 1. PREPARAÇÃO (tudo como (N, T)) ---
+    lote = np.ndim(alt_real) == 2 or np.ndim(tempo) == 2
+    alt_real = np.atleast_2d(alt_real)
+    acel_real = np.atleast_2d(acel_real)
+    tempo = np.broadcast_to(np.atleast_2d(tempo), alt_real.shape)
+    formato = alt_real.shape
+
+    # Ruídos sorteados de uma vez
+    ruido_gnss, oscilacao, ruido_giro, ruido_branco_acel = _sortear_ruidos(p, rng, formato)
+
+    # --- 2. SENSORES ---
+
+    # Altímetro GNSS (amostra e segura na taxa de atualização)
+    altitude_gnss = _altitude_gnss(p, tempo, alt_real, ruido_gnss)
+
+    # Giroscópio: perfil de pitch do cenário + ruído
+    pitch_real_graus = _pitch_real(p, tempo, oscilacao)
     pitch_sensor_giro = pitch_real_graus + ruido_giro
-    
+
     # Simular Acelerômetro (IMU)
-    ruido_branco_acel = np.random.normal(0, p.sigma_ruido_acel, len(acel_real))
-    aceleracao_imu = acel_real + p.bias_acel + ruido_branco_acel
+    aceleracao_imu = acel_real + _coluna(p, 'bias_acel') + ruido_branco_acel
 
     # Simular Velocidade (Derivada do GNSS)
-    velocidade_estimada_gnss = np.diff(altitude_gnss) / np.diff(tempo)
-    velocidade_estimada_gnss = np.insert(velocidade_estimada_gnss, 0, 0)
+    velocidade_estimada_gnss = np.zeros(formato)
+    velocidade_estimada_gnss[:, 1:] = np.diff(altitude_gnss, axis=1) / np.diff(tempo, axis=1)
 
     # FILTRAR Velocidade (Pré-processamento)
-    velocidade_suja_series = pd.Series(velocidade_estimada_gnss)
-    velocidade_filtrada_gnss = velocidade_suja_series.rolling(
-        window=p.tamanho_janela_filtro, min_periods=1
-    ).mean().to_numpy()
+    velocidade_filtrada_gnss = _filtrar_velocidade(p, tempo, velocidade_estimada_gnss,
+                                                   altitude_gnss, aceleracao_imu)
 
-    return {
+    dados = {
         "altitude_gnss": altitude_gnss,
         "aceleracao_imu": aceleracao_imu,
         "velocidade_estimada_gnss": velocidade_estimada_gnss,
         "velocidade_filtrada_gnss": velocidade_filtrada_gnss,
         "pitch_sensor_giro": pitch_sensor_giro
-    }
\ No newline at end of file
+    }
+    if not lote:
+        dados = {nome: valor[0] for nome, valor in dados.items()}
+    return dados
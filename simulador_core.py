@@ -4,28 +4,177 @@
 # Ele faz todo o trabalho, recebendo 'p' como argumento.
 
 # 1. Importar os módulos
+# (visualizacao, e com ele matplotlib/IPython, só é importado no modo
+#  com gráficos: o modo "headless" não paga esse custo)
 import simulacao_fisica as fisica
 import simulacao_sensores as sensores
 import logica_decisao as cerebro
-import visualizacao as plots
 import numpy as np # Adicionado por segurança
-import pandas as pd # Adicionado por segurança
-import matplotlib.pyplot as plt # Adicionado por segurança
+import zlib
+import instrumentacao
+import cache_etapas
+from resultado import ResultadoSimulacao
 
-def rodar_simulacao_completa(p):
+
+def criar_geradores(semente, cenario_nome):
+    """
+    Cria os geradores aleatórios INDEPENDENTES de uma rodada.
+    Dependem só de (semente, nome do cenário), então a mesma rodada dá
+    o mesmo resultado em qualquer ordem e em qualquer processo.
+    Devolve (rng_fisica, rng_sensores).
+    """
+    chave_cenario = zlib.crc32(cenario_nome.encode('utf-8'))
+    sequencia = np.random.SeedSequence([semente, chave_cenario])
+    rng_fisica, rng_sensores = (np.random.default_rng(s) for s in sequencia.spawn(2))
+    return rng_fisica, rng_sensores
+
+
+# Nomes das saídas de executar_simulacao (a física vira um dict no cache)
+_SAIDAS_FISICA = ('tempo', 'altitude_real', 'velocidade_real', 'aceleracao_real')
+
+
+class _Etapas:
+    """
+    Executa as etapas de uma rodada passando pelo cache_etapas quando
+    ele vale (usar_cache, ou p.cache_etapas se None, e semente
+    definida); senão, calcula direto.
+    """
+
+    def __init__(self, p, semente, motor, verbose=False, usar_cache=None):
+        if usar_cache is None:
+            usar_cache = p.cache_etapas
+        self.usar_cache = usar_cache and semente is not None
+        self.verbose = verbose
+        if self.usar_cache:
+            self.cache = cache_etapas.obter_cache(p)
+            self.chaves = cache_etapas.chaves_etapas(p, semente, motor)
+
+    def obter(self, etapa, calcular):
+        if not self.usar_cache:
+            return calcular()
+        calculou = []
+
+        def calcular_e_marcar():
+            calculou.append(True)
+            return calcular()
+        valor = self.cache.obter(etapa, self.chaves[etapa], calcular_e_marcar)
+        if self.verbose and not calculou:
+            print(f"Etapa '{etapa}' reaproveitada do cache (parâmetros e código sem mudança).")
+        return valor
+
+    def fisica(self, calcular):
+        saida = self.obter('fisica', lambda: dict(zip(_SAIDAS_FISICA, calcular())))
+        return tuple(saida[nome] for nome in _SAIDAS_FISICA)
+
+    def decisao(self, p, tempo, dados_sensores, motor, rastro=None):
+        def calcular():
+            entradas_fuzzy = cerebro.calcular_entradas_fuzzy(p, tempo, dados_sensores)
+            risco, sem_regra = cerebro.calcular_risco(p, entradas_fuzzy, motor, rastro=rastro)
+            return {**entradas_fuzzy, 'risco': risco, 'sem_regra': sem_regra}
+        # O rastro só sai da inferência: com ele, a decisão não vem do cache
+        saida = calcular() if rastro is not None else self.obter('decisao', calcular)
+        entradas_fuzzy = {nome: valor for nome, valor in saida.items() if nome not in ('risco', 'sem_regra')}
+        return entradas_fuzzy, saida['risco'], saida['sem_regra']
+
+
+def rodar_simulacao_headless(p, semente=None, motor=None, instrumentar=False, arquivo_trace=None,
+                             rastrear=False):
+    """
+    Executa UMA simulação completa SEM gráficos, sem Markdown e sem
+    prints (para campanhas e processos em lote).
+    semente (opcional): ver criar_geradores. Se None, usa o np.random global.
+    Com semente e p.cache_etapas (desligado por padrão), as etapas que
+    não mudaram vêm do cache (ver cache_etapas.py).
+    motor (opcional): motor fuzzy (ver logica_decisao.calcular_risco);
+    se None, usa p.motor_fuzzy.
+    instrumentar: coleta tempos por estágio e contadores (instrumentacao.py)
+    em resultado.metricas; arquivo_trace também salva o trace em JSON.
+    rastrear: grava em resultado.rastro as forças das regras e as
+    pertinências de cada amostra (rastro_regras.py; motores "vetorizado"
+    e "analitico").
+    Devolve um ResultadoSimulacao.
+    """
+    if instrumentar or arquivo_trace:
+        with instrumentacao.coletar() as coletor:
+            resultado = rodar_simulacao_headless(p, semente, motor, rastrear=rastrear)
+        if arquivo_trace:
+            coletor.exportar_trace(arquivo_trace)
+        resultado.metricas = coletor.metricas()
+        return resultado
+
+    rng_fisica, rng_sensores = (None, None) if semente is None else criar_geradores(semente, p.cenario_nome)
+    etapas = _Etapas(p, semente, motor)
+
+    # Cada etapa escreve direto no bloco do resultado (ver resultado.py)
+    with instrumentacao.medir("fisica"):
+        (tempo, alt_real, vel_real, acel_real) = etapas.fisica(
+            lambda: fisica.executar_simulacao(p, rng=rng_fisica, verbose=False)
+        )
+        resultado = ResultadoSimulacao.alocar(p.cenario_nome, semente, len(tempo), p.dtype_resultado)
+        resultado.tempo = tempo
+        resultado.altitude_real = alt_real
+        resultado.velocidade_real = vel_real
+        resultado.aceleracao_real = acel_real
+    with instrumentacao.medir("sensores"):
+        dados_sensores = etapas.obter('sensores', lambda: sensores.simular_sensores_e_filtros(
+            p, tempo, alt_real, vel_real, acel_real, rng=rng_sensores, verbose=False
+        ))
+        resultado.sensores = dados_sensores
+    with instrumentacao.medir("decisao"):
+        if rastrear:
+            from rastro_regras import RastroRegras
+            resultado.rastro = RastroRegras(tempo)
+        entradas_fuzzy, risco, sem_regra = etapas.decisao(p, tempo, dados_sensores, motor, resultado.rastro)
+        resultado.severidade_pid = entradas_fuzzy['severidade_pid']
+        resultado.pitch_medio = entradas_fuzzy['pitch_medio']
+        resultado.proximidade_v_terminal = entradas_fuzzy['proximidade_v_terminal']
+        resultado.risco = risco
+        resultado.sem_regra[:] = sem_regra
+    with instrumentacao.medir("disparo"):
+        # Sobre o risco em float64 (não o do bloco, que pode ser float32)
+        resultado.disparo = cerebro.calcular_disparo(p, tempo, risco)
+    return resultado
+
+
+def rodar_simulacao_completa(p, semente=None, instrumentar=False, arquivo_trace=None, cache=True):
     """
     Executa UMA simulação completa, do início ao fim,
     baseado no objeto de parâmetros 'p' fornecido.
+    semente (opcional): torna a rodada reprodutível (ver criar_geradores).
+    Se None, usa o estado global do np.random, como antes. Com semente
+    e cache=True (o padrão aqui, independente de p.cache_etapas),
+    re-executar a célula só recalcula as etapas cujos parâmetros ou
+    código mudaram (ver cache_etapas.py).
+    instrumentar: devolve o dict de métricas da rodada (tempos por
+    estágio e contadores, ver instrumentacao.py); arquivo_trace também
+    salva o trace em JSON.
     """
+    if instrumentar or arquivo_trace:
+        with instrumentacao.coletar() as coletor:
+            rodar_simulacao_completa(p, semente, cache=cache)
+        if arquivo_trace:
+            coletor.exportar_trace(arquivo_trace)
+        return coletor.metricas()
+
+    import visualizacao as plots
+
+    rng_fisica, rng_sensores = (None, None) if semente is None else criar_geradores(semente, p.cenario_nome)
+    etapas = _Etapas(p, semente, None, verbose=True, usar_cache=cache)
     
     # 2. Executar a Simulação da Física
-    (tempo, alt_real, vel_real, acel_real) = fisica.executar_simulacao(p)
+    with instrumentacao.medir("fisica"):
+        (tempo, alt_real, vel_real, acel_real) = etapas.fisica(
+            lambda: fisica.executar_simulacao(p, rng=rng_fisica)
+        )
 
     # Plotar Gráfico 1 (O Problema)
     plots.plotar_fisica_base(tempo, alt_real, vel_real)
 
     # 3. Executar a Simulação dos Sensores
-    dados_sensores = sensores.simular_sensores_e_filtros(p, tempo, alt_real, vel_real, acel_real)
+    with instrumentacao.medir("sensores"):
+        dados_sensores = etapas.obter('sensores', lambda: sensores.simular_sensores_e_filtros(
+            p, tempo, alt_real, vel_real, acel_real, rng=rng_sensores
+        ))
 
     # --- BLOCO DE PLOTAGEM ATUALIZADO ---
     dados_reais = {
@@ -40,11 +189,12 @@ def rodar_simulacao_completa(p):
     #    (O PID agora é calculado DENTRO da função fuzzy)
 
     # B. Calcular Risco (Fuzzy)
-    (risco_final, 
-     severidade_pid_final, # <-- CAPTURA A SAÍDA DO PID
-     pitch_medio_final, prox_v_term_final, fuzzy_vars, fuzzy_defs) = cerebro.criar_e_calcular_risco_fuzzy(
-        p, tempo, dados_sensores
-    )
+    with instrumentacao.medir("decisao"):
+        (risco_final, 
+         severidade_pid_final, # <-- CAPTURA A SAÍDA DO PID
+         pitch_medio_final, prox_v_term_final, fuzzy_vars, fuzzy_defs) = cerebro.criar_e_calcular_risco_fuzzy(
+            p, tempo, dados_sensores, decisao=etapas.decisao(p, tempo, dados_sensores, None)
+        )
 
     # 5. Visualizar o Resultado Principal
     # Plotar Gráfico 3 (A Decisão)
@@ -0,0 +1,8 @@
+# 📄 tests/conftest.py
+# Os módulos do projeto ficam na raiz do repositório (sem pacote):
+# põe a raiz no sys.path para os testes importarem como o notebook.
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("MPLBACKEND", "Agg")
@@ -0,0 +1,21 @@
+# 📄 tests/test_armazenamento.py
+from unittest import mock
+
+import armazenamento
+import campanha
+import parametros as params
+import simulador_core
+
+
+def test_verificar_armazem_usa_o_motor_da_campanha(tmp_path):
+    diretorio = str(tmp_path / "armazem")
+    fabricas = [params.get_cenario_1_queda]
+    campanha.rodar_campanha(fabricas, range(2), n_processos=1, motor="analitico", armazem=diretorio)
+    try:
+        assert armazenamento.ArmazemResultados.abrir(diretorio).meta['motor'] == "analitico"
+        with mock.patch.object(simulador_core, 'rodar_simulacao_headless',
+                               wraps=simulador_core.rodar_simulacao_headless) as rodar:
+            assert armazenamento.verificar_armazem(diretorio, fabricas, n_amostras=2) < 1e-3
+        assert {chamada.kwargs['motor'] for chamada in rodar.call_args_list} == {"analitico"}
+    finally:
+        armazenamento.fechar_abertos(diretorio)
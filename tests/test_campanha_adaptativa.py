@@ -0,0 +1,21 @@
+# 📄 tests/test_campanha_adaptativa.py
+from unittest import mock
+
+import pytest
+
+import campanha_adaptativa
+import parametros as params
+
+
+def _turbulencia_ruido_branco():
+    p = params.get_cenario_3_turbulencia()
+    p.modelo_rajada = "ruido_branco"
+    return p
+
+
+def test_escala_rajada_recusada_antes_de_rodar():
+    with mock.patch.object(campanha_adaptativa, '_executar_rodada') as rodada:
+        with pytest.raises(ValueError):
+            campanha_adaptativa.rodar_campanha_adaptativa([_turbulencia_ruido_branco], escala_rajada=1.05,
+                                                          n_processos=1)
+    rodada.assert_not_called()
@@ -0,0 +1,26 @@
+# 📄 tests/test_cosimulacao.py
+import numpy as np
+import pytest
+
+import parametros as params
+from cosimulacao import executar_cosimulacao, verificar_paridade_lote
+
+CENARIOS = [params.get_cenario_1_queda, params.get_cenario_2_pouso, params.get_cenario_3_turbulencia,
+            params.get_cenario_4_flat_spin, params.get_cenario_5_pouso_turbulencia]
+
+
+@pytest.mark.parametrize("fabrica", CENARIOS, ids=lambda fabrica: fabrica.__name__)
+def test_cosimulacao_igual_ao_lote(fabrica):
+    # Mesma semente: mesma trajetória e mesmo risco até o disparo
+    paridade = verificar_paridade_lote(fabrica(), semente=0)
+    assert paridade['erro_altitude'] < 1e-9
+    assert paridade['erro_risco'] < 1e-9
+    assert paridade['i_disparo_cosimulacao'] == paridade['i_disparo_lote']
+
+
+def test_descida_com_paraquedas_ate_o_solo():
+    resultado = executar_cosimulacao(params.get_cenario_1_queda(), 0)
+    paraquedas = resultado.paraquedas
+    assert resultado.disparado and paraquedas['tocou_solo']
+    assert np.isfinite(paraquedas['t_impacto']) and paraquedas['t_impacto'] > paraquedas['t_acionamento']
+    assert np.isfinite(paraquedas['v_impacto'])
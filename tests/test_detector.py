@@ -0,0 +1,35 @@
+# 📄 tests/test_detector.py
+import pytest
+
+import parametros as params
+from detector import DetectorDeParaquedas, verificar_paridade_lote
+from simulador_core import rodar_simulacao_headless
+
+CENARIOS = [params.get_cenario_1_queda, params.get_cenario_2_pouso, params.get_cenario_3_turbulencia,
+            params.get_cenario_4_flat_spin, params.get_cenario_5_pouso_turbulencia]
+
+
+@pytest.mark.parametrize("motor", [None, "vetorizado", "analitico", "tabela"])
+@pytest.mark.parametrize("fabrica", CENARIOS, ids=lambda fabrica: fabrica.__name__)
+def test_detector_igual_ao_lote(fabrica, motor):
+    # Caminho escalar (calcular_amostra) contra o calcular() em lote de cada motor
+    # (None: o analítico do detector contra o vetorizado do lote)
+    paridade = verificar_paridade_lote(fabrica(), semente=0, motor=motor)
+    assert paridade['erro_risco'] < 1e-9
+    assert paridade['i_disparo_detector'] == paridade['i_disparo_lote']
+    assert paridade['eventos_iguais']
+
+
+def test_estado_dos_eventos_nao_cresce():
+    p = params.get_cenario_4_flat_spin()  # ativa e reseta o timer antes do disparo
+    resultado = rodar_simulacao_headless(p, 0)
+    sensores = resultado.sensores
+    detector = DetectorDeParaquedas(p, resultado.tempo[1] - resultado.tempo[0])
+    completo = DetectorDeParaquedas(p, resultado.tempo[1] - resultado.tempo[0], registrar_eventos=True)
+    for i in range(len(resultado.tempo)):
+        leitura = (sensores['altitude_gnss'][i], sensores['aceleracao_imu'][i], sensores['pitch_sensor_giro'][i])
+        detector.step(*leitura)
+        completo.step(*leitura)
+    assert detector.eventos is None
+    assert detector.n_eventos == len(completo.eventos) > 2
+    assert detector.ultimo_evento == completo.eventos[-1]
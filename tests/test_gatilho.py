@@ -0,0 +1,39 @@
+# 📄 tests/test_gatilho.py
+import numpy as np
+
+import gatilho
+import parametros as params
+
+
+def test_paridade_com_calcular_disparo():
+    # avaliar_disparos contra o loop de TimerDisparo (calcular_disparo)
+    assert gatilho.verificar_paridade(n_rodadas=60, n_pontos=300) == 0
+
+
+def test_matrizes_em_serie_montada_a_mao():
+    tempo = np.arange(21) * 0.5  # 0 a 10 s
+    risco = np.full((4, len(tempo)), 50.0)
+    risco[0, 6:] = 95.0                    # queda: ativa em 3.0 s e não solta
+    risco[1, 4] = risco[1, 10:] = 95.0     # queda: pico em 2.0 s, ativa de vez em 5.0 s
+    risco[2, 4:6] = 95.0                   # pouso: pico de duas amostras
+    queda, pouso = params.get_cenario_1_queda(), params.get_cenario_2_pouso()
+    cenarios = [queda.cenario_nome] * 2 + [pouso.cenario_nome] * 2
+    disparo_esperado = [queda.disparo_esperado] * 2 + [pouso.disparo_esperado] * 2
+    t_inicio_falha = [queda.tempo_inicio_falha] * 2 + [pouso.tempo_inicio_falha] * 2
+    assert queda.tempo_inicio_falha == queda.tempo_inicio_mergulho == 2.0  # latência conta do mergulho
+
+    # reset 70: o risco 50 entre os picos zera o timer; reset 40: o timer segue ativo
+    matrizes = gatilho.matrizes_por_cenario(tempo, risco, cenarios, disparo_esperado, t_inicio_falha,
+                                            [90.0], [70.0, 40.0], [1.0, 3.0])
+    m_queda, m_pouso = matrizes[queda.cenario_nome], matrizes[pouso.cenario_nome]
+    # Disparos da queda (s): reset 70 -> [3.5, 5.5] e [5.5, 7.5]; reset 40 -> [3.5, 2.5] e [5.5, 4.5]
+    np.testing.assert_allclose(m_queda['taxa_disparo'][0], [[1.0, 1.0], [1.0, 1.0]])
+    np.testing.assert_allclose(m_queda['latencia_media'][0], [[2.5, 4.5], [1.0, 3.0]])
+    np.testing.assert_allclose(m_queda['latencia_max'][0], [[3.5, 5.5], [1.5, 3.5]])
+    # Falso disparo do pouso: só a rodada com o pico, e com 3 s só se o timer não resetar
+    np.testing.assert_allclose(m_pouso['taxa_disparo'][0], [[0.5, 0.0], [0.5, 0.5]])
+    np.testing.assert_allclose(m_pouso['latencia_max'][0], [[2.5, np.nan], [2.5, 4.5]])
+
+    resumo = gatilho.resumir_limiares(matrizes)
+    np.testing.assert_allclose(resumo['taxa_falso_disparo'][0], m_pouso['taxa_disparo'][0])
+    np.testing.assert_allclose(resumo['latencia_media'][0], m_queda['latencia_media'][0])
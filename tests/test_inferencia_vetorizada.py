@@ -0,0 +1,25 @@
+# 📄 tests/test_inferencia_vetorizada.py
+import os
+
+import parametros as params
+import inferencia_vetorizada as iv
+from cache_etapas import ParametrosRegistrados
+
+
+def test_paridade_com_skfuzzy():
+    assert iv.verificar_paridade(params.Parametros()) <= iv.TOLERANCIA_PARIDADE
+
+
+def test_campos_do_motor_na_chave():
+    espiao = ParametrosRegistrados(params.Parametros())
+    iv.criar_sistema_vetorizado(espiao)
+    assert espiao.lidos <= set(iv.CAMPOS_MOTOR)
+
+
+def test_cache_relativo_a_pasta_do_projeto(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    p = params.Parametros()
+    projeto = os.path.dirname(os.path.abspath(iv.__file__))
+    assert iv.diretorio_cache(p) == os.path.join(projeto, p.superficie_diretorio_cache)
+    p.superficie_diretorio_cache = None
+    assert iv.diretorio_cache(p) is None
@@ -0,0 +1,16 @@
+# 📄 tests/test_pid_lote.py
+import pytest
+
+import parametros as params
+import pid_lote
+
+# pid_lote reproduz o simple_pid com as mesmas contas: idêntico bit a bit
+TOLERANCIA = 0.0
+
+CENARIOS = [params.get_cenario_1_queda, params.get_cenario_2_pouso, params.get_cenario_3_turbulencia,
+            params.get_cenario_4_flat_spin, params.get_cenario_5_pouso_turbulencia]
+
+
+@pytest.mark.parametrize("fabrica", CENARIOS, ids=lambda fabrica: fabrica.__name__)
+def test_paridade_com_simple_pid(fabrica):
+    assert pid_lote.verificar_paridade((fabrica,)) <= TOLERANCIA
@@ -0,0 +1,23 @@
+# 📄 tests/test_relatorio.py
+from unittest import mock
+
+import armazenamento
+import campanha
+import parametros as params
+import relatorio
+import simulador_core
+
+
+def test_verificar_pertinencias_usa_o_motor_da_campanha(tmp_path):
+    diretorio = str(tmp_path / "armazem")
+    fabricas = [params.get_cenario_1_queda, params.get_cenario_3_turbulencia]
+    campanha.rodar_campanha(fabricas, range(3), n_processos=1, motor="tabela", armazem=diretorio)
+    try:
+        with mock.patch.object(simulador_core, 'rodar_simulacao_headless',
+                               wraps=simulador_core.rodar_simulacao_headless) as rodar:
+            instantes_diferentes, maior_diferenca = relatorio.verificar_pertinencias(diretorio, fabricas, n_amostras=6)
+        assert {chamada.kwargs['motor'] for chamada in rodar.call_args_list} == {"tabela"}
+        assert instantes_diferentes == 0
+        assert maior_diferenca < 1e-4
+    finally:
+        armazenamento.fechar_abertos(diretorio)
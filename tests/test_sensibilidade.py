@@ -0,0 +1,35 @@
+# 📄 tests/test_sensibilidade.py
+import numpy as np
+import pytest
+
+import parametros as params
+import sensibilidade
+from simulador_core import rodar_simulacao_headless
+
+
+def test_ishigami():
+    assert sensibilidade.verificar_ishigami(m_base2=10) < 1e-2
+
+
+@pytest.mark.parametrize("fabrica", [params.get_cenario_1_queda, params.get_cenario_4_flat_spin])
+def test_lote_igual_por_rodada(fabrica):
+    fatores = sensibilidade.FATORES_PADRAO
+    nomes = list(fatores)
+    A, B = (sensibilidade.escalar_fatores(m, fatores) for m in sensibilidade.desenho_saltelli(len(nomes), 1))
+    valores, linha_j = sensibilidade.linhas_do_desenho(A, B)
+    valores, sementes = valores.reshape(-1, len(nomes)), linha_j.reshape(-1)
+
+    lote = sensibilidade._avaliar_bloco((fabrica, tuple(nomes), valores, sementes, "vetorizado"))
+    for linha, (valores_linha, semente) in enumerate(zip(valores, sementes)):
+        p = fabrica()
+        for nome, valor in zip(nomes, valores_linha):
+            setattr(p, nome, int(valor) if nome in sensibilidade.FATORES_INTEIROS else float(valor))
+        r = rodar_simulacao_headless(p, int(semente))
+        t_disparo = r.t_disparo if r.disparado else p.tempo_simulacao_max
+        np.testing.assert_allclose(lote[linha], (t_disparo, float(r.disparado), r.risco_max), atol=1e-6)
+
+
+def test_fator_calculado_recusado():
+    with pytest.raises(ValueError):
+        sensibilidade.analisar_sensibilidade([params.get_cenario_1_queda], {'v_terminal': (-30.0, -20.0)},
+                                             m_base2=1, n_processos=1)
@@ -0,0 +1,30 @@
+# 📄 tests/test_simulacao_fisica.py
+import pytest
+
+import parametros as params
+from simulacao_fisica import verificar_solucao_analitica
+
+
+def _queda(altitude_inicial=None, m=None):
+    p = params.get_cenario_1_queda()
+    if altitude_inicial is not None:
+        p.altitude_inicial = altitude_inicial
+    if m is not None:
+        p.m = m
+    return p
+
+
+# Domínio da forma fechada: parado ou descendo mais devagar que v_t
+@pytest.mark.parametrize("p, v_inicial", [
+    (_queda(), None),
+    (params.get_cenario_4_flat_spin(), None),
+    (_queda(), -10.0),
+    (_queda(m=2.0), -0.9 * abs(_queda(m=2.0).v_terminal)),
+    (_queda(altitude_inicial=150.0), None),  # atinge o solo antes do fim
+    (_queda(altitude_inicial=5000.0, m=8.0), -3.0),
+])
+def test_solucao_analitica_igual_ao_solve_ivp(p, v_inicial):
+    erros = verificar_solucao_analitica(p, v_inicial)
+    assert erros['erro_altitude'] < 1e-7
+    assert erros['erro_velocidade'] < 1e-7
+    assert erros['erro_t_final'] < 1e-9
@@ -0,0 +1,56 @@
+# 📄 tests/test_simulacao_sensores.py
+import numpy as np
+import pytest
+
+import parametros as params
+from simulacao_fisica import executar_simulacao_lote
+from simulacao_sensores import simular_sensores_e_filtros, _filtrar_velocidade
+
+
+def _lote_misto():
+    """Lote com janelas de filtro diferentes por linha (e repetidas)."""
+    lista_p = []
+    for janela, fabrica in zip((25, 5, 25, 60), (params.get_cenario_1_queda, params.get_cenario_2_pouso,
+                                                  params.get_cenario_4_flat_spin, params.get_cenario_1_queda)):
+        p = fabrica()
+        p.tamanho_janela_filtro = janela
+        lista_p.append(p)
+    return lista_p
+
+
+def _filtrar_por_linha(lista_p, tempo, dados):
+    return np.vstack([
+        _filtrar_velocidade(p, tempo[i:i + 1], dados['velocidade_estimada_gnss'][i:i + 1],
+                            dados['altitude_gnss'][i:i + 1], dados['aceleracao_imu'][i:i + 1])
+        for i, p in enumerate(lista_p)
+    ])
+
+
+def test_lote_com_janelas_diferentes_igual_por_linha():
+    lista_p = _lote_misto()
+    tempo, altitude, velocidade, aceleracao = executar_simulacao_lote(lista_p, n_pontos=300)
+    dados = simular_sensores_e_filtros(lista_p, tempo, altitude, velocidade, aceleracao,
+                                       rng=np.random.default_rng(0), verbose=False)
+    esperado = _filtrar_por_linha(lista_p, tempo, dados)
+    np.testing.assert_allclose(dados['velocidade_filtrada_gnss'], esperado, rtol=0, atol=1e-12)
+
+
+def test_lote_com_estimadores_diferentes_igual_por_linha():
+    lista_p = _lote_misto()
+    lista_p[1].estimador_velocidade = "kalman"
+    lista_p[3].estimador_velocidade = "kalman"
+    lista_p[3].kalman_sigma_acel = 0.5
+    tempo, altitude, velocidade, aceleracao = executar_simulacao_lote(lista_p, n_pontos=300)
+    dados = simular_sensores_e_filtros(lista_p, tempo, altitude, velocidade, aceleracao,
+                                       rng=np.random.default_rng(1), verbose=False)
+    esperado = _filtrar_por_linha(lista_p, tempo, dados)
+    np.testing.assert_allclose(dados['velocidade_filtrada_gnss'], esperado, rtol=0, atol=1e-12)
+
+
+def test_estimador_desconhecido():
+    lista_p = _lote_misto()
+    lista_p[2].estimador_velocidade = "outro"
+    tempo, altitude, velocidade, aceleracao = executar_simulacao_lote(lista_p, n_pontos=50)
+    with pytest.raises(ValueError):
+        simular_sensores_e_filtros(lista_p, tempo, altitude, velocidade, aceleracao,
+                                   rng=np.random.default_rng(0), verbose=False)
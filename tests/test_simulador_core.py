@@ -0,0 +1,21 @@
+# 📄 tests/test_simulador_core.py
+import parametros as params
+from simulador_core import _Etapas, rodar_simulacao_headless
+
+
+def test_cache_etapas_desligado_por_padrao():
+    p = params.get_cenario_1_queda()
+    assert not p.cache_etapas
+    metricas = rodar_simulacao_headless(p, semente=0, instrumentar=True).metricas
+    assert metricas['contadores'].get('cache_acertos', 0) == 0
+    assert metricas['contadores'].get('cache_calculos', 0) == 0
+
+
+def test_cache_etapas_ligado_sob_demanda():
+    p = params.get_cenario_1_queda()
+    assert _Etapas(p, 0, None, usar_cache=True).usar_cache
+    assert not _Etapas(p, None, None, usar_cache=True).usar_cache  # sem semente, nunca
+    p.cache_etapas = True
+    rodar_simulacao_headless(p, semente=0)
+    metricas = rodar_simulacao_headless(p, semente=0, instrumentar=True).metricas
+    assert metricas['contadores']['cache_acertos'] == 3
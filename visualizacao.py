@@ -3,7 +3,7 @@
 import matplotlib.pyplot as plt
 import numpy as np
 import skfuzzy as fuzz
-from IPython.display import display, Markdown
+from logica_decisao import calcular_disparo
 
 def plotar_fisica_base(tempo, altitudes, velocidades):
     """
@@ -113,51 +113,29 @@ def analisar_resultados(p, tempo, dados_sensores,
     """
     Analisa os resultados e imprime o RELATÓRIO EM TABELA DETALHADO.
     (Versão com PRINTS DE DEBUG no timer)
+    Uma rodada, no notebook; para campanhas inteiras, ver relatorio.py.
     """
     print("\n--- Análise da Tomada de Decisão (Item 3.3.2) ---")
-    intervalo_tempo_dt = tempo[1] - tempo[0]
-    contador_tempo_seguro = 0.0
-    disparado = False
-    i_disparo = -1 
 
     # --- NOVO BLOCO DE DEBUG ---
     print("\n--- DEBUG DO TIMER DE DISPARO (Limiar > %.2f por %.1fs) ---" % (p.limiar_disparo_risco, p.tempo_minimo_disparo))
-    timer_ativo_na_iteracao_anterior = False
     # --- FIM DO NOVO BLOCO ---
 
-    for i in range(len(risco_calculado_fuzzy)):
-        risco_atual = risco_calculado_fuzzy[i] # Pega o risco atual
-
-        # (Novo timer com HISTERESE, dentro de analisar_resultados)
-        # CONDIÇÃO DE ATIVAÇÃO: Risco > 85
-        if risco_atual > p.limiar_disparo_risco:
-            contador_tempo_seguro += intervalo_tempo_dt
-
-            if not timer_ativo_na_iteracao_anterior:
-                print(f"t={tempo[i]:.2f}s: CONDIÇÃO ATIVADA (Risco {risco_atual:.2f} > {p.limiar_disparo_risco}). Timer INICIADO.")
-            timer_ativo_na_iteracao_anterior = True
-
-        # CONDIÇÃO DE RESET: Risco < 80 (o novo limiar)
-        elif risco_atual < p.limiar_reset_timer: 
-            if timer_ativo_na_iteracao_anterior:
-                print(f"t={tempo[i]:.2f}s: CONDIÇÃO FALHOU (Risco {risco_atual:.2f} <= {p.limiar_reset_timer}). Timer RESETADO para 0.0s!")
-
-            contador_tempo_seguro = 0.0
-            timer_ativo_na_iteracao_anterior = False
-
-        else: # Risco está na "zona segura" (entre 80 e 85)
-            if timer_ativo_na_iteracao_anterior:
-                # O timer já estava rodando? Ótimo, continua rodando!
-                contador_tempo_seguro += intervalo_tempo_dt
-        
-        if contador_tempo_seguro >= p.tempo_minimo_disparo and not disparado:
+    # (Timer com HISTERESE, agora em logica_decisao.calcular_disparo)
+    disparo = calcular_disparo(p, tempo, risco_calculado_fuzzy)
+    disparado = disparo['disparado']
+    i_disparo = disparo['i_disparo']
+
+    for tipo, i, risco_atual in disparo['eventos']:
+        if tipo == "ativado":
+            print(f"t={tempo[i]:.2f}s: CONDIÇÃO ATIVADA (Risco {risco_atual:.2f} > {p.limiar_disparo_risco}). Timer INICIADO.")
+        elif tipo == "resetado":
+            print(f"t={tempo[i]:.2f}s: CONDIÇÃO FALHOU (Risco {risco_atual:.2f} <= {p.limiar_reset_timer}). Timer RESETADO para 0.0s!")
+        else:
             print(f"\n*** DISPARO DO PARAQUEDAS ACIONADO! ***")
             print(f"Cenário: {p.cenario_nome}")
             print(f"Tempo da simulação: {tempo[i]:.2f} segundos.")
-            print(f"Condição: Risco ({risco_atual:.1f}) > {p.limiar_disparo_risco} (Sustentado por {contador_tempo_seguro:.2f}s)")
-            disparado = True
-            i_disparo = i
-            break 
+            print(f"Condição: Risco ({risco_atual:.1f}) > {p.limiar_disparo_risco} (Sustentado por {disparo['contador']:.2f}s)")
 
     print("--- FIM DO DEBUG DO TIMER ---") # <-- DEBUG
 
@@ -214,6 +192,7 @@ def analisar_resultados(p, tempo, dados_sensores,
     md_string += f"| **SAÍDA (Resultado)** | **{val_risco:.2f}** | **{get_pertinencia(v['risco_de_queda'], 'risco_de_queda', val_risco)}** |\n"
 
     # 5. Exibir a tabela no Notebook
+    from IPython.display import display, Markdown  # só existe no ambiente do notebook
     display(Markdown(md_string))
 
     print("\n--- CRITÉRIOS DE DISPARO (ANÁLISE TEMPORAL) ---")